@@ -0,0 +1,102 @@
+# services/order-service/benchmarks/bench_compression.py
+"""
+Measure bytes saved and CPU time spent compressing large order events.
+
+Encodes OrderCreated and InventoryRequested events of orders with --lines
+line items with EventCodec, then compresses each with every payload
+compression, at its default level. zstd and lz4 are skipped when their
+packages are not installed:
+
+    cd services/order-service
+    PYTHONPATH=src python benchmarks/bench_compression.py --lines 10,100,1000
+"""
+import argparse
+import random
+import timeit
+import uuid
+from typing import Dict, List
+
+from domain.events import Event, OrderCreated, InventoryRequested
+from adapters.outbound.event_codec import EventCodec
+from adapters.outbound.payload_compression import PayloadCompressor, available_compressions, decompress
+
+
+def sample_events(lines: int, rng: random.Random) -> List[Event]:
+    """The events of an order with the given line items, like a real cart"""
+    order_id = str(uuid.UUID(int=rng.getrandbits(128)))
+    saga_id = str(uuid.UUID(int=rng.getrandbits(128)))
+    products = [f"SKU-{rng.randrange(10 ** 8):08d}" for _ in range(lines)]
+    quantities = [rng.choice((1, 1, 1, 2, 2, 3, 5, 10)) for _ in range(lines)]
+    
+    return [
+        OrderCreated(
+            order_id=order_id,
+            customer_id=f"customer-{rng.randrange(10 ** 6)}",
+            total_amount=0.0,
+            items={
+                product: {"quantity": quantity, "unit_price": round(rng.uniform(0.5, 500.0), 2)}
+                for product, quantity in zip(products, quantities)
+            },
+            saga_id=saga_id,
+        ),
+        InventoryRequested(
+            order_id=order_id,
+            items=dict(zip(products, quantities)),
+            saga_id=saga_id,
+        ),
+    ]
+
+
+def measure(compressor: PayloadCompressor, data: bytes, number: int) -> Dict[str, float]:
+    compressed, properties = compressor.compress(data)
+    compression = properties.get("compression")
+    
+    return {
+        "bytes": len(compressed),
+        "compress_us": timeit.timeit(lambda: compressor.compress(data), number=number) / number * 1e6,
+        "decompress_us": timeit.timeit(lambda: decompress(compressed, compression), number=number) / number * 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Payload size and compress/decompress time per compression")
+    parser.add_argument("--lines", default="10,100,1000", help="Line items per order, comma separated")
+    parser.add_argument("--number", type=int, default=2000, help="Compressions and decompressions timed per event")
+    parser.add_argument("--encoding", default="orjson", help="Event encoding")
+    args = parser.parse_args()
+    
+    codec = EventCodec(args.encoding)
+    rng = random.Random(42)
+    
+    compressors = {}
+    for compression, available in available_compressions().items():
+        if not available:
+            print(f"Skipping {compression}: its package is not installed")
+            continue
+        # Compress whatever the size, to see the cost on small events too
+        compressors[compression] = PayloadCompressor(compression, threshold_bytes=0)
+    
+    print(
+        f"{'event':<20} {'lines':>5} {'compression':<11} {'bytes':>7} {'saved':>6} "
+        f"{'compress us':>12} {'decompress us':>14} {'decode us':>10}"
+    )
+    
+    for lines in (int(lines) for lines in args.lines.split(",")):
+        for event in sample_events(lines, rng):
+            data = codec.encode(event)
+            # Decoding is paid anyway, so it puts the compression cost in proportion
+            decode_us = timeit.timeit(lambda: codec.decode(data), number=args.number) / args.number * 1e6
+            
+            print(f"{event.event_type:<20} {lines:>5} {'none':<11} {len(data):>7} {'':>6} {'':>12} {'':>14} {decode_us:>10.2f}")
+            
+            for compression, compressor in compressors.items():
+                result = measure(compressor, data, args.number)
+                print(
+                    f"{event.event_type:<20} {lines:>5} {compression:<11} {result['bytes']:>7} "
+                    f"{1 - result['bytes'] / len(data):>6.0%} {result['compress_us']:>12.2f} "
+                    f"{result['decompress_us']:>14.2f} {'':>10}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+# services/order-service/benchmarks/bench_consumer_batch.py
+"""
+Measure how many payment events per second the consumer handles.
+
+Compares subscribe, which handles and acknowledges one message at a time,
+with subscribe_batch and the batch event handlers. The topic is filled up
+front, like during a flash sale. Every database call of the stand-in
+repositories costs one --rtt-ms round trip, whatever the number of orders
+it reads or writes, on one of --pool-size connections:
+
+    cd services/order-service
+    PYTHONPATH=src python benchmarks/bench_consumer_batch.py
+"""
+import argparse
+import asyncio
+import queue
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import pulsar
+
+from domain.models import Order, OrderStatus
+from domain.events import Event, PaymentProcessed
+from application.ports.repositories import OrderRepository
+from application.ports.message_bus import MessagePublisher, SagaLog
+from adapters.inbound.event_handlers import EventHandlers
+from adapters.outbound.event_codec import EventCodec
+from adapters.outbound.pulsar_event_publisher import PulsarMessageConsumer
+
+
+class StandInMessage:
+    def __init__(self, data: bytes, key: str, event_type: str):
+        self.data = data
+        self.key = key
+        self.event_type = event_type
+        self.published = int(time.time() * 1000)
+    
+    def value(self) -> bytes:
+        return self.data
+    
+    def properties(self) -> Dict[str, str]:
+        return {"event_type": self.event_type}
+    
+    def partition_key(self) -> str:
+        return self.key
+    
+    def topic_name(self) -> str:
+        return "persistent://public/default/payments"
+    
+    def publish_timestamp(self) -> int:
+        return self.published
+
+
+class StandInConsumer:
+    def __init__(self, messages: "queue.Queue[StandInMessage]", batch_max_messages: int):
+        self.messages = messages
+        self.batch_max_messages = batch_max_messages
+    
+    def receive(self, timeout_millis: Optional[int] = None) -> StandInMessage:
+        try:
+            return self.messages.get(timeout=timeout_millis / 1000)
+        except queue.Empty:
+            raise pulsar.Timeout("Pulsar error: TimeOut")
+    
+    def batch_receive(self) -> List[StandInMessage]:
+        msgs = []
+        try:
+            msgs.append(self.messages.get(timeout=0.02))
+            while len(msgs) < self.batch_max_messages:
+                msgs.append(self.messages.get_nowait())
+        except queue.Empty:
+            pass
+        return msgs
+    
+    def acknowledge(self, msg: StandInMessage) -> None:
+        pass
+    
+    def acknowledge_cumulative(self, msg: StandInMessage) -> None:
+        pass
+    
+    def negative_acknowledge(self, msg: StandInMessage) -> None:
+        pass
+    
+    def close(self) -> None:
+        pass
+
+
+class StandInClient:
+    def __init__(self, messages: "queue.Queue[StandInMessage]", batch_max_messages: int):
+        self.consumer = StandInConsumer(messages, batch_max_messages)
+    
+    def subscribe(self, topic: str, subscription_name: str, **kwargs) -> StandInConsumer:
+        return self.consumer
+    
+    def close(self) -> None:
+        pass
+
+
+class StandInDatabase:
+    """Round trips on a fixed number of connections"""
+    
+    def __init__(self, rtt: float, pool_size: int):
+        self.rtt = rtt
+        self.connections = asyncio.Semaphore(pool_size)
+        self.calls = 0
+    
+    async def round_trip(self) -> None:
+        async with self.connections:
+            self.calls += 1
+            await asyncio.sleep(self.rtt)
+
+
+class StandInOrderRepository(OrderRepository):
+    """Orders in memory, one round trip per call"""
+    
+    def __init__(self, database: StandInDatabase, orders: Dict[str, Order]):
+        self.database = database
+        self.orders = orders
+    
+    async def save(self, order: Order) -> None:
+        await self.database.round_trip()
+    
+    async def get_by_id(self, order_id: str) -> Optional[Order]:
+        await self.database.round_trip()
+        return self.orders.get(order_id)
+    
+    async def get_by_ids(self, order_ids: List[str]) -> List[Order]:
+        await self.database.round_trip()
+        return [self.orders[order_id] for order_id in order_ids if order_id in self.orders]
+    
+    async def get_by_customer_id(self, customer_id: str, limit=None, after=None) -> List[Order]:
+        return []
+    
+    async def update(self, order: Order) -> None:
+        await self.database.round_trip()
+    
+    async def update_many(self, orders: List[Order]) -> None:
+        await self.database.round_trip()
+    
+    async def delete(self, order_id: str) -> None:
+        await self.database.round_trip()
+
+
+class StandInSagaLog(SagaLog):
+    def __init__(self, database: StandInDatabase):
+        self.database = database
+    
+    async def start_saga(self, saga_id: str, order_id: str) -> None:
+        await self.database.round_trip()
+    
+    async def log_event(self, saga_id: str, event: Event) -> None:
+        await self.database.round_trip()
+    
+    async def log_events(self, events) -> None:
+        await self.database.round_trip()
+    
+    async def end_saga(self, saga_id: str, success: bool) -> None:
+        await self.database.round_trip()
+    
+    async def end_sagas(self, sagas) -> None:
+        await self.database.round_trip()
+    
+    async def get_saga_events(self, saga_id: str) -> List[Dict[str, Any]]:
+        return []
+
+
+class StandInPublisher(MessagePublisher):
+    """Writes to the outbox, so it shares the database round trips"""
+    
+    def __init__(self, database: StandInDatabase):
+        self.database = database
+    
+    async def publish(self, event: Event, topic: str) -> None:
+        await self.database.round_trip()
+    
+    async def publish_with_key(self, event: Event, topic: str, key: str) -> None:
+        await self.database.round_trip()
+    
+    async def publish_many_with_keys(self, messages) -> None:
+        await self.database.round_trip()
+
+
+def payment_messages(count: int, orders: int) -> "queue.Queue[StandInMessage]":
+    messages: "queue.Queue[StandInMessage]" = queue.Queue()
+    codec = EventCodec()
+    for i in range(count):
+        order_id = f"order-{i % orders}"
+        event = PaymentProcessed(
+            saga_id=f"saga-{i % orders}",
+            order_id=order_id,
+            payment_id=f"payment-{i}",
+            success=True,
+            message="ok",
+        )
+        messages.put(StandInMessage(codec.encode(event), order_id, event.event_type))
+    return messages
+
+
+async def run_mode(mode: str, args: argparse.Namespace) -> Dict[str, float]:
+    database = StandInDatabase(args.rtt_ms / 1000, args.pool_size)
+    orders = {}
+    for i in range(args.orders):
+        order = Order(id=f"order-{i}", customer_id="bench-customer", saga_id=f"saga-{i}")
+        order.add_item(product_id="product-1", quantity=1, unit_price=10.0)
+        order.update_status(OrderStatus.PENDING_PAYMENT)
+        orders[order.id] = order
+    
+    event_handlers = EventHandlers(
+        order_repository=StandInOrderRepository(database, orders),
+        message_publisher=StandInPublisher(database),
+        saga_log=StandInSagaLog(database),
+    )
+    
+    client = StandInClient(payment_messages(args.messages, args.orders), args.batch_max_messages)
+    message_consumer = PulsarMessageConsumer(
+        client,
+        f"bench-{uuid.uuid4()}",
+        max_concurrent_handlers=args.max_concurrent_handlers,
+        batch_max_messages=args.batch_max_messages,
+    )
+    
+    started = time.perf_counter()
+    
+    if mode == "batch":
+        await message_consumer.subscribe_batch("payments", event_handlers.handle_payment_processed_batch, ["payment_processed"])
+    else:
+        await message_consumer.subscribe("payments", event_handlers.handle_payment_processed, ["payment_processed"])
+    
+    while message_consumer.stats()["handled"] < args.messages:
+        await asyncio.sleep(0.005)
+    
+    elapsed = time.perf_counter() - started
+    
+    await message_consumer.close()
+    
+    return {
+        "messages_per_second": args.messages / elapsed,
+        "database_calls": database.calls,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Consumer throughput with and without batches")
+    parser.add_argument("--messages", type=int, default=5000, help="Payment events on the topic")
+    parser.add_argument("--orders", type=int, default=2000, help="Distinct orders the events refer to")
+    parser.add_argument("--rtt-ms", type=float, default=1.0, help="Round trip of every database call")
+    parser.add_argument("--pool-size", type=int, default=10, help="Database connections")
+    parser.add_argument("--max-concurrent-handlers", type=int, default=32)
+    parser.add_argument("--batch-max-messages", type=int, default=100)
+    parser.add_argument("--modes", default="single,batch", help="Comma-separated consumers to compare")
+    args = parser.parse_args()
+    
+    print(f"{'consumer':<10} {'messages/s':>11} {'db calls':>11}")
+    
+    for mode in args.modes.split(","):
+        result = asyncio.run(run_mode(mode, args))
+        print(f"{mode:<10} {result['messages_per_second']:>11.0f} {result['database_calls']:>11}")
+
+
+if __name__ == "__main__":
+    main()
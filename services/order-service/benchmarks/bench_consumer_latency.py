@@ -0,0 +1,269 @@
+# services/order-service/benchmarks/bench_consumer_latency.py
+"""
+Measure HTTP latency while the Pulsar consumers are idle and under load.
+
+Compares the previous consume loop, which called the blocking receive on the
+event loop, with PulsarMessageConsumer. An in-process stand-in for the Pulsar
+client blocks in receive the same way the real client does; pass
+--service-url to run against a real broker instead:
+
+    cd services/order-service
+    PYTHONPATH=src python benchmarks/bench_consumer_latency.py
+    PYTHONPATH=src python benchmarks/bench_consumer_latency.py --service-url pulsar://localhost:6650
+"""
+import argparse
+import asyncio
+import queue
+import statistics
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+import httpx
+import pulsar
+import uvicorn
+from fastapi import FastAPI
+
+from domain.events import PaymentProcessed
+from adapters.outbound.event_codec import EventCodec
+from adapters.outbound.pulsar_event_publisher import PulsarMessageConsumer
+
+
+TOPICS = ["payments", "inventory", "shipping"]
+
+PAYLOAD = EventCodec().encode(PaymentProcessed(order_id="bench-order", payment_id="bench-payment", success=True))
+
+
+class StandInMessage:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.published = int(time.time() * 1000)
+    
+    def value(self) -> bytes:
+        return self.data
+    
+    def properties(self) -> Dict[str, str]:
+        return {}
+    
+    def topic_name(self) -> str:
+        return "persistent://public/default/payments"
+    
+    def publish_timestamp(self) -> int:
+        return self.published
+
+
+class StandInConsumer:
+    def __init__(self, messages: "queue.Queue[StandInMessage]"):
+        self.messages = messages
+    
+    def receive(self, timeout_millis: Optional[int] = None) -> StandInMessage:
+        try:
+            return self.messages.get(timeout=timeout_millis / 1000 if timeout_millis else None)
+        except queue.Empty:
+            raise pulsar.Timeout("Pulsar error: TimeOut")
+    
+    def acknowledge(self, msg: StandInMessage) -> None:
+        pass
+    
+    def negative_acknowledge(self, msg: StandInMessage) -> None:
+        pass
+    
+    def close(self) -> None:
+        pass
+
+
+class StandInProducer:
+    def __init__(self, messages: "queue.Queue[StandInMessage]"):
+        self.messages = messages
+    
+    def send(self, content: bytes, **kwargs) -> None:
+        self.messages.put(StandInMessage(content))
+    
+    def close(self) -> None:
+        pass
+
+
+class StandInClient:
+    """In-process topics with the blocking receive of the Pulsar client"""
+    
+    def __init__(self):
+        self.topics: Dict[str, "queue.Queue[StandInMessage]"] = {}
+    
+    def subscribe(self, topic: str, subscription_name: str, **kwargs) -> StandInConsumer:
+        return StandInConsumer(self.topics.setdefault(topic, queue.Queue()))
+    
+    def create_producer(self, topic: str, **kwargs) -> StandInProducer:
+        return StandInProducer(self.topics.setdefault(topic, queue.Queue()))
+    
+    def close(self) -> None:
+        pass
+
+
+class BlockingConsumer:
+    """The previous consume loop, calling the blocking receive on the event loop"""
+    
+    def __init__(self, client, subscription_name: str):
+        self.client = client
+        self.subscription_name = subscription_name
+        self.codec = EventCodec()
+        self.consumers = []
+        self.tasks = []
+        self.stopping = False
+    
+    async def subscribe(self, topic: str, handler: Callable) -> None:
+        consumer = self.client.subscribe(
+            topic=f"persistent://public/default/{topic}",
+            subscription_name=self.subscription_name,
+        )
+        self.consumers.append(consumer)
+        self.tasks.append(asyncio.create_task(self._consume(consumer, handler)))
+    
+    async def _consume(self, consumer, handler: Callable) -> None:
+        while not self.stopping:
+            msg = consumer.receive()
+            await handler(self.codec.decode(msg.value()))
+            consumer.acknowledge(msg)
+    
+    async def close(self) -> None:
+        # The receive calls were unblocked after setting the stop flag
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        
+        for consumer in self.consumers:
+            consumer.close()
+        
+        self.client.close()
+
+
+def measure_http(port: int, requests: int, timeout: float) -> Dict[str, float]:
+    """Send requests one after another from a thread outside the event loop"""
+    latencies: List[float] = []
+    timeouts = 0
+    
+    with httpx.Client(timeout=timeout) as client:
+        for _ in range(requests):
+            started = time.perf_counter()
+            try:
+                client.get(f"http://127.0.0.1:{port}/ping")
+                latencies.append((time.perf_counter() - started) * 1000)
+            except httpx.TimeoutException:
+                timeouts += 1
+    
+    latencies.sort()
+    
+    return {
+        "p50": statistics.median(latencies) if latencies else float("nan"),
+        "p99": latencies[int(len(latencies) * 0.99)] if latencies else float("nan"),
+        "max": latencies[-1] if latencies else float("nan"),
+        "timeouts": timeouts,
+    }
+
+
+def produce(client, rate: int, stop: threading.Event) -> None:
+    """Send rate messages per second to every topic until stopped"""
+    producers = [
+        client.create_producer(topic=f"persistent://public/default/{topic}")
+        for topic in TOPICS
+    ]
+    
+    while not stop.is_set():
+        started = time.perf_counter()
+        for producer in producers:
+            producer.send(content=PAYLOAD)
+        stop.wait(max(0.0, 1 / rate - (time.perf_counter() - started)))
+    
+    for producer in producers:
+        producer.close()
+
+
+async def run_mode(mode: str, args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    client = pulsar.Client(args.service_url) if args.service_url else StandInClient()
+    
+    app = FastAPI()
+    
+    @app.get("/ping")
+    async def ping():
+        return {"status": "ok"}
+    
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    
+    async def handler(event):
+        await asyncio.sleep(args.handler_ms / 1000)
+    
+    if mode == "blocking":
+        message_consumer = BlockingConsumer(client, f"bench-{uuid.uuid4()}")
+    else:
+        message_consumer = PulsarMessageConsumer(
+            client,
+            f"bench-{uuid.uuid4()}",
+            max_concurrent_handlers=args.max_concurrent_handlers,
+        )
+    
+    for topic in TOPICS:
+        await message_consumer.subscribe(topic, handler)
+    
+    loop = asyncio.get_running_loop()
+    finished = loop.create_future()
+    results = {}
+    
+    def control():
+        # Runs outside the event loop, which the blocking consumer freezes
+        
+        # Consumers waiting for messages
+        results["idle"] = measure_http(args.port, args.requests, args.timeout)
+        
+        # Consumers handling a steady stream of messages
+        stop = threading.Event()
+        producer = threading.Thread(target=produce, args=(client, args.rate, stop), daemon=True)
+        producer.start()
+        results["load"] = measure_http(args.port, args.requests, args.timeout)
+        stop.set()
+        producer.join()
+        
+        if mode == "blocking":
+            # Blocked receive calls only return on a message
+            message_consumer.stopping = True
+            for topic in TOPICS:
+                client.create_producer(topic=f"persistent://public/default/{topic}").send(content=PAYLOAD)
+        
+        loop.call_soon_threadsafe(finished.set_result, None)
+    
+    threading.Thread(target=control, daemon=True).start()
+    await finished
+    
+    await message_consumer.close()
+    
+    server.should_exit = True
+    await serving
+    
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HTTP latency with idle and loaded consumers")
+    parser.add_argument("--service-url", help="Pulsar broker URL; uses an in-process stand-in when omitted")
+    parser.add_argument("--port", type=int, default=8765, help="Port of the HTTP server under test")
+    parser.add_argument("--requests", type=int, default=200, help="HTTP requests per phase")
+    parser.add_argument("--timeout", type=float, default=1.0, help="HTTP timeout in seconds")
+    parser.add_argument("--rate", type=int, default=200, help="Messages per second per topic under load")
+    parser.add_argument("--handler-ms", type=float, default=2.0, help="Simulated handler time in milliseconds")
+    parser.add_argument("--max-concurrent-handlers", type=int, default=32)
+    parser.add_argument("--modes", default="blocking,threaded", help="Comma-separated consumers to compare")
+    args = parser.parse_args()
+    
+    print(f"{'consumer':<10} {'phase':<6} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'timeouts':>9}")
+    
+    for mode in args.modes.split(","):
+        results = asyncio.run(run_mode(mode, args))
+        for phase, result in results.items():
+            print(
+                f"{mode:<10} {phase:<6} {result['p50']:>9.2f} {result['p99']:>9.2f} "
+                f"{result['max']:>9.2f} {result['timeouts']:>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
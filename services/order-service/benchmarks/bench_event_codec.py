@@ -0,0 +1,89 @@
+# services/order-service/benchmarks/bench_event_codec.py
+"""
+Measure message size and CPU time per event of the event encodings.
+
+Compares the previous path, json.dumps of Event.to_dict on publish and
+json.loads plus building the event from the dictionary on consume, with
+EventCodec and each of its encodings. msgpack is skipped when the package
+is not installed:
+
+    cd services/order-service
+    PYTHONPATH=src python benchmarks/bench_event_codec.py
+"""
+import argparse
+import json
+import timeit
+from typing import Callable, Dict, List
+
+from domain.events import Event, OrderCreated, PaymentProcessed, event_from_dict
+from adapters.outbound.event_codec import EventCodec
+
+
+def sample_events(items: int) -> List[Event]:
+    return [
+        OrderCreated(
+            order_id="5f0c9a8e-1b2d-4c3e-9f4a-6b7c8d9e0f1a",
+            customer_id="customer-123",
+            total_amount=10.0 * items,
+            items={
+                f"product-{i}": {"quantity": 1, "unit_price": 10.0}
+                for i in range(items)
+            },
+            saga_id="9a8b7c6d-5e4f-4a3b-2c1d-0e9f8a7b6c5d",
+        ),
+        PaymentProcessed(
+            order_id="5f0c9a8e-1b2d-4c3e-9f4a-6b7c8d9e0f1a",
+            payment_id="payment-123",
+            success=True,
+            message="Payment processed",
+            saga_id="9a8b7c6d-5e4f-4a3b-2c1d-0e9f8a7b6c5d",
+        ),
+    ]
+
+
+def json_encode(event: Event) -> bytes:
+    return json.dumps(event.to_dict()).encode("utf-8")
+
+
+def json_decode(data: bytes) -> Event:
+    return event_from_dict(json.loads(data.decode("utf-8")))
+
+
+def measure(encode: Callable[[Event], bytes], decode: Callable[[bytes], Event], event: Event, number: int) -> Dict[str, float]:
+    data = encode(event)
+    
+    return {
+        "bytes": len(data),
+        "encode_us": timeit.timeit(lambda: encode(event), number=number) / number * 1e6,
+        "decode_us": timeit.timeit(lambda: decode(data), number=number) / number * 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Event size and encode/decode time per encoding")
+    parser.add_argument("--number", type=int, default=20000, help="Encodes and decodes timed per event")
+    parser.add_argument("--items", type=int, default=5, help="Items of the order created event")
+    args = parser.parse_args()
+    
+    codecs = {"json": (json_encode, json_decode)}
+    for encoding in ("orjson", "msgpack"):
+        try:
+            codec = EventCodec(encoding)
+        except ValueError as e:
+            print(f"Skipping {encoding}: {str(e)}")
+            continue
+        codecs[encoding] = (codec.encode, codec.decode)
+    
+    print(f"{'event':<20} {'encoding':<9} {'bytes':>6} {'encode us':>10} {'decode us':>10}")
+    
+    for event in sample_events(args.items):
+        for name, (encode, decode) in codecs.items():
+            result = measure(encode, decode, event, args.number)
+            print(
+                f"{event.event_type:<20} {name:<9} {result['bytes']:>6} "
+                f"{result['encode_us']:>10.2f} {result['decode_us']:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
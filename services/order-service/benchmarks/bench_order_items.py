@@ -0,0 +1,131 @@
+# services/order-service/benchmarks/bench_order_items.py
+"""
+Measure how the latency of saving an order grows with its number of items.
+
+Compares the previous one-INSERT-per-item loop with the single round trip
+used by PostgresOrderRepository.save. Requires a reachable PostgreSQL server,
+on which it drops and recreates BENCH_POSTGRES_DB (orders_bench by default):
+
+    cd services/order-service
+    PYTHONPATH=src python benchmarks/bench_order_items.py --iterations 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from typing import Callable, Dict, List
+
+import asyncpg
+
+from domain.models import Order
+from adapters.outbound.postgres_repository import PostgresOrderRepository
+from main import create_tables
+
+
+PG_HOST = os.getenv("POSTGRES_HOST", "localhost")
+PG_PORT = os.getenv("POSTGRES_PORT", "5432")
+PG_USER = os.getenv("POSTGRES_USER", "postgres")
+PG_PASSWORD = os.getenv("POSTGRES_PASSWORD", "postgres")
+# Not POSTGRES_DB, which names the database of the service
+PG_DB = os.getenv("BENCH_POSTGRES_DB", "orders_bench")
+PG_DSN = f"postgres://{PG_USER}:{PG_PASSWORD}@{PG_HOST}:{PG_PORT}/{PG_DB}"
+
+
+def build_order(item_count: int) -> Order:
+    order = Order(customer_id="bench-customer")
+    for i in range(item_count):
+        order.add_item(product_id=f"product-{i}", quantity=1 + i % 5, unit_price=9.99)
+    return order
+
+
+async def save_per_row(pool: asyncpg.Pool, order: Order) -> None:
+    """The previous implementation: one INSERT per order item"""
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            await conn.execute(
+                """
+                INSERT INTO orders (
+                    id, customer_id, status, created_at, modified_at,
+                    saga_id, metadata, total_amount
+                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+                """,
+                order.id,
+                order.customer_id,
+                order.status.name,
+                order.created_at,
+                order.modified_at,
+                order.saga_id,
+                json.dumps(order.metadata),
+                order.total_amount,
+            )
+            for item in order.items:
+                await conn.execute(
+                    """
+                    INSERT INTO order_items (
+                        order_id, product_id, quantity, unit_price
+                    ) VALUES ($1, $2, $3, $4)
+                    """,
+                    order.id,
+                    item.product_id,
+                    item.quantity,
+                    item.unit_price,
+                )
+
+
+async def measure(save: Callable, item_count: int, iterations: int) -> Dict[str, float]:
+    samples: List[float] = []
+    for _ in range(iterations):
+        order = build_order(item_count)
+        started = time.perf_counter()
+        await save(order)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+
+async def run(item_counts: List[int], iterations: int) -> None:
+    if not PG_DB.endswith("_bench"):
+        raise SystemExit(f"Refusing to drop database {PG_DB}, whose name does not end in _bench")
+    
+    sys_conn = await asyncpg.connect(
+        f"postgres://{PG_USER}:{PG_PASSWORD}@{PG_HOST}:{PG_PORT}/postgres"
+    )
+    try:
+        await sys_conn.execute(f"DROP DATABASE IF EXISTS {PG_DB}")
+        await sys_conn.execute(f"CREATE DATABASE {PG_DB}")
+    finally:
+        await sys_conn.close()
+    
+    pool = await asyncpg.create_pool(PG_DSN)
+    try:
+        await create_tables(pool)
+        repository = PostgresOrderRepository(pool)
+        
+        print(f"{'items':>6} | {'per-row p50':>12} {'p99':>8} | {'bulk p50':>9} {'p99':>8} | speedup")
+        for item_count in item_counts:
+            per_row = await measure(lambda o: save_per_row(pool, o), item_count, iterations)
+            bulk = await measure(repository.save, item_count, iterations)
+            print(
+                f"{item_count:>6} | {per_row['p50']:>10.2f}ms {per_row['p99']:>6.2f}ms"
+                f" | {bulk['p50']:>7.2f}ms {bulk['p99']:>6.2f}ms"
+                f" | {per_row['p50'] / bulk['p50']:>6.1f}x"
+            )
+    finally:
+        await pool.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Order item write benchmark")
+    parser.add_argument("--items", type=int, nargs="+", default=[1, 10, 50, 200, 1000])
+    parser.add_argument("--iterations", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(run(args.items, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
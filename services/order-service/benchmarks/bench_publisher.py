@@ -0,0 +1,201 @@
+# services/order-service/benchmarks/bench_publisher.py
+"""
+Measure publish throughput and latency of PulsarMessagePublisher.
+
+Compares the previous blocking producer.send per event with send_async,
+for single publishes and for publish_many with the two events emitted per
+order. Publishers run as concurrent tasks, like requests in the API. An
+in-process broker stand-in acks each batch after --rtt-ms; pass
+--service-url to run against a real broker instead.
+Latency of the blocking publisher leaves out the time other tasks wait for
+the frozen event loop, so compare throughput first:
+
+    cd services/order-service
+    PYTHONPATH=src python benchmarks/bench_publisher.py
+    PYTHONPATH=src python benchmarks/bench_publisher.py --service-url pulsar://localhost:6650
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from typing import Callable, Dict, List
+
+import pulsar
+
+from domain.events import OrderCreated, PaymentRequested
+from adapters.outbound.pulsar_event_publisher import PulsarMessagePublisher
+
+
+class StandInProducer:
+    """Acks sends after a broker round trip, batching the async ones"""
+    
+    def __init__(self, rtt: float, batching_max_messages: int = 1000, batching_max_publish_delay_ms: int = 10, **kwargs):
+        self.rtt = rtt
+        self.batching_max_messages = batching_max_messages
+        self.batching_max_publish_delay = batching_max_publish_delay_ms / 1000
+        self.pending: List[Callable] = []
+        self.pending_since = 0.0
+        self.lock = threading.Condition()
+        self.closed = False
+        self.batches = 0
+        self.sender = threading.Thread(target=self._send_batches, daemon=True)
+        self.sender.start()
+    
+    def send(self, content: bytes, **kwargs) -> None:
+        time.sleep(self.rtt)
+    
+    def send_async(self, content: bytes, callback: Callable, **kwargs) -> None:
+        with self.lock:
+            if not self.pending:
+                self.pending_since = time.monotonic()
+            self.pending.append(callback)
+            self.lock.notify()
+    
+    def flush(self) -> None:
+        pass
+    
+    def close(self) -> None:
+        with self.lock:
+            self.closed = True
+            self.lock.notify()
+    
+    def _send_batches(self) -> None:
+        while True:
+            with self.lock:
+                while not self.closed and (
+                    not self.pending
+                    or len(self.pending) < self.batching_max_messages
+                    and time.monotonic() - self.pending_since < self.batching_max_publish_delay
+                ):
+                    timeout = self.batching_max_publish_delay - (time.monotonic() - self.pending_since) if self.pending else None
+                    self.lock.wait(timeout)
+                
+                if self.closed:
+                    return
+                
+                batch = self.pending[:self.batching_max_messages]
+                self.pending = self.pending[self.batching_max_messages:]
+                self.pending_since = time.monotonic()
+            
+            # One round trip per batch
+            time.sleep(self.rtt)
+            self.batches += 1
+            for callback in batch:
+                callback(pulsar.Result.Ok, None)
+
+
+class StandInClient:
+    def __init__(self, rtt: float):
+        self.rtt = rtt
+        self.producers: List[StandInProducer] = []
+    
+    def create_producer(self, topic: str, **kwargs) -> StandInProducer:
+        producer = StandInProducer(self.rtt, **kwargs)
+        self.producers.append(producer)
+        return producer
+    
+    def close(self) -> None:
+        for producer in self.producers:
+            producer.close()
+
+
+class BlockingPublisher:
+    """The previous publisher, calling the blocking producer.send per event"""
+    
+    def __init__(self, client):
+        self.client = client
+        self.producers = {}
+    
+    async def publish(self, event, topic: str) -> None:
+        if topic not in self.producers:
+            self.producers[topic] = self.client.create_producer(topic=f"persistent://public/default/{topic}")
+        
+        self.producers[topic].send(
+            content=json.dumps(event.to_dict()).encode("utf-8"),
+            properties={"event_type": event.event_type},
+        )
+    
+    async def publish_many(self, messages) -> None:
+        for event, topic in messages:
+            await self.publish(event, topic)
+    
+    async def close(self) -> None:
+        pass
+
+
+def order_events(i: int):
+    order_created = OrderCreated(order_id=f"order-{i}", customer_id="bench-customer", total_amount=10.0)
+    payment_requested = PaymentRequested(order_id=f"order-{i}", customer_id="bench-customer", amount=10.0)
+    return [(order_created, "orders"), (payment_requested, "payments")]
+
+
+async def run_mode(mode: str, args: argparse.Namespace) -> Dict[str, float]:
+    client = pulsar.Client(args.service_url) if args.service_url else StandInClient(args.rtt_ms / 1000)
+    
+    if mode == "blocking":
+        publisher = BlockingPublisher(client)
+    else:
+        publisher = PulsarMessagePublisher(
+            client,
+            batching_max_messages=args.batching_max_messages,
+            batching_max_publish_delay_ms=args.batching_max_publish_delay_ms,
+        )
+    
+    latencies: List[float] = []
+    next_order = iter(range(args.orders))
+    
+    async def publish_orders():
+        # Each worker publishes the events of one order at a time
+        for i in next_order:
+            events = order_events(i)
+            started = time.perf_counter()
+            
+            if mode == "many":
+                await publisher.publish_many(events)
+            else:
+                for event, topic in events:
+                    await publisher.publish(event, topic)
+            
+            latencies.append((time.perf_counter() - started) * 1000)
+    
+    # Create the producers before measuring
+    await publisher.publish_many(order_events(-1))
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(publish_orders() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    
+    await publisher.close()
+    client.close()
+    
+    latencies.sort()
+    
+    return {
+        "events_per_second": args.orders * 2 / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99)],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Publish throughput and latency")
+    parser.add_argument("--service-url", help="Pulsar broker URL; uses an in-process stand-in when omitted")
+    parser.add_argument("--orders", type=int, default=2000, help="Orders to publish (two events each)")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent publishing tasks")
+    parser.add_argument("--rtt-ms", type=float, default=2.0, help="Broker round trip of the stand-in")
+    parser.add_argument("--batching-max-messages", type=int, default=1000)
+    parser.add_argument("--batching-max-publish-delay-ms", type=int, default=10)
+    parser.add_argument("--modes", default="blocking,async,many", help="Comma-separated publishers to compare")
+    args = parser.parse_args()
+    
+    print(f"{'publisher':<10} {'events/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    
+    for mode in args.modes.split(","):
+        result = asyncio.run(run_mode(mode, args))
+        print(f"{mode:<10} {result['events_per_second']:>10.0f} {result['p50']:>9.2f} {result['p99']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# services/order-service/benchmarks/bench_saga_in_memory.py
+"""
+Measure how many order sagas per second run on the in-memory message bus.
+
+Creates --orders orders, --concurrency at a time, and waits for each saga
+to go from the order to the inventory allocation. Stand-in payment and
+inventory services answer the requests on the same bus, and the
+repositories keep the orders in memory, so only the order service handlers,
+the event codec and the bus are measured:
+
+    cd services/order-service
+    PYTHONPATH=src python benchmarks/bench_saga_in_memory.py
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+from domain.models import Order
+from domain.events import Event, PaymentProcessed, InventoryAllocated
+from application.ports.repositories import OrderRepository
+from application.ports.message_bus import SagaLog
+from application.commands.create_order import CreateOrderCommand, CreateOrderHandler, CreateOrderItemDTO
+from adapters.inbound.event_handlers import EventHandlers
+from adapters.outbound.in_memory_message_bus import (
+    InMemoryMessageBus,
+    InMemoryMessagePublisher,
+    InMemoryMessageConsumer,
+)
+
+
+class StandInOrderRepository(OrderRepository):
+    def __init__(self):
+        self.orders: Dict[str, Order] = {}
+    
+    async def save(self, order: Order) -> None:
+        self.orders[order.id] = order
+    
+    async def get_by_id(self, order_id: str) -> Optional[Order]:
+        return self.orders.get(order_id)
+    
+    async def get_by_customer_id(self, customer_id: str, limit=None, after=None) -> List[Order]:
+        return []
+    
+    async def update(self, order: Order) -> None:
+        self.orders[order.id] = order
+    
+    async def delete(self, order_id: str) -> None:
+        self.orders.pop(order_id, None)
+
+
+class StandInSagaLog(SagaLog):
+    def __init__(self):
+        self.ended: Dict[str, float] = {}
+    
+    async def start_saga(self, saga_id: str, order_id: str) -> None:
+        pass
+    
+    async def log_event(self, saga_id: str, event: Event) -> None:
+        pass
+    
+    async def end_saga(self, saga_id: str, success: bool) -> None:
+        self.ended[saga_id] = time.perf_counter()
+    
+    async def get_saga_events(self, saga_id: str) -> List[Dict[str, Any]]:
+        return []
+
+
+async def run_participants(bus: InMemoryMessageBus) -> List[InMemoryMessageConsumer]:
+    """Pay every payment request and allocate every inventory request"""
+    publisher = InMemoryMessagePublisher(bus)
+    
+    async def pay(event: Event) -> None:
+        await publisher.publish_with_key(
+            PaymentProcessed(order_id=event.order_id, payment_id=event.order_id, success=True, saga_id=event.saga_id),
+            "payments",
+            event.order_id,
+        )
+    
+    async def allocate(event: Event) -> None:
+        await publisher.publish_with_key(
+            InventoryAllocated(order_id=event.order_id, success=True, allocated_items=event.items, saga_id=event.saga_id),
+            "inventory",
+            event.order_id,
+        )
+    
+    payment_service = InMemoryMessageConsumer(bus, "payment-service")
+    inventory_service = InMemoryMessageConsumer(bus, "inventory-service")
+    await payment_service.subscribe("payments", pay, ["payment_requested"])
+    await inventory_service.subscribe("inventory", allocate, ["inventory_requested"])
+    
+    return [payment_service, inventory_service]
+
+
+async def run(args: argparse.Namespace) -> Dict[str, float]:
+    bus = InMemoryMessageBus()
+    publisher = InMemoryMessagePublisher(bus)
+    order_repository = StandInOrderRepository()
+    saga_log = StandInSagaLog()
+    
+    create_order_handler = CreateOrderHandler(
+        order_repository=order_repository,
+        message_publisher=publisher,
+        saga_log=saga_log,
+    )
+    event_handlers = EventHandlers(
+        order_repository=order_repository,
+        message_publisher=publisher,
+        saga_log=saga_log,
+    )
+    
+    consumers = await run_participants(bus)
+    order_service = InMemoryMessageConsumer(bus, "order-service", max_concurrent_handlers=args.max_concurrent_handlers)
+    await order_service.subscribe("payments", event_handlers.handle_payment_processed, ["payment_processed"])
+    await order_service.subscribe("inventory", event_handlers.handle_inventory_allocated, ["inventory_allocated"])
+    consumers.append(order_service)
+    
+    started_at: Dict[str, float] = {}
+    slots = asyncio.Semaphore(args.concurrency)
+    
+    async def create_order(i: int) -> None:
+        async with slots:
+            started = time.perf_counter()
+            result = await create_order_handler.handle(CreateOrderCommand(
+                customer_id=f"customer-{i}",
+                items=[CreateOrderItemDTO(product_id="product-1", quantity=1, unit_price=10.0)],
+            ))
+            started_at[result["saga_id"]] = started
+            
+            # Hold the slot until the saga ends
+            while result["saga_id"] not in saga_log.ended:
+                await asyncio.sleep(0.001)
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(create_order(i) for i in range(args.orders)))
+    elapsed = time.perf_counter() - started
+    
+    for consumer in consumers:
+        await consumer.close()
+    
+    latencies = sorted((saga_log.ended[saga_id] - at) * 1000 for saga_id, at in started_at.items())
+    
+    return {
+        "sagas_per_second": args.orders / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Saga throughput on the in-memory message bus")
+    parser.add_argument("--orders", type=int, default=5000, help="Orders to create")
+    parser.add_argument("--concurrency", type=int, default=100, help="Sagas running at the same time")
+    parser.add_argument("--max-concurrent-handlers", type=int, default=32)
+    args = parser.parse_args()
+    
+    # Keep per-event logging out of the measurement
+    logging.disable(logging.INFO)
+    
+    result = asyncio.run(run(args))
+    
+    print(f"{'sagas/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    print(f"{result['sagas_per_second']:>9.0f} {result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,16 @@
 # services/order-service/src/adapters/inbound/event_handlers.py
 import logging
-from typing import Dict, Any
+from contextlib import nullcontext
+from typing import AsyncContextManager, Dict, Any, List, Optional
 
-from domain.models import OrderStatus
-from domain.events import PaymentProcessed, InventoryAllocated, OrderShipped
+from domain.models import Order, OrderStatus
+from domain.events import Event, PaymentProcessed, InventoryAllocated, InventoryRequested, OrderShipped
 from application.ports.repositories import OrderRepository
 from application.ports.message_bus import MessagePublisher, SagaLog
+from application.ports.cache import OrderCache
+from application.ports.read_model import OrderReadModel
+from application.ports.unit_of_work import UnitOfWork
+from application.ports.processed_events import ProcessedEventStore
 
 
 class EventHandlers:
@@ -14,151 +19,235 @@ class EventHandlers:
         order_repository: OrderRepository,
         message_publisher: MessagePublisher,
         saga_log: SagaLog,
+        order_cache: Optional[OrderCache] = None,
+        read_model: Optional[OrderReadModel] = None,
+        unit_of_work: Optional[UnitOfWork] = None,
+        processed_events: Optional[ProcessedEventStore] = None,
     ):
         self.order_repository = order_repository
         self.message_publisher = message_publisher
         self.saga_log = saga_log
+        self.order_cache = order_cache
+        self.read_model = read_model
+        self.unit_of_work = unit_of_work
+        self.processed_events = processed_events
         self.logger = logging.getLogger(__name__)
     
-    async def handle_payment_processed(self, event_data: Dict[str, Any]) -> None:
+    async def handle_payment_processed(self, event: PaymentProcessed) -> None:
         """Handle payment processed event"""
-        self.logger.info(f"Handling payment processed event: {event_data}")
-        
-        # Create event object
-        event = PaymentProcessed(
-            event_id=event_data["event_id"],
-            saga_id=event_data["saga_id"],
-            order_id=event_data["order_id"],
-            payment_id=event_data["payment_id"],
-            success=event_data["success"],
-            message=event_data["message"],
-        )
-        
-        # Log event in saga
-        if event.saga_id:
-            await self.saga_log.log_event(event.saga_id, event)
-        
-        # Get order
-        order = await self.order_repository.get_by_id(event.order_id)
-        
-        if not order:
-            self.logger.error(f"Order {event.order_id} not found")
-            return
+        await self.handle_payment_processed_batch([event])
+    
+    async def handle_payment_processed_batch(self, events: List[PaymentProcessed]) -> None:
+        """Handle a batch of payment processed events in one transaction"""
+        self.logger.info(f"Handling {len(events)} payment processed events")
         
-        if event.success:
-            # Update order status to payment confirmed
-            order.update_status(OrderStatus.PAYMENT_CONFIRMED)
+        async with self._transaction():
+            # Skip the events handled before
+            events = await self._claim(events)
             
-            # Create inventory requested event
-            from domain.events import InventoryRequested
+            if not events:
+                return
             
-            inventory_requested = InventoryRequested(
-                order_id=order.id,
-                items={item.product_id: item.quantity for item in order.items},
-                saga_id=order.saga_id,
-            )
+            # Log events in saga
+            await self._log_events(events)
             
-            # Update order status
-            order.update_status(OrderStatus.PENDING_INVENTORY)
+            # Get every referenced order with one query
+            orders = await self._get_orders(events)
             
-            # Update order in repository
-            await self.order_repository.update(order)
+            inventory_requests = []
+            ended_sagas = []
             
-            # Publish inventory requested event
-            await self.message_publisher.publish(
-                event=inventory_requested,
-                topic="inventory",
-            )
+            for event in events:
+                order = orders.get(event.order_id)
+                
+                if not order:
+                    self.logger.error(f"Order {event.order_id} not found")
+                    continue
+                
+                if event.success:
+                    # Update order status to payment confirmed
+                    order.update_status(OrderStatus.PAYMENT_CONFIRMED)
+                    
+                    # Create inventory requested event
+                    inventory_requests.append(InventoryRequested(
+                        order_id=order.id,
+                        items={item.product_id: item.quantity for item in order.items},
+                        saga_id=order.saga_id,
+                    ))
+                    
+                    # Update order status
+                    order.update_status(OrderStatus.PENDING_INVENTORY)
+                else:
+                    # Payment failed, cancel order
+                    order.update_status(OrderStatus.FAILED)
+                    order.metadata["payment_failure_reason"] = event.message
+                    
+                    # End saga as failed
+                    if order.saga_id:
+                        ended_sagas.append((order.saga_id, False))
             
-            # Log event in saga
-            if order.saga_id:
-                await self.saga_log.log_event(order.saga_id, inventory_requested)
-        else:
-            # Payment failed, cancel order
-            order.update_status(OrderStatus.FAILED)
-            order.metadata["payment_failure_reason"] = event.message
+            # Update the orders together
+            await self._update(list(orders.values()))
             
-            # Update order in repository
-            await self.order_repository.update(order)
+            # Publish inventory requested events
+            if inventory_requests:
+                await self.message_publisher.publish_many_with_keys([
+                    (inventory_requested, "inventory", inventory_requested.order_id)
+                    for inventory_requested in inventory_requests
+                ])
+                
+                # Log events in saga
+                await self._log_events(inventory_requests)
             
-            # End saga as failed
-            if order.saga_id:
-                await self.saga_log.end_saga(order.saga_id, False)
+            if ended_sagas:
+                await self.saga_log.end_sagas(ended_sagas)
+        
+        self._mark_committed(events)
+        await self._invalidate_many(list(orders.values()))
     
-    async def handle_inventory_allocated(self, event_data: Dict[str, Any]) -> None:
+    async def handle_inventory_allocated(self, event: InventoryAllocated) -> None:
         """Handle inventory allocated event"""
-        self.logger.info(f"Handling inventory allocated event: {event_data}")
-        
-        # Create event object
-        event = InventoryAllocated(
-            event_id=event_data["event_id"],
-            saga_id=event_data["saga_id"],
-            order_id=event_data["order_id"],
-            success=event_data["success"],
-            message=event_data["message"],
-            allocated_items=event_data["allocated_items"],
-        )
-        
-        # Log event in saga
-        if event.saga_id:
-            await self.saga_log.log_event(event.saga_id, event)
+        await self.handle_inventory_allocated_batch([event])
+    
+    async def handle_inventory_allocated_batch(self, events: List[InventoryAllocated]) -> None:
+        """Handle a batch of inventory allocated events in one transaction"""
+        self.logger.info(f"Handling {len(events)} inventory allocated events")
         
-        # Get order
-        order = await self.order_repository.get_by_id(event.order_id)
+        async with self._transaction():
+            # Skip the events handled before
+            events = await self._claim(events)
+            
+            if not events:
+                return
+            
+            # Log events in saga
+            await self._log_events(events)
+            
+            # Get every referenced order with one query
+            orders = await self._get_orders(events)
+            
+            ended_sagas = []
+            
+            for event in events:
+                order = orders.get(event.order_id)
+                
+                if not order:
+                    self.logger.error(f"Order {event.order_id} not found")
+                    continue
+                
+                if event.success:
+                    # Update order status to inventory confirmed
+                    order.update_status(OrderStatus.INVENTORY_CONFIRMED)
+                    
+                    # Store allocated items in metadata
+                    order.metadata["allocated_items"] = event.allocated_items
+                else:
+                    # Inventory allocation failed, cancel order
+                    order.update_status(OrderStatus.FAILED)
+                    order.metadata["inventory_failure_reason"] = event.message
+                
+                # Order process completed, successfully or not
+                if order.saga_id:
+                    ended_sagas.append((order.saga_id, event.success))
+            
+            # Update the orders together
+            await self._update(list(orders.values()))
+            
+            if ended_sagas:
+                await self.saga_log.end_sagas(ended_sagas)
         
-        if not order:
-            self.logger.error(f"Order {event.order_id} not found")
-            return
+        self._mark_committed(events)
+        await self._invalidate_many(list(orders.values()))
+    
+    async def handle_order_shipped(self, event: OrderShipped) -> None:
+        """Handle order shipped event"""
+        self.logger.info(f"Handling order shipped event: {event}")
         
-        if event.success:
-            # Update order status to inventory confirmed
-            order.update_status(OrderStatus.INVENTORY_CONFIRMED)
+        async with self._transaction():
+            # Skip the event if it was handled before
+            if not await self._claim([event]):
+                return
             
-            # Store allocated items in metadata
-            order.metadata["allocated_items"] = event.allocated_items
+            # Get order
+            order = await self.order_repository.get_by_id(event.order_id)
             
-            # Update order in repository
-            await self.order_repository.update(order)
+            if not order:
+                self.logger.error(f"Order {event.order_id} not found")
+                return
+            
+            # Update order status to shipped
+            order.update_status(OrderStatus.SHIPPED)
             
-            # Order process completed successfully
-            if order.saga_id:
-                await self.saga_log.end_saga(order.saga_id, True)
-        else:
-            # Inventory allocation failed, cancel order
-            order.update_status(OrderStatus.FAILED)
-            order.metadata["inventory_failure_reason"] = event.message
+            # Store tracking number in metadata
+            order.metadata["tracking_number"] = event.tracking_number
             
             # Update order in repository
             await self.order_repository.update(order)
-            
-            # End saga as failed
-            if order.saga_id:
-                await self.saga_log.end_saga(order.saga_id, False)
+            await self._project(order)
+        
+        self._mark_committed([event])
+        await self._invalidate(order)
     
-    async def handle_order_shipped(self, event_data: Dict[str, Any]) -> None:
-        """Handle order shipped event"""
-        self.logger.info(f"Handling order shipped event: {event_data}")
+    def _transaction(self) -> AsyncContextManager[Any]:
+        """Open a transaction of the unit of work, if there is one"""
+        return self.unit_of_work.transaction() if self.unit_of_work else nullcontext()
+    
+    async def _claim(self, events: List[Event]) -> List[Event]:
+        """Record the events as processed, keeping the ones not handled before"""
+        if not self.processed_events:
+            return events
         
-        # Create event object
-        event = OrderShipped(
-            event_id=event_data["event_id"],
-            saga_id=event_data["saga_id"],
-            order_id=event_data["order_id"],
-            tracking_number=event_data["tracking_number"],
-        )
+        claimed = await self.processed_events.claim([event.event_id for event in events])
         
-        # Get order
-        order = await self.order_repository.get_by_id(event.order_id)
+        fresh = []
+        for event in events:
+            if event.event_id in claimed:
+                claimed.discard(event.event_id)
+                fresh.append(event)
         
-        if not order:
-            self.logger.error(f"Order {event.order_id} not found")
-            return
+        if len(fresh) < len(events):
+            self.logger.info(f"Skipping {len(events) - len(fresh)} duplicate events")
         
-        # Update order status to shipped
-        order.update_status(OrderStatus.SHIPPED)
+        return fresh
+    
+    def _mark_committed(self, events: List[Event]) -> None:
+        """Let the store remember events whose handling is committed"""
+        if self.processed_events:
+            self.processed_events.mark_committed([event.event_id for event in events])
+    
+    async def _log_events(self, events: List[Event]) -> None:
+        """Log the events that belong to a saga"""
+        saga_events = [(event.saga_id, event) for event in events if event.saga_id]
+        if saga_events:
+            await self.saga_log.log_events(saga_events)
+    
+    async def _get_orders(self, events: List[Event]) -> Dict[str, Order]:
+        """Get the orders referenced by the events, by ID"""
+        order_ids = list(dict.fromkeys(event.order_id for event in events))
+        orders = await self.order_repository.get_by_ids(order_ids)
+        return {order.id: order for order in orders}
+    
+    async def _update(self, orders: List[Order]) -> None:
+        """Write updated orders back and project them to the read model"""
+        if not orders:
+            return
         
-        # Store tracking number in metadata
-        order.metadata["tracking_number"] = event.tracking_number
+        await self.order_repository.update_many(orders)
         
-        # Update order in repository
-        await self.order_repository.update(order)
\ No newline at end of file
+        if self.read_model:
+            await self.read_model.project_many(orders)
+    
+    async def _project(self, order: Order) -> None:
+        """Project an updated order to the read model"""
+        if self.read_model:
+            await self.read_model.project(order)
+    
+    async def _invalidate(self, order: Order) -> None:
+        """Drop the cached view of an order once its update is committed"""
+        if self.order_cache:
+            await self.order_cache.invalidate(order.id)
+    
+    async def _invalidate_many(self, orders: List[Order]) -> None:
+        """Drop the cached views of orders once their updates are committed"""
+        for order in orders:
+            await self._invalidate(order)
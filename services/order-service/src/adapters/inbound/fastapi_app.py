@@ -1,11 +1,12 @@
 # services/order-service/src/adapters/inbound/fastapi_app.py
-from typing import List, Dict, Any, Optional
-from fastapi import FastAPI, HTTPException, Depends, status
+from typing import Callable, List, Dict, Any, Optional
+from fastapi import FastAPI, HTTPException, Depends, Query, Response, status
 from pydantic import BaseModel, Field
 
 from application.commands.create_order import CreateOrderCommand, CreateOrderHandler, CreateOrderItemDTO
 from application.commands.cancel_order import CancelOrderCommand, CancelOrderHandler
 from application.queries.get_order import GetOrderQuery, GetOrderHandler, GetCustomerOrdersQuery, GetCustomerOrdersHandler
+from application.ports.message_bus import DeadLetterQueue
 
 
 # Pydantic models for API requests and responses
@@ -20,6 +21,24 @@ class CreateOrderRequest(BaseModel):
     items: List[OrderItemRequest]
 
 
+class BatchCreateOrdersRequest(BaseModel):
+    orders: List[CreateOrderRequest] = Field(..., min_length=1, max_length=1000)
+
+
+class BatchOrderResult(BaseModel):
+    success: bool
+    order_id: Optional[str] = None
+    saga_id: Optional[str] = None
+    status: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchCreateOrdersResponse(BaseModel):
+    results: List[BatchOrderResult]
+    created: int
+    failed: int
+
+
 class OrderResponse(BaseModel):
     id: str
     customer_id: str
@@ -39,6 +58,17 @@ class CustomerOrdersResponse(BaseModel):
     customer_id: str
     orders: List[OrderResponse]
     total_orders: int
+    next_cursor: Optional[str] = None
+
+
+class DeadLettersResponse(BaseModel):
+    topic: str
+    messages: List[Dict[str, Any]]
+
+
+class ReplayDeadLettersResponse(BaseModel):
+    topic: str
+    replayed: int
 
 
 # Dependency to get handlers
@@ -49,11 +79,17 @@ class Handlers:
         cancel_order_handler: CancelOrderHandler,
         get_order_handler: GetOrderHandler,
         get_customer_orders_handler: GetCustomerOrdersHandler,
+        metrics: Optional[Dict[str, Callable[[], Dict[str, Any]]]] = None,
+        readiness: Optional[Dict[str, Callable[[], bool]]] = None,
+        dead_letters: Optional[DeadLetterQueue] = None,
     ):
         self.create_order_handler = create_order_handler
         self.cancel_order_handler = cancel_order_handler
         self.get_order_handler = get_order_handler
         self.get_customer_orders_handler = get_customer_orders_handler
+        self.metrics = metrics or {}
+        self.readiness = readiness or {}
+        self.dead_letters = dead_letters
 
 
 def create_app(handlers: Handlers) -> FastAPI:
@@ -82,6 +118,32 @@ def create_app(handlers: Handlers) -> FastAPI:
                 detail=str(e),
             )
     
+    @app.post("/orders:batch", response_model=BatchCreateOrdersResponse)
+    async def create_orders_batch(request: BatchCreateOrdersRequest):
+        commands = [
+            CreateOrderCommand(
+                customer_id=order.customer_id,
+                items=[
+                    CreateOrderItemDTO(
+                        product_id=item.product_id,
+                        quantity=item.quantity,
+                        unit_price=item.unit_price,
+                    )
+                    for item in order.items
+                ],
+            )
+            for order in request.orders
+        ]
+        
+        results = await handlers.create_order_handler.handle_many(commands)
+        created = sum(1 for result in results if result["success"])
+        
+        return {
+            "results": results,
+            "created": created,
+            "failed": len(results) - created,
+        }
+    
     @app.get("/orders/{order_id}", response_model=OrderResponse)
     async def get_order(order_id: str, include_saga_history: bool = False):
         query = GetOrderQuery(
@@ -123,15 +185,85 @@ def create_app(handlers: Handlers) -> FastAPI:
             )
     
     @app.get("/customers/{customer_id}/orders", response_model=CustomerOrdersResponse)
-    async def get_customer_orders(customer_id: str):
+    async def get_customer_orders(
+        customer_id: str,
+        limit: int = Query(50, ge=1, le=500),
+        cursor: Optional[str] = None,
+    ):
         query = GetCustomerOrdersQuery(
             customer_id=customer_id,
+            limit=limit,
+            cursor=cursor,
         )
         
-        result = await handlers.get_customer_orders_handler.handle(query)
+        try:
+            result = await handlers.get_customer_orders_handler.handle(query)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e),
+            )
         
         return result
     
+    @app.get("/metrics", response_model=Dict[str, Any])
+    async def get_metrics():
+        return {
+            name: provider()
+            for name, provider in handlers.metrics.items()
+        }
+    
+    @app.get("/dead-letters/{topic}", response_model=DeadLettersResponse)
+    async def get_dead_letters(topic: str, limit: int = Query(20, ge=1, le=500)):
+        if not handlers.dead_letters:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Dead-letter queues are not enabled",
+            )
+        
+        try:
+            messages = await handlers.dead_letters.peek(topic, limit)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=str(e),
+            )
+        
+        return {"topic": topic, "messages": messages}
+    
+    @app.post("/dead-letters/{topic}/replay", response_model=ReplayDeadLettersResponse)
+    async def replay_dead_letters(topic: str, limit: int = Query(100, ge=1, le=10000)):
+        if not handlers.dead_letters:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Dead-letter queues are not enabled",
+            )
+        
+        try:
+            replayed = await handlers.dead_letters.replay(topic, limit)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=str(e),
+            )
+        
+        return {"topic": topic, "replayed": replayed}
+    
+    @app.get("/health", response_model=Dict[str, Any])
+    async def health_check():
+        return {"status": "healthy", "service": "order-service"}
+    
+    @app.get("/ready", response_model=Dict[str, Any])
+    async def readiness_check(response: Response):
+        # Not ready until every dependency is connected
+        checks = {name: check() for name, check in handlers.readiness.items()}
+        ready = all(checks.values())
+        
+        if not ready:
+            response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        
+        return {"ready": ready, "checks": checks}
+    
     return app
 
 
@@ -0,0 +1,150 @@
+# services/order-service/src/adapters/outbound/event_codec.py
+import json
+from dataclasses import fields
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Type
+
+import orjson
+
+try:
+    import msgpack
+except ImportError:
+    # msgpack is only needed for the msgpack encoding
+    msgpack = None
+
+from domain.events import EVENT_TYPES, Event, event_from_dict
+
+
+# Version of the header and value layout written by encode
+FORMAT_VERSION = 1
+
+# Tags of the event types on the wire, shared by all services. Tags are
+# never reused; new event types get the next free number.
+EVENT_TAGS: Dict[str, int] = {
+    "order_created": 1,
+    "order_cancelled": 2,
+    "payment_requested": 3,
+    "payment_processed": 4,
+    "payment_refunded": 5,
+    "inventory_requested": 6,
+    "inventory_allocated": 7,
+    "inventory_released": 8,
+    "order_shipped": 9,
+}
+
+# Encodings of the field values, by name and by their ID in the header
+ENCODINGS: Dict[str, int] = {
+    "orjson": 1,
+    "msgpack": 2,
+}
+
+
+class EventCodecError(ValueError):
+    """Raised when a message cannot be decoded into an event"""
+    pass
+
+
+class EventCodec:
+    """Encode events as a small binary header followed by their field values.
+    
+    The header holds the format version, the encoding of the values and the
+    tag of the event type. The values follow in the order of the fields of
+    the event dataclass, without their names, so decoding builds the event
+    straight from them. Every field of an event has a default, so a message
+    must hold a value for each of them, or a missing order ID would decode
+    as an empty one; changing the fields of an event takes a new
+    FORMAT_VERSION.
+    
+    Messages are decoded whatever encoding wrote them, and JSON objects
+    made from Event.to_dict are still accepted, so services can switch
+    encodings one at a time.
+    """
+    
+    def __init__(self, encoding: str = "orjson", event_types: Dict[str, Type[Event]] = EVENT_TYPES):
+        if encoding != "json" and encoding not in ENCODINGS:
+            raise ValueError(f"Unknown event encoding: {encoding}")
+        if encoding == "msgpack" and msgpack is None:
+            raise ValueError("The msgpack event encoding needs the msgpack package")
+        
+        self.encoding = encoding
+        self.event_types = event_types
+        self._tags = {event_type: EVENT_TAGS[event_type] for event_type in event_types}
+        self._types_by_tag = {tag: event_types[event_type] for event_type, tag in self._tags.items()}
+        self._fields: Dict[Type[Event], List[str]] = {
+            event_class: [event_field.name for event_field in fields(event_class) if event_field.init]
+            for event_class in event_types.values()
+        }
+    
+    def encode(self, event: Event) -> bytes:
+        if self.encoding == "json":
+            return json.dumps(event.to_dict()).encode("utf-8")
+        
+        # Timestamps travel as ISO strings in every encoding
+        values = [
+            event.timestamp.isoformat() if name == "timestamp" else getattr(event, name)
+            for name in self._fields[type(event)]
+        ]
+        
+        header = bytes((FORMAT_VERSION, ENCODINGS[self.encoding], self._tags[event.event_type]))
+        
+        return header + _DUMPS[ENCODINGS[self.encoding]](values)
+    
+    def decode(self, data: bytes) -> Event:
+        try:
+            if data[:1] == b"{":
+                # A JSON object from an event's to_dict
+                payload = orjson.loads(data)
+                event_class = self.event_types[payload["event_type"]]
+                missing = [name for name in self._fields[event_class] if name not in payload]
+                
+                if missing:
+                    raise EventCodecError(f"Event {payload['event_type']} is missing {', '.join(missing)}")
+                
+                return event_from_dict(payload)
+            
+            version, encoding_id, tag = data[0], data[1], data[2]
+            
+            if version != FORMAT_VERSION:
+                raise EventCodecError(f"Unsupported event format version {version}")
+            
+            event_class = self._types_by_tag[tag]
+            values = _LOADS[encoding_id](data[3:])
+            names = self._fields[event_class]
+            
+            if not isinstance(values, list):
+                raise EventCodecError(f"Event {event_class.__name__} values are not a list")
+            
+            if len(values) != len(names):
+                raise EventCodecError(f"Event {event_class.__name__} needs {len(names)} values, got {len(values)}")
+            
+            kwargs = dict(zip(names, values))
+            kwargs["timestamp"] = datetime.fromisoformat(kwargs["timestamp"])
+            
+            return event_class(**kwargs)
+        except EventCodecError:
+            raise
+        except Exception as e:
+            raise EventCodecError(f"Cannot decode event: {str(e)}") from e
+
+
+def _msgpack_dumps(values: List[Any]) -> bytes:
+    if msgpack is None:
+        raise EventCodecError("The msgpack event encoding needs the msgpack package")
+    return msgpack.packb(values, use_bin_type=True)
+
+
+def _msgpack_loads(body: bytes) -> List[Any]:
+    if msgpack is None:
+        raise EventCodecError("The msgpack event encoding needs the msgpack package")
+    return msgpack.unpackb(body, raw=False)
+
+
+_DUMPS: Dict[int, Callable[[List[Any]], bytes]] = {
+    ENCODINGS["orjson"]: orjson.dumps,
+    ENCODINGS["msgpack"]: _msgpack_dumps,
+}
+
+_LOADS: Dict[int, Callable[[bytes], List[Any]]] = {
+    ENCODINGS["orjson"]: orjson.loads,
+    ENCODINGS["msgpack"]: _msgpack_loads,
+}
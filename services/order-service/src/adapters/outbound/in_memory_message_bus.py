@@ -0,0 +1,318 @@
+# services/order-service/src/adapters/outbound/in_memory_message_bus.py
+import asyncio
+import functools
+import itertools
+import logging
+from dataclasses import dataclass, field, replace
+from typing import Any, Collection, Dict, List, Optional, Tuple
+
+from domain.events import Event
+from application.ports.message_bus import MessagePublisher, MessageConsumer
+from adapters.outbound.event_codec import EventCodec, EventCodecError
+from adapters.outbound.keyed_dispatcher import KeyedDispatcher
+
+
+@dataclass
+class InMemoryMessage:
+    topic: str
+    data: bytes
+    key: Optional[str] = None
+    properties: Dict[str, str] = field(default_factory=dict)
+    message_id: int = 0
+    redelivery_count: int = 0
+
+
+class InMemorySubscription:
+    """The messages of a topic for one subscription, shared by its consumers.
+    
+    Received messages stay unacknowledged until the consumer acknowledges
+    them. Negatively acknowledged messages are queued again after
+    redelivery_delay_seconds, behind the messages published meanwhile.
+    """
+    
+    def __init__(self, topic: str, name: str, redelivery_delay_seconds: float = 1.0):
+        self.topic = topic
+        self.name = name
+        self.redelivery_delay_seconds = redelivery_delay_seconds
+        self.delivered = 0
+        self.acknowledged = 0
+        self.redelivered = 0
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._unacked: Dict[int, InMemoryMessage] = {}
+    
+    def put(self, msg: InMemoryMessage) -> None:
+        self._queue.put_nowait(msg)
+    
+    async def receive(self) -> InMemoryMessage:
+        msg = await self._queue.get()
+        self._unacked[msg.message_id] = msg
+        self.delivered += 1
+        return msg
+    
+    def acknowledge(self, msg: InMemoryMessage) -> None:
+        if self._unacked.pop(msg.message_id, None) is not None:
+            self.acknowledged += 1
+    
+    def negative_acknowledge(self, msg: InMemoryMessage) -> None:
+        if self._unacked.pop(msg.message_id, None) is None:
+            return
+        
+        self.redelivered += 1
+        asyncio.get_running_loop().call_later(
+            self.redelivery_delay_seconds,
+            self.put,
+            replace(msg, redelivery_count=msg.redelivery_count + 1),
+        )
+    
+    def release(self, msg: InMemoryMessage) -> None:
+        """Queue a received message again straight away, as when its consumer closes"""
+        if self._unacked.pop(msg.message_id, None) is not None:
+            self.put(msg)
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "backlog": self._queue.qsize(),
+            "unacknowledged": len(self._unacked),
+            "delivered": self.delivered,
+            "acknowledged": self.acknowledged,
+            "redelivered": self.redelivered,
+        }
+
+
+class InMemoryMessageBus:
+    """Topics and subscriptions of a broker that lives in the process.
+    
+    Every subscription of a topic gets its own copy of each message
+    published to it, and the consumers of one subscription share its
+    messages. A topic keeps no messages for subscriptions made after they
+    were published, so consumers should subscribe before publishers start.
+    """
+    
+    def __init__(self, redelivery_delay_seconds: float = 1.0):
+        self.redelivery_delay_seconds = redelivery_delay_seconds
+        self.topics: Dict[str, Dict[str, InMemorySubscription]] = {}
+        self.published = 0
+        self._message_ids = itertools.count(1)
+    
+    def create_topic(self, topic: str) -> None:
+        self.topics.setdefault(topic, {})
+    
+    def subscription(self, topic: str, name: str) -> InMemorySubscription:
+        """Get a subscription of a topic, creating both if needed"""
+        subscriptions = self.topics.setdefault(topic, {})
+        
+        if name not in subscriptions:
+            subscriptions[name] = InMemorySubscription(topic, name, self.redelivery_delay_seconds)
+        
+        return subscriptions[name]
+    
+    def send(self, topic: str, data: bytes, key: Optional[str] = None, properties: Optional[Dict[str, str]] = None) -> int:
+        message_id = next(self._message_ids)
+        msg = InMemoryMessage(topic, data, key, dict(properties or {}), message_id)
+        
+        for subscription in self.topics.setdefault(topic, {}).values():
+            subscription.put(msg)
+        
+        self.published += 1
+        
+        return message_id
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "published": self.published,
+            "subscriptions": {
+                f"{topic}/{name}": subscription.stats()
+                for topic, subscriptions in self.topics.items()
+                for name, subscription in subscriptions.items()
+            },
+        }
+
+
+class InMemoryMessagePublisher(MessagePublisher):
+    """Publisher that encodes events onto an InMemoryMessageBus"""
+    
+    def __init__(self, bus: InMemoryMessageBus, codec: Optional[EventCodec] = None):
+        self.bus = bus
+        self.codec = codec or EventCodec()
+        self.logger = logging.getLogger(__name__)
+    
+    async def warm_up(self, topics: List[str]) -> None:
+        for topic in topics:
+            self.bus.create_topic(topic)
+    
+    @property
+    def ready(self) -> bool:
+        return True
+    
+    async def publish(self, event: Event, topic: str) -> None:
+        self._send(event, topic)
+        self.logger.info(f"Published event {event.event_id} to topic {topic}")
+    
+    async def publish_with_key(self, event: Event, topic: str, key: str) -> None:
+        self._send(event, topic, key)
+        self.logger.info(f"Published event {event.event_id} to topic {topic} with key {key}")
+    
+    async def publish_many_with_keys(self, messages: List[Tuple[Event, str, Optional[str]]]) -> None:
+        for event, topic, key in messages:
+            self._send(event, topic, key)
+        
+        self.logger.info(f"Published {len(messages)} events")
+    
+    async def close(self) -> None:
+        """Nothing to flush, messages are queued as they are published"""
+        pass
+    
+    def _send(self, event: Event, topic: str, key: Optional[str] = None) -> int:
+        return self.bus.send(topic, self.codec.encode(event), key, {"event_type": event.event_type})
+
+
+class InMemoryMessageConsumer(MessageConsumer):
+    """Consumer of an InMemoryMessageBus subscription.
+    
+    Messages are handled on a KeyedDispatcher like the Pulsar consumer does,
+    so the messages of one order are handled in order and at most
+    max_concurrent_handlers at the same time. Handled messages are
+    acknowledged, and failed ones negatively acknowledged for a redelivery,
+    until they fail max_attempts times, when given; they are then dropped
+    like the messages that cannot be decoded at all, as there is no
+    dead-letter topic to keep them. Messages of event types no handler takes
+    are acknowledged undecoded.
+    Several consumers of the same subscription share its messages without
+    ordering them by key.
+    """
+    
+    def __init__(
+        self,
+        bus: InMemoryMessageBus,
+        subscription_name: str,
+        max_concurrent_handlers: int = 32,
+        queue_size: int = 100,
+        codec: Optional[EventCodec] = None,
+        max_attempts: Optional[int] = None,
+    ):
+        self.bus = bus
+        self.subscription_name = subscription_name
+        self.codec = codec or EventCodec()
+        self.max_attempts = max_attempts
+        self.subscriptions: Dict[str, InMemorySubscription] = {}
+        self.received = 0
+        self.handled = 0
+        self.failed = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.logger = logging.getLogger(__name__)
+        self._routes: Dict[str, Dict[Optional[str], callable]] = {}
+        self._dispatchers: List[asyncio.Task] = []
+        self._handlers = KeyedDispatcher(max_concurrent_handlers, queue_size)
+    
+    async def subscribe(self, topic: str, handler: callable, event_types: Optional[Collection[str]] = None) -> None:
+        subscribed = topic in self._routes
+        routes = self._routes.setdefault(topic, {})
+        
+        # No event types routes the types without a handler of their own
+        for event_type in event_types or [None]:
+            routes[event_type] = handler
+        
+        if subscribed:
+            return
+        
+        subscription = self.bus.subscription(topic, self.subscription_name)
+        self.subscriptions[topic] = subscription
+        
+        self._dispatchers.append(asyncio.create_task(self._dispatch(subscription, routes)))
+        
+        self.logger.info(f"Subscribed to topic {topic}")
+    
+    async def _dispatch(self, subscription: InMemorySubscription, routes: Dict[Optional[str], callable]) -> None:
+        """Hand every received message to the handler shard of its order"""
+        while True:
+            msg = await subscription.receive()
+            self.received += 1
+            
+            event_type = msg.properties.get("event_type")
+            handler = routes.get(event_type) or routes.get(None)
+            
+            if event_type is not None and handler is None:
+                subscription.acknowledge(msg)
+                self.skipped += 1
+                continue
+            
+            try:
+                try:
+                    # Decode the event
+                    event = self.codec.decode(msg.data)
+                except EventCodecError as e:
+                    self.failed += 1
+                    self.dropped += 1
+                    # Redelivering does not make a message decodable
+                    self.logger.error(f"Dropped undecodable message from topic {subscription.topic}: {str(e)}")
+                    subscription.acknowledge(msg)
+                    continue
+                
+                # Messages published without the property are routed once decoded
+                if event_type is None:
+                    handler = routes.get(event.event_type) or routes.get(None)
+                
+                if handler is None:
+                    subscription.acknowledge(msg)
+                    self.skipped += 1
+                    continue
+                
+                # Events published without a key are ordered by their order ID
+                key = msg.key or getattr(event, "order_id", None)
+                
+                await self._handlers.submit(key, functools.partial(self._handle, subscription, handler, msg, event))
+            except asyncio.CancelledError:
+                # Closed before the message was handed over
+                subscription.release(msg)
+                raise
+    
+    async def _handle(
+        self,
+        subscription: InMemorySubscription,
+        handler: callable,
+        msg: InMemoryMessage,
+        event: Event,
+    ) -> None:
+        try:
+            # Handle message
+            await handler(event)
+            
+            # Acknowledge message
+            subscription.acknowledge(msg)
+            self.handled += 1
+        except Exception as e:
+            self.failed += 1
+            attempt = msg.redelivery_count + 1
+            
+            if self.max_attempts is not None and attempt >= self.max_attempts:
+                self.dropped += 1
+                self.logger.error(f"Dropped message from topic {subscription.topic} after {attempt} attempts: {str(e)}")
+                subscription.acknowledge(msg)
+                return
+            
+            self.logger.error(f"Error processing message: {str(e)}")
+            # Negative acknowledge message to reprocess it
+            subscription.negative_acknowledge(msg)
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "received": self.received,
+            "handled": self.handled,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "dropped": self.dropped,
+            "in_flight": self._handlers.stats()["busy"],
+            "queued": sum(subscription.stats()["backlog"] for subscription in self.subscriptions.values())
+            + self._handlers.stats()["queued"],
+        }
+    
+    async def close(self) -> None:
+        # Stop dispatching, then let running handlers finish
+        for dispatcher in self._dispatchers:
+            dispatcher.cancel()
+        
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        await self._handlers.close()
+        
+        self._dispatchers = []
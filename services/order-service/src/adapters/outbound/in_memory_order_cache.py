@@ -0,0 +1,81 @@
+# services/order-service/src/adapters/outbound/in_memory_order_cache.py
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from application.ports.cache import OrderCache
+
+
+class InMemoryOrderCache(OrderCache):
+    """Size-bounded LRU cache of order views with a time to live"""
+    
+    def __init__(
+        self,
+        max_size: int = 10000,
+        ttl_seconds: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._generation = 0
+        self._invalidated_at: Dict[str, int] = {}
+    
+    async def get_or_load(
+        self,
+        order_id: str,
+        loader: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+    ) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(order_id)
+        
+        if entry and entry[0] > self.clock():
+            self.entries.move_to_end(order_id)
+            self.hits += 1
+            return entry[1]
+        
+        self.misses += 1
+        
+        # Remember when the load started, so a view read before a concurrent
+        # write is not stored after that write invalidated the order
+        started_at = self._generation
+        order_view = await loader()
+        
+        if order_view is not None and self._invalidated_at.get(order_id, -1) <= started_at:
+            self._store(order_id, order_view)
+        
+        return order_view
+    
+    async def invalidate(self, order_id: str) -> None:
+        self.entries.pop(order_id, None)
+        self.invalidations += 1
+        
+        self._generation += 1
+        self._invalidated_at.pop(order_id, None)
+        self._invalidated_at[order_id] = self._generation
+        
+        # Invalidations only matter to loads that started before them
+        if len(self._invalidated_at) > self.max_size:
+            self._invalidated_at.pop(next(iter(self._invalidated_at)))
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+    
+    def _store(self, order_id: str, order_view: Dict[str, Any]) -> None:
+        self.entries[order_id] = (self.clock() + self.ttl_seconds, order_view)
+        self.entries.move_to_end(order_id)
+        
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
@@ -0,0 +1,147 @@
+# services/order-service/src/adapters/outbound/keyed_dispatcher.py
+import asyncio
+import logging
+import zlib
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class KeyedDispatcher:
+    """Run jobs concurrently across keys and one at a time per key.
+    
+    Every key is hashed to one of `concurrency` shards, and each shard runs
+    its jobs in the order they were submitted. Jobs for the same order end up
+    on the same shard, so its events are handled in order while the events
+    of other orders are handled on the other shards.
+    
+    Jobs are submitted to one of the lanes of lane_weights, highest priority
+    first, and each shard keeps a queue per lane, so a full lane does not
+    hold up the others. A shard runs up to the weight of a lane jobs of it in
+    a row before giving the next lane with jobs its turn, so higher lanes
+    are drained first while lower ones still make progress. A job whose key
+    still has jobs queued or running goes to their lane instead of its own,
+    so the jobs of a key keep their order whatever lanes they are given.
+    """
+    
+    def __init__(
+        self,
+        concurrency: int = 32,
+        queue_size: int = 100,
+        lane_weights: Optional[Dict[str, int]] = None,
+    ):
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.lane_weights = dict(lane_weights or {"normal": 1})
+        self.lanes = list(self.lane_weights)
+        self.logger = logging.getLogger(__name__)
+        self._queues: List[Dict[str, asyncio.Queue]] = []
+        self._ready: List[asyncio.Semaphore] = []
+        self._workers: List[asyncio.Task] = []
+        self._pending: Dict[Optional[str], List] = {}
+        self._busy = 0
+    
+    async def submit(self, key: Optional[str], job: Callable[[], Awaitable[None]], lane: Optional[str] = None) -> None:
+        """Queue a job behind the earlier jobs of its key, waiting while the lane of the shard is full.
+        
+        Jobs without a lane go to the lowest priority one.
+        """
+        if not self._workers:
+            self._start()
+        
+        shard = self.shard(key)
+        lane = lane or self.lanes[-1]
+        
+        # Stay in the lane of the earlier jobs of the key, so as not to overtake them
+        pending = self._pending.setdefault(key, [lane, 0])
+        lane = pending[0]
+        pending[1] += 1
+        
+        try:
+            await self._queues[shard][lane].put((key, job))
+        except BaseException:
+            self._done(key)
+            raise
+        
+        self._ready[shard].release()
+    
+    def shard(self, key: Optional[str]) -> int:
+        return zlib.crc32((key or "").encode("utf-8")) % self.concurrency
+    
+    async def close(self) -> None:
+        """Finish the queued jobs and stop the workers"""
+        for queues in self._queues:
+            for queue in queues.values():
+                await queue.join()
+        
+        for worker in self._workers:
+            worker.cancel()
+        
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        
+        self._queues = []
+        self._ready = []
+        self._workers = []
+        self._pending = {}
+    
+    def stats(self) -> Dict[str, Any]:
+        queued = {lane: sum(queues[lane].qsize() for queues in self._queues) for lane in self.lanes}
+        
+        return {
+            "shards": self.concurrency,
+            "busy": self._busy,
+            "queued": sum(queued.values()),
+            "queued_by_lane": queued,
+        }
+    
+    def _start(self) -> None:
+        self._queues = [
+            {lane: asyncio.Queue(maxsize=self.queue_size) for lane in self.lanes}
+            for _ in range(self.concurrency)
+        ]
+        self._ready = [asyncio.Semaphore(0) for _ in range(self.concurrency)]
+        self._workers = [
+            asyncio.create_task(self._work(queues, ready))
+            for queues, ready in zip(self._queues, self._ready)
+        ]
+    
+    def _next_lane(self, queues: Dict[str, asyncio.Queue], served: Dict[str, int]) -> str:
+        """Pick the lane of the next job, by priority and the jobs run in a row"""
+        waiting = [lane for lane in self.lanes if not queues[lane].empty()]
+        
+        for lane in waiting:
+            if served[lane] < self.lane_weights[lane]:
+                return lane
+        
+        # Every waiting lane had its turn, start over from the top
+        for lane in self.lanes:
+            served[lane] = 0
+        
+        return waiting[0]
+    
+    async def _work(self, queues: Dict[str, asyncio.Queue], ready: asyncio.Semaphore) -> None:
+        served = {lane: 0 for lane in self.lanes}
+        
+        while True:
+            await ready.acquire()
+            
+            lane = self._next_lane(queues, served)
+            served[lane] += 1
+            
+            queue = queues[lane]
+            key, job = queue.get_nowait()
+            self._busy += 1
+            
+            try:
+                await job()
+            except Exception as e:
+                self.logger.error(f"Dispatched job failed: {str(e)}")
+            finally:
+                self._busy -= 1
+                self._done(key)
+                queue.task_done()
+    
+    def _done(self, key: Optional[str]) -> None:
+        pending = self._pending[key]
+        pending[1] -= 1
+        
+        if not pending[1]:
+            del self._pending[key]
@@ -0,0 +1,136 @@
+# services/order-service/src/adapters/outbound/payload_compression.py
+import functools
+import zlib
+from typing import Callable, Dict, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    # zstandard is only needed for the zstd compression
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    # lz4 is only needed for the lz4 compression
+    lz4 = None
+
+from adapters.outbound.event_codec import EventCodecError
+
+
+# Message property naming the compression of a payload, absent when it is not compressed
+COMPRESSION_PROPERTY = "compression"
+
+
+def _zstd_compressor(level: int) -> Callable[[bytes], bytes]:
+    # Building a compression context costs more than compressing a small event
+    return zstandard.ZstdCompressor(level=level).compress
+
+
+def _zstd_decompress(data: bytes) -> bytes:
+    global _zstd_decompressor
+    
+    if _zstd_decompressor is None:
+        _zstd_decompressor = zstandard.ZstdDecompressor()
+    
+    return _zstd_decompressor.decompress(data)
+
+
+_zstd_decompressor = None
+
+
+def _lz4_compressor(level: int) -> Callable[[bytes], bytes]:
+    return functools.partial(lz4.frame.compress, compression_level=level)
+
+
+def _zlib_compressor(level: int) -> Callable[[bytes], bytes]:
+    return functools.partial(zlib.compress, level=level)
+
+
+# Compressions by name: whether their package is installed, a compress
+# function for a level, a decompress function and the default level
+_COMPRESSIONS: Dict[
+    str,
+    Tuple[Callable[[], bool], Callable[[int], Callable[[bytes], bytes]], Callable[[bytes], bytes], int],
+] = {
+    "zstd": (lambda: zstandard is not None, _zstd_compressor, _zstd_decompress, 3),
+    "lz4": (lambda: lz4 is not None, _lz4_compressor, lambda data: lz4.frame.decompress(data), 0),
+    "zlib": (lambda: True, _zlib_compressor, zlib.decompress, 1),
+}
+
+_PACKAGES = {"zstd": "zstandard", "lz4": "lz4"}
+
+
+def available_compressions() -> Dict[str, bool]:
+    """Whether the package of each compression is installed"""
+    return {name: available() for name, (available, _, _, _) in _COMPRESSIONS.items()}
+
+
+def decompress(data: bytes, compression: Optional[str]) -> bytes:
+    """Undo the compression named by the property of a message, if any"""
+    if not compression:
+        return data
+    
+    if compression not in _COMPRESSIONS:
+        raise EventCodecError(f"Unknown payload compression {compression}")
+    
+    available, _, decompress_payload, _ = _COMPRESSIONS[compression]
+    
+    if not available():
+        raise EventCodecError(f"The {compression} payload compression needs the {_PACKAGES[compression]} package")
+    
+    try:
+        return decompress_payload(data)
+    except Exception as e:
+        raise EventCodecError(f"Cannot decompress {compression} payload: {str(e)}") from e
+
+
+class PayloadCompressor:
+    """Compress encoded events of at least threshold_bytes.
+    
+    Small events, like most saga replies, are sent as they are, since
+    compressing them costs CPU on both ends for a few bytes at most. A
+    compressed payload is only used when it is smaller, and is sent with
+    the compression property naming its algorithm, so consumers decompress
+    whatever the publisher chose.
+    """
+    
+    def __init__(self, compression: str = "zstd", threshold_bytes: int = 1024, level: Optional[int] = None):
+        if compression not in _COMPRESSIONS:
+            raise ValueError(f"Unknown payload compression: {compression}")
+        
+        available, compressor, _, default_level = _COMPRESSIONS[compression]
+        
+        if not available():
+            raise ValueError(f"The {compression} payload compression needs the {_PACKAGES[compression]} package")
+        
+        self.compression = compression
+        self.threshold_bytes = threshold_bytes
+        self.level = default_level if level is None else level
+        self._compress = compressor(self.level)
+        self.compressed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+    
+    def compress(self, data: bytes) -> Tuple[bytes, Dict[str, str]]:
+        """Get the payload to send and the properties telling how it is compressed"""
+        if len(data) < self.threshold_bytes:
+            return data, {}
+        
+        compressed = self._compress(data)
+        
+        if len(compressed) >= len(data):
+            return data, {}
+        
+        self.compressed += 1
+        self.bytes_in += len(data)
+        self.bytes_out += len(compressed)
+        
+        return compressed, {COMPRESSION_PROPERTY: self.compression}
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "compressed": self.compressed,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+        }
@@ -0,0 +1,238 @@
+# services/order-service/src/adapters/outbound/postgres_outbox.py
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from asyncpg.pool import Pool
+
+from domain.events import Event, event_from_dict
+from application.ports.message_bus import MessagePublisher
+from adapters.outbound.postgres_statements import StatementRegistry
+from adapters.outbound.postgres_unit_of_work import PostgresUnitOfWork
+
+
+OUTBOX_STATEMENTS = {
+    "outbox.insert_many": """
+        INSERT INTO outbox (
+            topic, partition_key, event_id, event_type, event_data
+        )
+        SELECT *
+        FROM unnest($1::text[], $2::text[], $3::text[], $4::text[], $5::jsonb[])
+    """,
+    "outbox.claim": """
+        SELECT id, topic, partition_key, event_data
+        FROM outbox
+        ORDER BY id
+        LIMIT $1
+        FOR UPDATE SKIP LOCKED
+    """,
+    "outbox.delete": """
+        DELETE FROM outbox
+        WHERE id = ANY($1::bigint[])
+    """,
+    "outbox.stats": """
+        SELECT
+            count(*) AS depth,
+            COALESCE(EXTRACT(EPOCH FROM now() - min(created_at)), 0)::float8 AS lag_seconds
+        FROM outbox
+    """,
+}
+
+
+class PostgresOutboxPublisher(MessagePublisher):
+    """Publisher that stores events in the outbox table.
+    
+    Events are written on the connection of the open unit of work, so they
+    are committed or rolled back together with the order they belong to.
+    The OutboxRelay sends them to the broker afterwards.
+    """
+    
+    def __init__(
+        self,
+        pool: Pool,
+        statements: Optional[StatementRegistry] = None,
+        unit_of_work: Optional[PostgresUnitOfWork] = None,
+    ):
+        self.pool = pool
+        self.unit_of_work = unit_of_work or PostgresUnitOfWork(pool)
+        self.statements = statements or StatementRegistry()
+        self.statements.register(OUTBOX_STATEMENTS)
+    
+    async def publish(self, event: Event, topic: str) -> None:
+        await self._insert([(event, topic, None)])
+    
+    async def publish_with_key(self, event: Event, topic: str, key: str) -> None:
+        await self._insert([(event, topic, key)])
+    
+    async def publish_many(self, messages: List[Tuple[Event, str]]) -> None:
+        await self._insert([(event, topic, None) for event, topic in messages])
+    
+    async def publish_many_with_keys(self, messages: List[Tuple[Event, str, Optional[str]]]) -> None:
+        await self._insert(messages)
+    
+    async def _insert(self, messages: List[Tuple[Event, str, Optional[str]]]) -> None:
+        if not messages:
+            return
+        
+        async with self.unit_of_work.connection() as conn:
+            await self.statements.execute(
+                conn,
+                "outbox.insert_many",
+                [topic for _, topic, _ in messages],
+                [key for _, _, key in messages],
+                [event.event_id for event, _, _ in messages],
+                [event.event_type for event, _, _ in messages],
+                [json.dumps(event.to_dict()) for event, _, _ in messages],
+            )
+
+
+class OutboxRelay:
+    """Background task that moves events from the outbox to the broker.
+    
+    Each batch is claimed with FOR UPDATE SKIP LOCKED, so several relays can
+    run against the same table without sending an event twice, and is
+    deleted in the same transaction once the broker accepted it. A failed
+    batch is rolled back and retried on the next poll.
+    
+    While the broker is slow or down the events wait in the outbox, so the
+    commands writing them are not held up. A publish is given up after
+    publish_timeout_seconds, releasing the claimed rows and their connection
+    instead of holding them for the whole client send timeout, and
+    consecutive failures back off exponentially up to max_backoff_seconds.
+    The depth and age of the outbox are measured between attempts, failed or
+    not, at most every measure_interval_seconds, as each measure scans the
+    whole outbox and a draining backlog is relayed without pause. Once the
+    broker is back the backlog drains in outbox order.
+    """
+    
+    def __init__(
+        self,
+        pool: Pool,
+        publisher: MessagePublisher,
+        statements: Optional[StatementRegistry] = None,
+        batch_size: int = 100,
+        poll_interval_seconds: float = 0.2,
+        publish_timeout_seconds: float = 5.0,
+        max_backoff_seconds: float = 30.0,
+        measure_interval_seconds: float = 1.0,
+    ):
+        self.pool = pool
+        self.publisher = publisher
+        self.statements = statements or StatementRegistry()
+        self.statements.register(OUTBOX_STATEMENTS)
+        self.batch_size = batch_size
+        self.poll_interval_seconds = poll_interval_seconds
+        self.publish_timeout_seconds = publish_timeout_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.measure_interval_seconds = measure_interval_seconds
+        self.published = 0
+        self.batches = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.backoff_seconds = 0.0
+        self.depth = 0
+        self.lag_seconds = 0.0
+        self.logger = logging.getLogger(__name__)
+        self._task: Optional[asyncio.Task] = None
+        self._measured_at: Optional[float] = None
+    
+    async def relay_once(self) -> int:
+        """Publish one batch of pending events and return how many were sent"""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                rows = await self.statements.fetch(conn, "outbox.claim", self.batch_size)
+                
+                if not rows:
+                    return 0
+                
+                await asyncio.wait_for(self._publish(rows), self.publish_timeout_seconds)
+                
+                await self.statements.execute(conn, "outbox.delete", [row["id"] for row in rows])
+        
+        self.published += len(rows)
+        self.batches += 1
+        
+        return len(rows)
+    
+    async def measure(self) -> None:
+        """Refresh the depth and lag of the outbox"""
+        async with self.pool.acquire() as conn:
+            row = await self.statements.fetchrow(conn, "outbox.stats")
+        
+        self.depth = row["depth"]
+        self.lag_seconds = row["lag_seconds"]
+        self._measured_at = time.monotonic()
+    
+    async def run(self) -> None:
+        """Relay events until cancelled"""
+        while True:
+            try:
+                sent = await self.relay_once()
+                self.consecutive_failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                self.consecutive_failures += 1
+                self.logger.error(f"Failed to relay outbox events: {str(e) or type(e).__name__}")
+                sent = 0
+            
+            if self._measured_at is None or time.monotonic() - self._measured_at >= self.measure_interval_seconds:
+                try:
+                    await self.measure()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.logger.error(f"Failed to measure the outbox: {str(e)}")
+            
+            if self.consecutive_failures:
+                # Give the broker time to recover
+                self.backoff_seconds = min(
+                    self.poll_interval_seconds * 2 ** self.consecutive_failures,
+                    self.max_backoff_seconds,
+                )
+                await asyncio.sleep(self.backoff_seconds)
+                continue
+            
+            self.backoff_seconds = 0.0
+            
+            # Keep draining while full batches come back
+            if sent < self.batch_size:
+                await asyncio.sleep(self.poll_interval_seconds)
+    
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+    
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        
+        self._task.cancel()
+        
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        
+        self._task = None
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self.depth,
+            "lag_seconds": self.lag_seconds,
+            "published": self.published,
+            "batches": self.batches,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "backoff_seconds": self.backoff_seconds,
+        }
+    
+    async def _publish(self, rows: List[Any]) -> None:
+        """Publish claimed rows in outbox order as one batch"""
+        await self.publisher.publish_many_with_keys([
+            (event_from_dict(json.loads(row["event_data"])), row["topic"], row["partition_key"])
+            for row in rows
+        ])
@@ -0,0 +1,167 @@
+# services/order-service/src/adapters/outbound/postgres_processed_events.py
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+
+from asyncpg.pool import Pool
+
+from application.ports.processed_events import ProcessedEventStore
+from adapters.outbound.postgres_statements import StatementRegistry
+from adapters.outbound.postgres_unit_of_work import PostgresUnitOfWork
+
+
+PROCESSED_EVENT_STATEMENTS = {
+    "processed_events.claim": """
+        INSERT INTO processed_events (event_id)
+        SELECT unnest($1::text[])
+        ON CONFLICT (event_id) DO NOTHING
+        RETURNING event_id
+    """,
+    "processed_events.prune": """
+        DELETE FROM processed_events
+        WHERE event_id IN (
+            SELECT event_id
+            FROM processed_events
+            WHERE processed_at < now() - $1 * interval '1 second'
+            LIMIT $2
+        )
+    """,
+}
+
+
+class PostgresProcessedEventStore(ProcessedEventStore):
+    """Processed event IDs in Postgres, with an LRU of recent ones in front.
+    
+    A redelivered event found in the LRU is discarded without touching the
+    database. Other events are claimed with one insert into the
+    processed_events table, whose primary key rejects the ones already
+    processed. Only committed claims enter the LRU, so an event whose
+    handling rolled back is not mistaken for a duplicate.
+    
+    Once started, claims older than retention_seconds are deleted every
+    prune_interval_seconds, up to prune_batch_size rows per statement so the
+    deletes do not hold long locks. Redeliveries and retries come within
+    minutes, so a duplicate arriving after the retention is not expected.
+    """
+    
+    def __init__(
+        self,
+        pool: Pool,
+        statements: Optional[StatementRegistry] = None,
+        unit_of_work: Optional[PostgresUnitOfWork] = None,
+        memory_size: int = 100000,
+        retention_seconds: float = 86400.0,
+        prune_interval_seconds: float = 300.0,
+        prune_batch_size: int = 10000,
+    ):
+        self.pool = pool
+        self.unit_of_work = unit_of_work or PostgresUnitOfWork(pool)
+        self.statements = statements or StatementRegistry()
+        self.statements.register(PROCESSED_EVENT_STATEMENTS)
+        self.memory_size = memory_size
+        self.retention_seconds = retention_seconds
+        self.prune_interval_seconds = prune_interval_seconds
+        self.prune_batch_size = prune_batch_size
+        self.recent: "OrderedDict[str, None]" = OrderedDict()
+        self.claimed = 0
+        self.memory_duplicates = 0
+        self.database_duplicates = 0
+        self.pruned = 0
+        self.logger = logging.getLogger(__name__)
+        self._task: Optional[asyncio.Task] = None
+    
+    async def claim(self, event_ids: List[str]) -> Set[str]:
+        unique_ids = list(dict.fromkeys(event_ids))
+        
+        # Drop the events known to be processed without a round trip
+        unseen_ids = [event_id for event_id in unique_ids if event_id not in self.recent]
+        for event_id in unique_ids:
+            if event_id in self.recent:
+                self.recent.move_to_end(event_id)
+        self.memory_duplicates += len(unique_ids) - len(unseen_ids)
+        
+        if not unseen_ids:
+            return set()
+        
+        async with self.unit_of_work.connection() as conn:
+            rows = await self.statements.fetch(conn, "processed_events.claim", unseen_ids)
+        
+        claimed = {row["event_id"] for row in rows}
+        self.claimed += len(claimed)
+        self.database_duplicates += len(unseen_ids) - len(claimed)
+        
+        return claimed
+    
+    def mark_committed(self, event_ids: List[str]) -> None:
+        for event_id in event_ids:
+            self.recent[event_id] = None
+            self.recent.move_to_end(event_id)
+        
+        while len(self.recent) > self.memory_size:
+            self.recent.popitem(last=False)
+    
+    async def prune(self) -> int:
+        """Delete the claims older than the retention, returning how many"""
+        deleted = 0
+        
+        while True:
+            async with self.pool.acquire() as conn:
+                status = await self.statements.execute(
+                    conn,
+                    "processed_events.prune",
+                    self.retention_seconds,
+                    self.prune_batch_size,
+                )
+            
+            # The status of a delete is "DELETE <rows>"
+            batch = int(status.split()[-1])
+            deleted += batch
+            
+            if batch < self.prune_batch_size:
+                break
+        
+        self.pruned += deleted
+        
+        return deleted
+    
+    async def run(self) -> None:
+        """Prune old claims until cancelled"""
+        while True:
+            try:
+                deleted = await self.prune()
+                
+                if deleted:
+                    self.logger.info(f"Pruned {deleted} processed events")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Failed to prune processed events: {str(e)}")
+            
+            await asyncio.sleep(self.prune_interval_seconds)
+    
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+    
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        
+        self._task.cancel()
+        
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        
+        self._task = None
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "claimed": self.claimed,
+            "memory_duplicates": self.memory_duplicates,
+            "database_duplicates": self.database_duplicates,
+            "remembered": len(self.recent),
+            "pruned": self.pruned,
+        }
@@ -0,0 +1,183 @@
+# services/order-service/src/adapters/outbound/postgres_read_model.py
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import asyncpg
+from asyncpg.pool import Pool
+
+from domain.models import Order
+from application.ports.read_model import OrderReadModel
+from adapters.outbound.postgres_statements import StatementRegistry
+from adapters.outbound.postgres_unit_of_work import PostgresUnitOfWork
+
+
+READ_MODEL_STATEMENTS = {
+    "order_views.upsert": """
+        INSERT INTO order_views (
+            id, customer_id, status, created_at, modified_at,
+            saga_id, metadata, total_amount, items
+        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+        ON CONFLICT (id) DO UPDATE
+        SET
+            customer_id = EXCLUDED.customer_id,
+            status = EXCLUDED.status,
+            modified_at = EXCLUDED.modified_at,
+            saga_id = EXCLUDED.saga_id,
+            metadata = EXCLUDED.metadata,
+            total_amount = EXCLUDED.total_amount,
+            items = EXCLUDED.items
+        WHERE order_views.modified_at <= EXCLUDED.modified_at
+    """,
+    "order_views.get": """
+        SELECT
+            id, customer_id, status, created_at, modified_at,
+            saga_id, metadata, total_amount, items
+        FROM order_views
+        WHERE id = $1
+    """,
+    "order_views.get_by_customer_id": """
+        SELECT
+            id, customer_id, status, created_at, modified_at,
+            saga_id, metadata, total_amount, items
+        FROM order_views
+        WHERE customer_id = $1
+        ORDER BY created_at DESC, id DESC
+        LIMIT $2
+    """,
+    "order_views.get_by_customer_id_after": """
+        SELECT
+            id, customer_id, status, created_at, modified_at,
+            saga_id, metadata, total_amount, items
+        FROM order_views
+        WHERE customer_id = $1
+          AND (created_at, id) < ($2, $3)
+        ORDER BY created_at DESC, id DESC
+        LIMIT $4
+    """,
+    "order_views.backfill": """
+        INSERT INTO order_views (
+            id, customer_id, status, created_at, modified_at,
+            saga_id, metadata, total_amount, items
+        )
+        SELECT
+            o.id, o.customer_id, o.status, o.created_at, o.modified_at,
+            o.saga_id, o.metadata, o.total_amount,
+            COALESCE(
+                (
+                    SELECT jsonb_agg(
+                        jsonb_build_object(
+                            'product_id', i.product_id,
+                            'quantity', i.quantity,
+                            'unit_price', i.unit_price
+                        )
+                        ORDER BY i.id
+                    )
+                    FROM order_items i
+                    WHERE i.order_id = o.id
+                ),
+                '[]'::jsonb
+            )
+        FROM orders o
+        WHERE NOT EXISTS (SELECT 1 FROM order_views v WHERE v.id = o.id)
+        ON CONFLICT (id) DO NOTHING
+    """,
+}
+
+
+class PostgresOrderReadModel(OrderReadModel):
+    """Orders projected to one row each, with their items stored as JSONB"""
+    
+    def __init__(
+        self,
+        pool: Pool,
+        statements: Optional[StatementRegistry] = None,
+        unit_of_work: Optional[PostgresUnitOfWork] = None,
+    ):
+        self.pool = pool
+        self.unit_of_work = unit_of_work or PostgresUnitOfWork(pool)
+        self.statements = statements or StatementRegistry()
+        self.statements.register(READ_MODEL_STATEMENTS)
+    
+    async def project(self, order: Order) -> None:
+        async with self.unit_of_work.connection() as conn:
+            # Older projections never overwrite newer ones
+            await self.statements.execute(conn, "order_views.upsert", *self._view_row(order))
+    
+    async def project_many(self, orders: List[Order]) -> None:
+        async with self.unit_of_work.connection() as conn:
+            await self.statements.executemany(
+                conn,
+                "order_views.upsert",
+                [self._view_row(order) for order in orders],
+            )
+    
+    async def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        async with self.unit_of_work.connection() as conn:
+            row = await self.statements.fetchrow(conn, "order_views.get", order_id)
+        
+        return self._to_view(row) if row else None
+    
+    async def get_by_customer_id(
+        self,
+        customer_id: str,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, str]] = None,
+    ) -> List[Dict[str, Any]]:
+        async with self.unit_of_work.connection() as conn:
+            if after:
+                rows = await self.statements.fetch(
+                    conn,
+                    "order_views.get_by_customer_id_after",
+                    customer_id,
+                    after[0],
+                    after[1],
+                    limit,
+                )
+            else:
+                rows = await self.statements.fetch(
+                    conn,
+                    "order_views.get_by_customer_id",
+                    customer_id,
+                    limit,
+                )
+        
+        return [self._to_view(row) for row in rows]
+    
+    async def backfill(self) -> int:
+        """Project the orders written before the read model existed"""
+        async with self.unit_of_work.connection() as conn:
+            status = await self.statements.execute(conn, "order_views.backfill")
+        
+        # The status is "INSERT 0 <rows>"
+        return int(status.split()[-1])
+    
+    @staticmethod
+    def _view_row(order: Order) -> Tuple[Any, ...]:
+        """Arguments of the upsert statement for an order"""
+        return (
+            order.id,
+            order.customer_id,
+            order.status.name,
+            order.created_at,
+            order.modified_at,
+            order.saga_id,
+            json.dumps(order.metadata),
+            order.total_amount,
+            json.dumps(order.to_dict()["items"]),
+        )
+    
+    @staticmethod
+    def _to_view(row: asyncpg.Record) -> Dict[str, Any]:
+        """Build the same view as Order.to_dict from a projected row"""
+        return {
+            "id": row["id"],
+            "customer_id": row["customer_id"],
+            "items": json.loads(row["items"]),
+            "status": row["status"],
+            "created_at": row["created_at"].isoformat(),
+            "modified_at": row["modified_at"].isoformat(),
+            "saga_id": row["saga_id"],
+            "metadata": json.loads(row["metadata"]),
+            "total_amount": row["total_amount"],
+        }
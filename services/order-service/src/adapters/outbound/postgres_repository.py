@@ -1,5 +1,6 @@
 # services/order-service/src/adapters/outbound/postgres_repository.py
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime
 import json
 
 import asyncpg
@@ -7,21 +8,149 @@ from asyncpg.pool import Pool
 
 from domain.models import Order
 from application.ports.repositories import OrderRepository
+from adapters.outbound.postgres_statements import StatementRegistry
+from adapters.outbound.postgres_unit_of_work import PostgresUnitOfWork
+
+
+ORDER_STATEMENTS = {
+    "orders.insert": """
+        INSERT INTO orders (
+            id, customer_id, status, created_at, modified_at,
+            saga_id, metadata, total_amount
+        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+    """,
+    "orders.insert_many": """
+        INSERT INTO orders (
+            id, customer_id, status, created_at, modified_at,
+            saga_id, metadata, total_amount
+        )
+        SELECT *
+        FROM unnest(
+            $1::text[], $2::text[], $3::text[], $4::timestamp[], $5::timestamp[],
+            $6::text[], $7::jsonb[], $8::float8[]
+        )
+    """,
+    "orders.get_by_id": """
+        SELECT
+            id, customer_id, status, created_at, modified_at,
+            saga_id, metadata, total_amount
+        FROM orders
+        WHERE id = $1
+    """,
+    "orders.get_by_ids": """
+        SELECT
+            id, customer_id, status, created_at, modified_at,
+            saga_id, metadata, total_amount
+        FROM orders
+        WHERE id = ANY($1::text[])
+    """,
+    "orders.get_by_customer_id": """
+        SELECT
+            id, customer_id, status, created_at, modified_at,
+            saga_id, metadata, total_amount
+        FROM orders
+        WHERE customer_id = $1
+        ORDER BY created_at DESC, id DESC
+        LIMIT $2
+    """,
+    "orders.get_by_customer_id_after": """
+        SELECT
+            id, customer_id, status, created_at, modified_at,
+            saga_id, metadata, total_amount
+        FROM orders
+        WHERE customer_id = $1
+          AND (created_at, id) < ($2, $3)
+        ORDER BY created_at DESC, id DESC
+        LIMIT $4
+    """,
+    "orders.update_header": """
+        UPDATE orders
+        SET
+            customer_id = $1,
+            status = $2,
+            modified_at = $3,
+            saga_id = $4,
+            metadata = $5
+        WHERE id = $6
+    """,
+    "orders.update_header_many": """
+        UPDATE orders
+        SET
+            customer_id = changes.customer_id,
+            status = changes.status,
+            modified_at = changes.modified_at,
+            saga_id = changes.saga_id,
+            metadata = changes.metadata
+        FROM unnest($1::text[], $2::text[], $3::timestamp[], $4::text[], $5::jsonb[], $6::text[])
+            AS changes(customer_id, status, modified_at, saga_id, metadata, id)
+        WHERE orders.id = changes.id
+    """,
+    "orders.update": """
+        UPDATE orders
+        SET
+            customer_id = $1,
+            status = $2,
+            modified_at = $3,
+            saga_id = $4,
+            metadata = $5,
+            total_amount = $6
+        WHERE id = $7
+    """,
+    "orders.delete": """
+        DELETE FROM orders
+        WHERE id = $1
+    """,
+    "order_items.insert": """
+        INSERT INTO order_items (
+            order_id, product_id, quantity, unit_price
+        )
+        SELECT $1, product_id, quantity, unit_price
+        FROM unnest($2::text[], $3::integer[], $4::float8[])
+            AS items(product_id, quantity, unit_price)
+    """,
+    "order_items.insert_many": """
+        INSERT INTO order_items (
+            order_id, product_id, quantity, unit_price
+        )
+        SELECT *
+        FROM unnest($1::text[], $2::text[], $3::integer[], $4::float8[])
+    """,
+    "order_items.get_by_order_id": """
+        SELECT product_id, quantity, unit_price
+        FROM order_items
+        WHERE order_id = $1
+        ORDER BY id
+    """,
+    "order_items.get_by_order_ids": """
+        SELECT order_id, product_id, quantity, unit_price
+        FROM order_items
+        WHERE order_id = ANY($1::text[])
+        ORDER BY id
+    """,
+    "order_items.delete": """
+        DELETE FROM order_items
+        WHERE order_id = $1
+    """,
+}
 
 
 class PostgresOrderRepository(OrderRepository):
-    def __init__(self, pool: Pool):
+    def __init__(
+        self,
+        pool: Pool,
+        statements: Optional[StatementRegistry] = None,
+        unit_of_work: Optional[PostgresUnitOfWork] = None,
+    ):
         self.pool = pool
+        self.unit_of_work = unit_of_work or PostgresUnitOfWork(pool)
+        self.statements = statements or StatementRegistry()
+        self.statements.register(ORDER_STATEMENTS)
     
     async def save(self, order: Order) -> None:
-        async with self.pool.acquire() as conn:
-            await conn.execute(
-                """
-                INSERT INTO orders (
-                    id, customer_id, status, created_at, modified_at, 
-                    saga_id, metadata, total_amount
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-                """,
+        async with self.unit_of_work.transaction() as conn:
+            await self.statements.execute(
+                conn,
+                "orders.insert",
                 order.id,
                 order.customer_id,
                 order.status.name,
@@ -33,136 +162,139 @@ class PostgresOrderRepository(OrderRepository):
             )
             
             # Insert order items
-            for item in order.items:
-                await conn.execute(
-                    """
-                    INSERT INTO order_items (
-                        order_id, product_id, quantity, unit_price
-                    ) VALUES ($1, $2, $3, $4)
-                    """,
-                    order.id,
-                    item.product_id,
-                    item.quantity,
-                    item.unit_price,
+            await self._insert_items(conn, order)
+        
+        order.mark_clean()
+    
+    async def save_many(self, orders: List[Order]) -> None:
+        items = [(order.id, item) for order in orders for item in order.items]
+        
+        async with self.unit_of_work.transaction() as conn:
+            # Insert every order with one statement
+            await self.statements.execute(
+                conn,
+                "orders.insert_many",
+                [order.id for order in orders],
+                [order.customer_id for order in orders],
+                [order.status.name for order in orders],
+                [order.created_at for order in orders],
+                [order.modified_at for order in orders],
+                [order.saga_id for order in orders],
+                [json.dumps(order.metadata) for order in orders],
+                [float(order.total_amount) for order in orders],
+            )
+            
+            # Insert the items of every order with one statement
+            if items:
+                await self.statements.execute(
+                    conn,
+                    "order_items.insert_many",
+                    [order_id for order_id, _ in items],
+                    [item.product_id for _, item in items],
+                    [item.quantity for _, item in items],
+                    [float(item.unit_price) for _, item in items],
                 )
+        
+        for order in orders:
+            order.mark_clean()
     
     async def get_by_id(self, order_id: str) -> Optional[Order]:
-        async with self.pool.acquire() as conn:
+        async with self.unit_of_work.connection() as conn:
             # Get order
-            order_row = await conn.fetchrow(
-                """
-                SELECT 
-                    id, customer_id, status, created_at, modified_at, 
-                    saga_id, metadata, total_amount
-                FROM orders
-                WHERE id = $1
-                """,
-                order_id,
-            )
+            order_row = await self.statements.fetchrow(conn, "orders.get_by_id", order_id)
             
             if not order_row:
                 return None
             
             # Get order items
-            item_rows = await conn.fetch(
-                """
-                SELECT product_id, quantity, unit_price
-                FROM order_items
-                WHERE order_id = $1
-                """,
-                order_id,
-            )
+            item_rows = await self.statements.fetch(conn, "order_items.get_by_order_id", order_id)
             
-            # Convert to dictionary
-            order_dict = {
-                "id": order_row["id"],
-                "customer_id": order_row["customer_id"],
-                "status": order_row["status"],
-                "created_at": order_row["created_at"].isoformat(),
-                "modified_at": order_row["modified_at"].isoformat(),
-                "saga_id": order_row["saga_id"],
-                "metadata": json.loads(order_row["metadata"]),
-                "items": [
-                    {
-                        "product_id": item["product_id"],
-                        "quantity": item["quantity"],
-                        "unit_price": item["unit_price"],
-                    }
-                    for item in item_rows
-                ],
-            }
-            
-            return Order.from_dict(order_dict)
+            return self._to_order(order_row, item_rows)
     
-    async def get_by_customer_id(self, customer_id: str) -> List[Order]:
-        async with self.pool.acquire() as conn:
-            # Get orders for customer
-            order_rows = await conn.fetch(
-                """
-                SELECT 
-                    id, customer_id, status, created_at, modified_at, 
-                    saga_id, metadata, total_amount
-                FROM orders
-                WHERE customer_id = $1
-                ORDER BY created_at DESC
-                """,
-                customer_id,
-            )
+    async def get_by_ids(self, order_ids: List[str]) -> List[Order]:
+        if not order_ids:
+            return []
+        
+        async with self.unit_of_work.connection() as conn:
+            # Get every order with a single query
+            order_rows = await self.statements.fetch(conn, "orders.get_by_ids", list(order_ids))
             
-            orders = []
+            if not order_rows:
+                return []
             
-            for order_row in order_rows:
-                order_id = order_row["id"]
-                
-                # Get order items
-                item_rows = await conn.fetch(
-                    """
-                    SELECT product_id, quantity, unit_price
-                    FROM order_items
-                    WHERE order_id = $1
-                    """,
-                    order_id,
+            # Get the items of every order with a single query
+            item_rows = await self.statements.fetch(
+                conn,
+                "order_items.get_by_order_ids",
+                [order_row["id"] for order_row in order_rows],
+            )
+            
+            return self._to_orders(order_rows, item_rows)
+    
+    async def get_by_customer_id(
+        self,
+        customer_id: str,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, str]] = None,
+    ) -> List[Order]:
+        async with self.unit_of_work.connection() as conn:
+            # Get one page of orders for the customer, walking the
+            # (customer_id, created_at, id) index from the cursor position
+            if after:
+                order_rows = await self.statements.fetch(
+                    conn,
+                    "orders.get_by_customer_id_after",
+                    customer_id,
+                    after[0],
+                    after[1],
+                    limit,
                 )
-                
-                # Convert to dictionary
-                order_dict = {
-                    "id": order_id,
-                    "customer_id": order_row["customer_id"],
-                    "status": order_row["status"],
-                    "created_at": order_row["created_at"].isoformat(),
-                    "modified_at": order_row["modified_at"].isoformat(),
-                    "saga_id": order_row["saga_id"],
-                    "metadata": json.loads(order_row["metadata"]),
-                    "items": [
-                        {
-                            "product_id": item["product_id"],
-                            "quantity": item["quantity"],
-                            "unit_price": item["unit_price"],
-                        }
-                        for item in item_rows
-                    ],
-                }
-                
-                orders.append(Order.from_dict(order_dict))
+            else:
+                order_rows = await self.statements.fetch(
+                    conn,
+                    "orders.get_by_customer_id",
+                    customer_id,
+                    limit,
+                )
+            
+            if not order_rows:
+                return []
+            
+            # Get the items of every order on the page with a single query
+            item_rows = await self.statements.fetch(
+                conn,
+                "order_items.get_by_order_ids",
+                [order_row["id"] for order_row in order_rows],
+            )
             
-            return orders
+            return self._to_orders(order_rows, item_rows)
     
     async def update(self, order: Order) -> None:
-        async with self.pool.acquire() as conn:
-            async with conn.transaction():
+        changed_fields = order.changed_fields()
+        
+        # Nothing to write if the order is unchanged since it was loaded
+        if not changed_fields:
+            return
+        
+        if "items" not in changed_fields:
+            # Only the order row changed, leave its items untouched
+            async with self.unit_of_work.connection() as conn:
+                await self.statements.execute(
+                    conn,
+                    "orders.update_header",
+                    order.customer_id,
+                    order.status.name,
+                    order.modified_at,
+                    order.saga_id,
+                    json.dumps(order.metadata),
+                    order.id,
+                )
+        else:
+            async with self.unit_of_work.transaction() as conn:
                 # Update order
-                await conn.execute(
-                    """
-                    UPDATE orders
-                    SET 
-                        customer_id = $1,
-                        status = $2,
-                        modified_at = $3,
-                        saga_id = $4,
-                        metadata = $5,
-                        total_amount = $6
-                    WHERE id = $7
-                    """,
+                await self.statements.execute(
+                    conn,
+                    "orders.update",
                     order.customer_id,
                     order.status.name,
                     order.modified_at,
@@ -173,45 +305,103 @@ class PostgresOrderRepository(OrderRepository):
                 )
                 
                 # Delete existing items
-                await conn.execute(
-                    """
-                    DELETE FROM order_items
-                    WHERE order_id = $1
-                    """,
-                    order.id,
-                )
+                await self.statements.execute(conn, "order_items.delete", order.id)
                 
                 # Insert new items
-                for item in order.items:
-                    await conn.execute(
-                        """
-                        INSERT INTO order_items (
-                            order_id, product_id, quantity, unit_price
-                        ) VALUES ($1, $2, $3, $4)
-                        """,
-                        order.id,
-                        item.product_id,
-                        item.quantity,
-                        item.unit_price,
-                    )
+                await self._insert_items(conn, order)
+        
+        order.mark_clean()
     
-    async def delete(self, order_id: str) -> None:
-        async with self.pool.acquire() as conn:
-            async with conn.transaction():
-                # Delete order items
-                await conn.execute(
-                    """
-                    DELETE FROM order_items
-                    WHERE order_id = $1
-                    """,
-                    order_id,
+    async def update_many(self, orders: List[Order]) -> None:
+        changed = [order for order in orders if order.changed_fields()]
+        headers = [order for order in changed if "items" not in order.changed_fields()]
+        rewritten = [order for order in changed if "items" in order.changed_fields()]
+        
+        if not changed:
+            return
+        
+        async with self.unit_of_work.transaction() as conn:
+            # Update the order rows of every order whose items are unchanged
+            # with one statement
+            if headers:
+                await self.statements.execute(
+                    conn,
+                    "orders.update_header_many",
+                    [order.customer_id for order in headers],
+                    [order.status.name for order in headers],
+                    [order.modified_at for order in headers],
+                    [order.saga_id for order in headers],
+                    [json.dumps(order.metadata) for order in headers],
+                    [order.id for order in headers],
                 )
                 
-                # Delete order
-                await conn.execute(
-                    """
-                    DELETE FROM orders
-                    WHERE id = $1
-                    """,
-                    order_id,
-                )
+                for order in headers:
+                    order.mark_clean()
+            
+            # Orders with changed items are rewritten one by one
+            for order in rewritten:
+                await self.update(order)
+    
+    async def delete(self, order_id: str) -> None:
+        async with self.unit_of_work.transaction() as conn:
+            # Delete order items
+            await self.statements.execute(conn, "order_items.delete", order_id)
+            
+            # Delete order
+            await self.statements.execute(conn, "orders.delete", order_id)
+    
+    async def _insert_items(self, conn: asyncpg.Connection, order: Order) -> None:
+        """Insert all items of an order in a single round trip"""
+        if not order.items:
+            return
+        
+        # Send the items as parallel arrays and let Postgres expand them,
+        # so the cost no longer grows with one network round trip per item
+        await self.statements.execute(
+            conn,
+            "order_items.insert",
+            order.id,
+            [item.product_id for item in order.items],
+            [item.quantity for item in order.items],
+            [float(item.unit_price) for item in order.items],
+        )
+    
+    @classmethod
+    def _to_orders(cls, order_rows: List[asyncpg.Record], item_rows: List[asyncpg.Record]) -> List[Order]:
+        """Build orders from their rows and the rows of all their items"""
+        items_by_order: Dict[str, List[asyncpg.Record]] = {}
+        for item in item_rows:
+            items_by_order.setdefault(item["order_id"], []).append(item)
+        
+        return [
+            cls._to_order(order_row, items_by_order.get(order_row["id"], []))
+            for order_row in order_rows
+        ]
+    
+    @staticmethod
+    def _to_order(order_row: asyncpg.Record, item_rows: List[asyncpg.Record]) -> Order:
+        """Build an order from its row and the rows of its items"""
+        order_dict = {
+            "id": order_row["id"],
+            "customer_id": order_row["customer_id"],
+            "status": order_row["status"],
+            "created_at": order_row["created_at"].isoformat(),
+            "modified_at": order_row["modified_at"].isoformat(),
+            "saga_id": order_row["saga_id"],
+            "metadata": json.loads(order_row["metadata"]),
+            "items": [
+                {
+                    "product_id": item["product_id"],
+                    "quantity": item["quantity"],
+                    "unit_price": item["unit_price"],
+                }
+                for item in item_rows
+            ],
+        }
+        
+        order = Order.from_dict(order_dict)
+        
+        # The order matches the database until the caller changes it
+        order.mark_clean()
+        
+        return order
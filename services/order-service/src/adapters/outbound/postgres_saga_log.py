@@ -1,6 +1,6 @@
 # services/order-service/src/adapters/outbound/postgres_saga_log.py
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
 import asyncpg
@@ -8,20 +8,83 @@ from asyncpg.pool import Pool
 
 from domain.events import Event
 from application.ports.message_bus import SagaLog
+from adapters.outbound.postgres_statements import StatementRegistry
+from adapters.outbound.postgres_unit_of_work import PostgresUnitOfWork
+
+
+SAGA_STATEMENTS = {
+    "saga_log.start": """
+        INSERT INTO saga_log (
+            saga_id, order_id, status, started_at
+        ) VALUES ($1, $2, $3, $4)
+    """,
+    "saga_log.start_many": """
+        INSERT INTO saga_log (
+            saga_id, order_id, status, started_at
+        )
+        SELECT saga_id, order_id, $3, $4
+        FROM unnest($1::text[], $2::text[]) AS sagas(saga_id, order_id)
+    """,
+    "saga_log.end": """
+        UPDATE saga_log
+        SET
+            status = $1,
+            ended_at = $2
+        WHERE saga_id = $3
+    """,
+    "saga_log.end_many": """
+        UPDATE saga_log
+        SET
+            status = sagas.status,
+            ended_at = $3
+        FROM unnest($1::text[], $2::text[]) AS sagas(saga_id, status)
+        WHERE saga_log.saga_id = sagas.saga_id
+    """,
+    "saga_log.get": """
+        SELECT
+            saga_id, order_id, status, started_at, ended_at
+        FROM saga_log
+        WHERE saga_id = $1
+    """,
+    "saga_events.insert": """
+        INSERT INTO saga_events (
+            saga_id, event_id, event_type, event_data, timestamp
+        ) VALUES ($1, $2, $3, $4, $5)
+    """,
+    "saga_events.insert_many": """
+        INSERT INTO saga_events (
+            saga_id, event_id, event_type, event_data, timestamp
+        )
+        SELECT *
+        FROM unnest($1::text[], $2::text[], $3::text[], $4::jsonb[], $5::timestamp[])
+    """,
+    "saga_events.get_by_saga_id": """
+        SELECT
+            event_id, event_type, event_data, timestamp
+        FROM saga_events
+        WHERE saga_id = $1
+        ORDER BY timestamp ASC
+    """,
+}
 
 
 class PostgresSagaLog(SagaLog):
-    def __init__(self, pool: Pool):
+    def __init__(
+        self,
+        pool: Pool,
+        statements: Optional[StatementRegistry] = None,
+        unit_of_work: Optional[PostgresUnitOfWork] = None,
+    ):
         self.pool = pool
+        self.unit_of_work = unit_of_work or PostgresUnitOfWork(pool)
+        self.statements = statements or StatementRegistry()
+        self.statements.register(SAGA_STATEMENTS)
     
     async def start_saga(self, saga_id: str, order_id: str) -> None:
-        async with self.pool.acquire() as conn:
-            await conn.execute(
-                """
-                INSERT INTO saga_log (
-                    saga_id, order_id, status, started_at
-                ) VALUES ($1, $2, $3, $4)
-                """,
+        async with self.unit_of_work.connection() as conn:
+            await self.statements.execute(
+                conn,
+                "saga_log.start",
                 saga_id,
                 order_id,
                 "STARTED",
@@ -29,13 +92,10 @@ class PostgresSagaLog(SagaLog):
             )
     
     async def log_event(self, saga_id: str, event: Event) -> None:
-        async with self.pool.acquire() as conn:
-            await conn.execute(
-                """
-                INSERT INTO saga_events (
-                    saga_id, event_id, event_type, event_data, timestamp
-                ) VALUES ($1, $2, $3, $4, $5)
-                """,
+        async with self.unit_of_work.connection() as conn:
+            await self.statements.execute(
+                conn,
+                "saga_events.insert",
                 saga_id,
                 event.event_id,
                 event.event_type,
@@ -43,50 +103,61 @@ class PostgresSagaLog(SagaLog):
                 event.timestamp,
             )
     
+    async def start_sagas(self, sagas: List[Tuple[str, str]]) -> None:
+        async with self.unit_of_work.connection() as conn:
+            await self.statements.execute(
+                conn,
+                "saga_log.start_many",
+                [saga_id for saga_id, _ in sagas],
+                [order_id for _, order_id in sagas],
+                "STARTED",
+                datetime.now(),
+            )
+    
+    async def log_events(self, events: List[Tuple[str, Event]]) -> None:
+        async with self.unit_of_work.connection() as conn:
+            await self.statements.execute(
+                conn,
+                "saga_events.insert_many",
+                [saga_id for saga_id, _ in events],
+                [event.event_id for _, event in events],
+                [event.event_type for _, event in events],
+                [json.dumps(event.to_dict()) for _, event in events],
+                [event.timestamp for _, event in events],
+            )
+    
     async def end_saga(self, saga_id: str, success: bool) -> None:
         status = "COMPLETED" if success else "FAILED"
         
-        async with self.pool.acquire() as conn:
-            await conn.execute(
-                """
-                UPDATE saga_log
-                SET 
-                    status = $1,
-                    ended_at = $2
-                WHERE saga_id = $3
-                """,
+        async with self.unit_of_work.connection() as conn:
+            await self.statements.execute(
+                conn,
+                "saga_log.end",
                 status,
                 datetime.now(),
                 saga_id,
             )
     
+    async def end_sagas(self, sagas: List[Tuple[str, bool]]) -> None:
+        async with self.unit_of_work.connection() as conn:
+            await self.statements.execute(
+                conn,
+                "saga_log.end_many",
+                [saga_id for saga_id, _ in sagas],
+                ["COMPLETED" if success else "FAILED" for _, success in sagas],
+                datetime.now(),
+            )
+    
     async def get_saga_events(self, saga_id: str) -> List[Dict[str, Any]]:
-        async with self.pool.acquire() as conn:
+        async with self.unit_of_work.connection() as conn:
             # Get saga log
-            saga_row = await conn.fetchrow(
-                """
-                SELECT 
-                    saga_id, order_id, status, started_at, ended_at
-                FROM saga_log
-                WHERE saga_id = $1
-                """,
-                saga_id,
-            )
+            saga_row = await self.statements.fetchrow(conn, "saga_log.get", saga_id)
             
             if not saga_row:
                 return []
             
             # Get saga events
-            event_rows = await conn.fetch(
-                """
-                SELECT 
-                    event_id, event_type, event_data, timestamp
-                FROM saga_events
-                WHERE saga_id = $1
-                ORDER BY timestamp ASC
-                """,
-                saga_id,
-            )
+            event_rows = await self.statements.fetch(conn, "saga_events.get_by_saga_id", saga_id)
             
             # Convert to list of dictionaries
             events = []
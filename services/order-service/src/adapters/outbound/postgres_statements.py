@@ -0,0 +1,48 @@
+# services/order-service/src/adapters/outbound/postgres_statements.py
+from typing import Any, Dict, List, Optional
+
+import asyncpg
+
+
+class StatementRegistry:
+    """Named SQL statements shared by the Postgres adapters.
+    
+    Keeps the SQL text of the adapters in one place, under a name, and runs
+    it on the connection it is given. Preparing is left to asyncpg, whose
+    per-connection statement cache is keyed by the SQL text, so a registered
+    statement is prepared on its first run on each pooled connection and
+    reused afterwards. The registry does not prepare or hold statements
+    itself, as asyncpg invalidates prepared statements once their connection
+    goes back to the pool. The pool's statement_cache_size must be at least
+    the number of registered statements, and 0 turns the reuse off.
+    """
+    
+    def __init__(self):
+        self.statements: Dict[str, str] = {}
+    
+    def register(self, statements: Dict[str, str]) -> None:
+        """Register statements by name"""
+        for name, sql in statements.items():
+            if self.statements.get(name, sql) != sql:
+                raise ValueError(f"Statement {name} is already registered with a different query")
+            self.statements[name] = sql
+    
+    async def execute(self, conn: asyncpg.Connection, name: str, *args: Any) -> str:
+        return await conn.execute(self.statements[name], *args)
+    
+    async def executemany(self, conn: asyncpg.Connection, name: str, args: List[tuple]) -> None:
+        await conn.executemany(self.statements[name], args)
+    
+    async def fetch(self, conn: asyncpg.Connection, name: str, *args: Any) -> List[asyncpg.Record]:
+        return await conn.fetch(self.statements[name], *args)
+    
+    async def fetchrow(self, conn: asyncpg.Connection, name: str, *args: Any) -> Optional[asyncpg.Record]:
+        return await conn.fetchrow(self.statements[name], *args)
+    
+    async def fetchval(self, conn: asyncpg.Connection, name: str, *args: Any) -> Any:
+        return await conn.fetchval(self.statements[name], *args)
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "statements": len(self.statements),
+        }
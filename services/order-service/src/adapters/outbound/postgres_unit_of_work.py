@@ -0,0 +1,124 @@
+# services/order-service/src/adapters/outbound/postgres_unit_of_work.py
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Deque, Dict, Optional, Tuple
+
+import asyncpg
+from asyncpg.pool import Pool
+
+from application.ports.unit_of_work import UnitOfWork
+
+
+class PostgresUnitOfWork(UnitOfWork):
+    """One pooled connection and transaction shared by the Postgres adapters.
+    
+    The connection of the open transaction is kept in a context variable, so
+    every adapter built with the same unit of work runs its statements on it
+    while the transaction is open, and acquires a connection of its own from
+    the pool otherwise.
+    
+    The time spent waiting for a pooled connection is averaged over the last
+    wait_window_seconds, so callers can tell when the pool is saturated.
+    """
+    
+    def __init__(self, pool: Pool, wait_window_seconds: float = 1.0):
+        self.pool = pool
+        self.wait_window_seconds = wait_window_seconds
+        self.commits = 0
+        self.rollbacks = 0
+        self.waiting = 0
+        self._waits: Deque[Tuple[float, float]] = deque()
+        self._wait_total = 0.0
+        self._connection: ContextVar[Optional[asyncpg.Connection]] = ContextVar(
+            f"postgres_unit_of_work_{id(self)}",
+            default=None,
+        )
+    
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[asyncpg.Connection]:
+        conn = self._connection.get()
+        
+        # Join the transaction that is already open
+        if conn is not None:
+            yield conn
+            return
+        
+        async with self._acquire() as conn:
+            token = self._connection.set(conn)
+            
+            try:
+                async with conn.transaction():
+                    yield conn
+            except BaseException:
+                self.rollbacks += 1
+                raise
+            finally:
+                self._connection.reset(token)
+        
+        self.commits += 1
+    
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[asyncpg.Connection]:
+        """Get the connection of the open transaction, or a pooled one"""
+        conn = self._connection.get()
+        
+        if conn is not None:
+            yield conn
+            return
+        
+        async with self._acquire() as conn:
+            yield conn
+    
+    def acquire_wait_seconds(self) -> float:
+        """Average wait for a pooled connection over the last wait_window_seconds"""
+        self._forget_waits(time.monotonic())
+        
+        if not self._waits:
+            return 0.0
+        
+        return self._wait_total / len(self._waits)
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "commits": self.commits,
+            "rollbacks": self.rollbacks,
+        }
+    
+    def pool_stats(self) -> Dict[str, float]:
+        return {
+            "size": self.pool.get_size(),
+            "idle": self.pool.get_idle_size(),
+            "waiting": self.waiting,
+            "acquire_wait_ms": self.acquire_wait_seconds() * 1000,
+        }
+    
+    @asynccontextmanager
+    async def _acquire(self) -> AsyncIterator[asyncpg.Connection]:
+        """Acquire a pooled connection, recording how long it took"""
+        started = time.monotonic()
+        self.waiting += 1
+        
+        try:
+            conn = await self.pool.acquire()
+        finally:
+            self.waiting -= 1
+        
+        acquired = time.monotonic()
+        self._waits.append((acquired, acquired - started))
+        self._wait_total += acquired - started
+        self._forget_waits(acquired)
+        
+        try:
+            yield conn
+        finally:
+            await self.pool.release(conn)
+    
+    def _forget_waits(self, now: float) -> None:
+        while self._waits and self._waits[0][0] < now - self.wait_window_seconds:
+            _, wait = self._waits.popleft()
+            self._wait_total -= wait
+        
+        if not self._waits:
+            self._wait_total = 0.0
@@ -1,40 +1,177 @@
 # services/order-service/src/adapters/outbound/pulsar_event_publisher.py
-import json
+import asyncio
+import concurrent.futures
+import functools
 import logging
-from typing import Any, Dict
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Collection, Dict, List, Optional, Set, Tuple
 
 import pulsar
-from pulsar.schema import AvroSchema
 
 from domain.events import Event
-from application.ports.message_bus import MessagePublisher, MessageConsumer
+from application.ports.message_bus import MessagePublisher, MessageConsumer, DeadLetterQueue
+from adapters.outbound.event_codec import EventCodec, EventCodecError
+from adapters.outbound.keyed_dispatcher import KeyedDispatcher
+from adapters.outbound.payload_compression import COMPRESSION_PROPERTY, PayloadCompressor, decompress
+from adapters.outbound.pulsar_topic_admin import PulsarTopicAdmin
+
+
+# Message property marking the events to handle ahead of the others, read before decoding
+PRIORITY_PROPERTY = "priority"
+
+async def connect_with_backoff(
+    connect: Callable[[], Any],
+    description: str,
+    initial_delay_seconds: float = 0.1,
+    max_delay_seconds: float = 5.0,
+    max_attempts: Optional[int] = None,
+) -> Any:
+    """Run a blocking Pulsar connect call off the event loop until it succeeds.
+    
+    Failed attempts are retried after an exponentially growing delay, up to
+    max_attempts attempts (without limit when None).
+    """
+    logger = logging.getLogger(__name__)
+    loop = asyncio.get_running_loop()
+    delay = initial_delay_seconds
+    attempt = 0
+    
+    while True:
+        attempt += 1
+        
+        try:
+            return await loop.run_in_executor(None, connect)
+        except Exception as e:
+            if max_attempts is not None and attempt >= max_attempts:
+                logger.error(f"Failed to create {description} after {attempt} attempts: {str(e)}")
+                raise
+            
+            logger.warning(f"Failed to create {description}, retrying in {delay:.1f}s: {str(e)}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay_seconds)
+
+
+# Pulsar subscription type names
+SUBSCRIPTION_TYPES = {
+    "Exclusive": pulsar.ConsumerType.Exclusive,
+    "Failover": pulsar.ConsumerType.Failover,
+    "Shared": pulsar.ConsumerType.Shared,
+    "Key_Shared": pulsar.ConsumerType.KeyShared,
+}
+
+
+def decode_message(codec: EventCodec, msg: pulsar.Message) -> Event:
+    """Decode the event of a message, decompressing it first if it was sent compressed"""
+    return codec.decode(decompress(msg.value(), msg.properties().get(COMPRESSION_PROPERTY)))
+
+
+def retry_topic(topic: str, subscription_name: str) -> str:
+    """Topic of the messages of a subscription waiting for another attempt"""
+    return f"{topic}-{subscription_name}-RETRY"
+
+
+def dead_letter_topic(topic: str, subscription_name: str) -> str:
+    """Topic of the messages of a subscription that failed every attempt"""
+    return f"{topic}-{subscription_name}-DLQ"
 
 
 class PulsarMessagePublisher(MessagePublisher):
-    def __init__(self, client: pulsar.Client):
+    """Publisher that sends with send_async and awaits the broker acks.
+    
+    The Pulsar client calls the send callbacks from its own threads, so each
+    callback resolves an asyncio future on the event loop instead of blocking
+    it. Producers batch the messages sent within batching_max_publish_delay_ms
+    of each other, up to batching_max_messages per batch. Batches only hold
+    messages of one key, so that Key_Shared subscriptions can hand each to
+    the consumer of its key, and events are keyed by their order ID unless
+    published with another key. On partitioned topics the key hash picks the
+    partition, so the events of one order stay in one partition.
+    
+    Producers are created off the event loop, once per topic however many
+    publishes wait for them, retrying with backoff. warm_up creates the
+    producers of the known topics up front, after creating the topics with
+    their topic_partitions through topic_admin, when given.
+    
+    With a compressor, events encoded to at least its threshold, such as
+    orders with many lines, are sent compressed, with the compression
+    property telling consumers how to decompress them.
+    
+    With prioritize_compensations, the events that start the compensation
+    of their order, cancellations and failed replies, are sent with the
+    priority property set to high, for consumers to handle them ahead of
+    the backlog of new orders. They stay on their topic, ordered with the
+    earlier events of their order.
+    """
+    
+    def __init__(
+        self,
+        client: pulsar.Client,
+        batching_enabled: bool = True,
+        batching_max_messages: int = 1000,
+        batching_max_publish_delay_ms: int = 10,
+        codec: Optional[EventCodec] = None,
+        connect_max_attempts: int = 5,
+        reconnect_initial_delay_seconds: float = 0.1,
+        reconnect_max_delay_seconds: float = 5.0,
+        topic_admin: Optional[PulsarTopicAdmin] = None,
+        topic_partitions: Optional[Dict[str, int]] = None,
+        compressor: Optional[PayloadCompressor] = None,
+        prioritize_compensations: bool = False,
+    ):
         self.client = client
+        self.codec = codec or EventCodec()
+        self.compressor = compressor
+        self.prioritize_compensations = prioritize_compensations
+        self.topic_admin = topic_admin
+        self.topic_partitions = dict(topic_partitions or {})
+        self.partitions: Dict[str, int] = {}
+        self.batching_enabled = batching_enabled
+        self.batching_max_messages = batching_max_messages
+        self.batching_max_publish_delay_ms = batching_max_publish_delay_ms
+        self.connect_max_attempts = connect_max_attempts
+        self.reconnect_initial_delay_seconds = reconnect_initial_delay_seconds
+        self.reconnect_max_delay_seconds = reconnect_max_delay_seconds
         self.producers = {}
+        self.topics: List[str] = []
         self.logger = logging.getLogger(__name__)
+        self._creating: Dict[str, asyncio.Future] = {}
     
-    async def publish(self, event: Event, topic: str) -> None:
-        # Get or create producer for the topic
-        if topic not in self.producers:
-            self.producers[topic] = self.client.create_producer(
-                topic=f"persistent://public/default/{topic}",
-                schema=AvroSchema(Event)
-            )
+    async def warm_up(self, topics: List[str]) -> None:
+        """Create the producers of the topics before their first publish.
+        
+        Keeps retrying with backoff until every producer is connected, so
+        the publisher is ready once this returns.
+        """
+        self.topics = list(topics)
         
-        producer = self.producers[topic]
+        if self.topic_admin:
+            await asyncio.gather(*(
+                self._ensure_partitions(topic, partitions) for topic, partitions in self.topic_partitions.items()
+            ))
         
-        # Convert event to dictionary
-        event_dict = event.to_dict()
+        await asyncio.gather(*(self._producer(topic, retry_forever=True) for topic in self.topics))
         
+        self.logger.info(f"Created producers for topics {', '.join(self.topics)}")
+    
+    @property
+    def ready(self) -> bool:
+        return all(topic in self.producers for topic in self.topics)
+    
+    async def _ensure_partitions(self, topic: str, partitions: int) -> None:
+        self.partitions[topic] = await connect_with_backoff(
+            functools.partial(self.topic_admin.ensure_partitions, topic, partitions),
+            f"{partitions} partitions of topic {topic}",
+            self.reconnect_initial_delay_seconds,
+            self.reconnect_max_delay_seconds,
+        )
+    
+    async def publish(self, event: Event, topic: str) -> None:
         try:
             # Publish the event
-            producer.send(
-                content=json.dumps(event_dict).encode("utf-8"),
-                properties={"event_type": event.event_type}
-            )
+            await self._send(event, topic)
             
             self.logger.info(f"Published event {event.event_id} to topic {topic}")
         except Exception as e:
@@ -42,78 +179,968 @@ class PulsarMessagePublisher(MessagePublisher):
             raise
     
     async def publish_with_key(self, event: Event, topic: str, key: str) -> None:
-        # Get or create producer for the topic
-        if topic not in self.producers:
-            self.producers[topic] = self.client.create_producer(
-                topic=f"persistent://public/default/{topic}",
-                schema=AvroSchema(Event)
-            )
-        
-        producer = self.producers[topic]
-        
-        # Convert event to dictionary
-        event_dict = event.to_dict()
-        
         try:
             # Publish the event with a key
-            producer.send(
-                content=json.dumps(event_dict).encode("utf-8"),
-                partition_key=key,
-                properties={"event_type": event.event_type}
-            )
+            await self._send(event, topic, key)
             
             self.logger.info(f"Published event {event.event_id} to topic {topic} with key {key}")
         except Exception as e:
             self.logger.error(f"Failed to publish event to topic {topic} with key {key}: {str(e)}")
             raise
+    
+    async def publish_many(self, messages: List[Tuple[Event, str]]) -> None:
+        await self.publish_many_with_keys([(event, topic, None) for event, topic in messages])
+    
+    async def publish_many_with_keys(self, messages: List[Tuple[Event, str, Optional[str]]]) -> None:
+        # Hand every message to its producer before waiting, so the ones
+        # for the same topic go out in the same batch
+        sends = [self._send(event, topic, key) for event, topic, key in messages]
+        results = await asyncio.gather(*sends, return_exceptions=True)
+        
+        failures = [result for result in results if isinstance(result, BaseException)]
+        if failures:
+            self.logger.error(f"Failed to publish {len(failures)} of {len(messages)} events: {str(failures[0])}")
+            raise failures[0]
+        
+        self.logger.info(f"Published {len(messages)} events")
+    
+    async def close(self) -> None:
+        """Send the pending batches and close the producers"""
+        loop = asyncio.get_running_loop()
+        
+        # Stop creating producers that are still retrying
+        for creating in list(self._creating.values()):
+            creating.cancel()
+        
+        await asyncio.gather(*self._creating.values(), return_exceptions=True)
+        
+        for topic, producer in self.producers.items():
+            await loop.run_in_executor(None, producer.flush)
+            await loop.run_in_executor(None, producer.close)
+        
+        self.producers = {}
+    
+    async def _producer(self, topic: str, retry_forever: bool = False) -> pulsar.Producer:
+        """Get the producer of a topic, creating it once for all callers"""
+        producer = self.producers.get(topic)
+        if producer:
+            return producer
+        
+        # Concurrent first publishes wait for the same producer
+        creating = self._creating.get(topic)
+        if creating is None:
+            max_attempts = None if retry_forever else self.connect_max_attempts
+            creating = asyncio.ensure_future(self._create_producer(topic, max_attempts))
+            self._creating[topic] = creating
+        
+        return await asyncio.shield(creating)
+    
+    async def _create_producer(self, topic: str, max_attempts: Optional[int]) -> pulsar.Producer:
+        try:
+            producer = await connect_with_backoff(
+                functools.partial(
+                    self.client.create_producer,
+                    topic=f"persistent://public/default/{topic}",
+                    batching_enabled=self.batching_enabled,
+                    batching_max_messages=self.batching_max_messages,
+                    batching_max_publish_delay_ms=self.batching_max_publish_delay_ms,
+                    batching_type=pulsar.BatchingType.KeyBased,
+                    # Keyed messages go to the partition of their key hash
+                    message_routing_mode=pulsar.PartitionsRoutingMode.RoundRobinDistribution,
+                ),
+                f"producer for topic {topic}",
+                self.reconnect_initial_delay_seconds,
+                self.reconnect_max_delay_seconds,
+                max_attempts,
+            )
+            
+            self.producers[topic] = producer
+            
+            return producer
+        finally:
+            self._creating.pop(topic, None)
+    
+    async def forward(
+        self,
+        topic: str,
+        data: bytes,
+        properties: Dict[str, str],
+        key: Optional[str] = None,
+        deliver_after_seconds: Optional[float] = None,
+    ) -> pulsar.MessageId:
+        """Send a received message payload as it is, optionally delayed"""
+        return await self._send_bytes(topic, data, properties, key, deliver_after_seconds)
+    
+    async def _send(self, event: Event, topic: str, key: Optional[str] = None) -> pulsar.MessageId:
+        """Send an event and wait for its broker ack"""
+        if key is None:
+            key = getattr(event, "order_id", None)
+        
+        data = self.codec.encode(event)
+        properties = {"event_type": event.event_type}
+        
+        if self.prioritize_compensations and event.compensates:
+            properties[PRIORITY_PROPERTY] = "high"
+        
+        if self.compressor:
+            data, compression = self.compressor.compress(data)
+            properties.update(compression)
+        
+        return await self._send_bytes(topic, data, properties, key)
+    
+    async def _send_bytes(
+        self,
+        topic: str,
+        data: bytes,
+        properties: Dict[str, str],
+        key: Optional[str] = None,
+        deliver_after_seconds: Optional[float] = None,
+    ) -> pulsar.MessageId:
+        producer = await self._producer(topic)
+        
+        loop = asyncio.get_running_loop()
+        acked = loop.create_future()
+        
+        def callback(result: pulsar.Result, message_id: pulsar.MessageId) -> None:
+            # Called from a client thread
+            loop.call_soon_threadsafe(self._complete, acked, result, message_id)
+        
+        kwargs = {"partition_key": key} if key is not None else {}
+        
+        if deliver_after_seconds:
+            # Delayed messages are sent outside of the producer batches
+            kwargs["deliver_after"] = timedelta(seconds=deliver_after_seconds)
+        
+        producer.send_async(data, callback, properties=properties, **kwargs)
+        
+        return await acked
+    
+    @staticmethod
+    def _complete(acked: asyncio.Future, result: pulsar.Result, message_id: pulsar.MessageId) -> None:
+        if acked.done():
+            return
+        
+        if result == pulsar.Result.Ok:
+            acked.set_result(message_id)
+        else:
+            acked.set_exception(pulsar.PulsarException(f"Send failed: {result}"))
 
 
 class PulsarMessageConsumer(MessageConsumer):
-    def __init__(self, client: pulsar.Client, subscription_name: str):
+    """Consumer that keeps the blocking Pulsar receive off the event loop.
+    
+    Each subscription gets a receive thread that hands messages to the loop
+    through a bounded queue. Messages are then handled on a KeyedDispatcher
+    by their partition key (the order ID), so at most max_concurrent_handlers
+    messages are handled at the same time across all subscriptions, and the
+    messages of one order are handled in order. When the handlers fall
+    behind, the queues fill up and the receive threads wait for room.
+    
+    Topics are subscribed with the subscription_types entry of the topic, or
+    subscription_type, Key_Shared by default. Key_Shared subscriptions spread
+    the keys over every consumer of the subscription, so the replicas of the
+    service share the messages while those of one order keep going to the
+    same replica in order. Exclusive subscriptions take a single consumer.
+    
+    Batch subscriptions receive up to batch_max_messages at a time and hand
+    each handler the messages of a batch that share its shard, acknowledging
+    the batch once all of it is handled, cumulatively on Exclusive and
+    Failover subscriptions. When a handler fails on its part of a batch, the
+    messages of the part are handled again one at a time, so only those
+    failing by themselves are retried.
+    
+    With a retry_publisher and max_attempts, a failed message is acknowledged
+    and sent to the retry topic of its subscription, delayed by the
+    retry_delays_seconds entry of the attempt (the last one once they run
+    out). Messages that fail max_attempts times, or cannot be decoded at all,
+    go to the dead-letter topic instead. Retried messages are handled from a
+    Shared subscription, as delayed delivery needs one, so they are no longer
+    ordered with the later messages of their order. Without them, failed
+    messages are negatively acknowledged and redelivered.
+    
+    Messages are routed to handlers by their event_type property, so events
+    of types no handler of the topic takes, such as the requests this
+    service publishes to the same topic, are acknowledged without being
+    decoded. Messages sent compressed are decompressed before decoding.
+    
+    Each subscription has at most max_in_flight messages being handled, and
+    the client prefetches up to receiver_queue_size messages per consumer,
+    shared by the partitions of partitioned topics. stats counts the
+    messages received from each partition.
+    While pool_wait, the average wait for a database connection, is above
+    pause_pool_wait_seconds the consumers stop taking messages, until it is
+    back under half of it, leaving the pool to the API requests. Messages
+    pile up in the client until the broker stops sending more.
+    
+    With priority_lanes, messages with the priority property set to high,
+    such as cancellations and failed replies, are handled in the high lane
+    of the dispatcher, taking up to priority_weight turns for each one of
+    the normal lane, so they are handled ahead of the backlog of the topic.
+    The property is read before decoding, and kept by retried messages. A
+    message of an order with messages still waiting in the other lane joins
+    them, so the events of an order keep their order. A batch part with a
+    high priority message is handled in the high lane. stats reports the
+    handled messages of each priority with the percentiles of their latency
+    since they were published, over the last latency_samples of them.
+    """
+    
+    def __init__(
+        self,
+        client: pulsar.Client,
+        subscription_name: str,
+        max_concurrent_handlers: int = 32,
+        receive_timeout_millis: int = 200,
+        queue_size: int = 100,
+        batch_max_messages: int = 100,
+        batch_timeout_millis: int = 20,
+        codec: Optional[EventCodec] = None,
+        reconnect_initial_delay_seconds: float = 0.1,
+        reconnect_max_delay_seconds: float = 5.0,
+        retry_publisher: Optional[PulsarMessagePublisher] = None,
+        retry_delays_seconds: Optional[List[float]] = None,
+        max_attempts: Optional[int] = None,
+        max_in_flight: int = 64,
+        receiver_queue_size: int = 1000,
+        pool_wait: Optional[Callable[[], float]] = None,
+        pause_pool_wait_seconds: float = 0.05,
+        pause_check_interval_seconds: float = 0.05,
+        subscription_type: str = "Key_Shared",
+        subscription_types: Optional[Dict[str, str]] = None,
+        priority_lanes: bool = False,
+        priority_weight: int = 8,
+        latency_samples: int = 1000,
+    ):
+        for name in [subscription_type, *(subscription_types or {}).values()]:
+            if name not in SUBSCRIPTION_TYPES:
+                raise ValueError(f"Unknown subscription type {name}, expected one of {', '.join(SUBSCRIPTION_TYPES)}")
+        
         self.client = client
+        self.codec = codec or EventCodec()
         self.subscription_name = subscription_name
+        self.subscription_type = subscription_type
+        self.subscription_types = dict(subscription_types or {})
+        self.max_concurrent_handlers = max_concurrent_handlers
+        self.receive_timeout_millis = receive_timeout_millis
+        self.queue_size = queue_size
+        self.batch_max_messages = batch_max_messages
+        self.batch_timeout_millis = batch_timeout_millis
+        self.reconnect_initial_delay_seconds = reconnect_initial_delay_seconds
+        self.reconnect_max_delay_seconds = reconnect_max_delay_seconds
+        self.retry_publisher = retry_publisher
+        self.retry_delays_seconds = retry_delays_seconds or [0.0]
+        self.max_attempts = max_attempts
+        self.max_in_flight = max_in_flight
+        self.receiver_queue_size = receiver_queue_size
+        self.pool_wait = pool_wait
+        self.pause_pool_wait_seconds = pause_pool_wait_seconds
+        self.pause_check_interval_seconds = pause_check_interval_seconds
+        self.priority_lanes = priority_lanes
+        self.priority_weight = priority_weight
         self.consumers = {}
+        self.received = 0
+        self.handled = 0
+        self.failed = 0
+        self.retried = 0
+        self.dead_lettered = 0
+        self.skipped = 0
+        self.pauses = 0
+        self.partitions: Dict[str, int] = {}
         self.logger = logging.getLogger(__name__)
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._queues: List[asyncio.Queue] = []
+        self._dispatchers: List[asyncio.Task] = []
+        self._paused = 0
+        self._routes: Dict[str, Dict[Optional[str], callable]] = {}
+        self._batched: Dict[str, bool] = {}
+        self._handlers = KeyedDispatcher(max_concurrent_handlers, queue_size, {"high": priority_weight, "normal": 1})
+        self._lane_handled = {lane: 0 for lane in self._handlers.lanes}
+        self._latencies = {lane: deque(maxlen=latency_samples) for lane in self._handlers.lanes}
+    
+    @property
+    def retries_enabled(self) -> bool:
+        return self.retry_publisher is not None and self.max_attempts is not None
     
-    async def subscribe(self, topic: str, handler: callable) -> None:
-        # Create consumer for the topic
-        consumer = self.client.subscribe(
-            topic=f"persistent://public/default/{topic}",
-            subscription_name=self.subscription_name,
-            schema=AvroSchema(Event)
+    async def subscribe(self, topic: str, handler: callable, event_types: Optional[Collection[str]] = None) -> None:
+        if self._add_routes(topic, handler, event_types, batch=False):
+            return
+        
+        for subscribed_topic, consumer in await self._subscribe(topic):
+            receive = functools.partial(consumer.receive, timeout_millis=self.receive_timeout_millis)
+            
+            self._start(subscribed_topic, receive, functools.partial(self._dispatch, consumer, topic))
+    
+    async def subscribe_batch(
+        self,
+        topic: str,
+        handler: callable,
+        event_types: Optional[Collection[str]] = None,
+    ) -> None:
+        """Subscribe with a handler that takes the events of several messages.
+        
+        Messages are received in batches of up to batch_max_messages, waiting
+        at most batch_timeout_millis for a batch to fill. Each batch is split
+        by order across the handler shards, and acknowledged once every part
+        of it has been handled.
+        """
+        if self._add_routes(topic, handler, event_types, batch=True):
+            return
+        
+        subscriptions = await self._subscribe(
+            topic,
+            batch_receive_policy=pulsar.ConsumerBatchReceivePolicy(
+                # A batch is handled as a whole, so it is capped at max_in_flight
+                min(self.batch_max_messages, self.max_in_flight),
+                -1,
+                self.batch_timeout_millis,
+            ),
         )
         
-        # Store consumer
-        self.consumers[topic] = consumer
+        for subscribed_topic, consumer in subscriptions:
+            # Shared and Key_Shared subscriptions only take individual acks
+            cumulative = subscribed_topic == topic and self._subscription_type(topic) in ("Exclusive", "Failover")
+            
+            self._start(
+                subscribed_topic,
+                functools.partial(self._batch_receive, consumer),
+                functools.partial(self._dispatch_batch, consumer, topic, cumulative=cumulative),
+            )
+    
+    def _add_routes(self, topic: str, handler: callable, event_types: Optional[Collection[str]], batch: bool) -> bool:
+        """Route the event types of a topic to a handler.
         
-        # Start consuming messages
-        self.logger.info(f"Subscribed to topic {topic}")
+        Returns whether the topic was subscribed to already, with its
+        handlers taking events one at a time or in batches like this one.
+        """
+        subscribed = topic in self._routes
+        
+        if subscribed and self._batched[topic] != batch:
+            raise ValueError(f"Topic {topic} is already subscribed to {'with' if self._batched[topic] else 'without'} batches")
+        
+        routes = self._routes.setdefault(topic, {})
+        self._batched[topic] = batch
+        
+        # No event types routes the types without a handler of their own
+        for event_type in event_types or [None]:
+            routes[event_type] = handler
+        
+        return subscribed
+    
+    def _count_received(self, msgs: List[pulsar.Message]) -> None:
+        self.received += len(msgs)
+        
+        for msg in msgs:
+            partition = msg.topic_name()
+            self.partitions[partition] = self.partitions.get(partition, 0) + 1
+    
+    def _lane(self, msg: pulsar.Message) -> str:
+        high = self.priority_lanes and msg.properties().get(PRIORITY_PROPERTY) == "high"
+        return "high" if high else "normal"
+    
+    def _record_latency(self, lane: str, msgs: List[pulsar.Message]) -> None:
+        """Record how long after their publish the messages of a lane were handled"""
+        now_ms = time.time() * 1000
+        self._lane_handled[lane] += len(msgs)
+        
+        for msg in msgs:
+            self._latencies[lane].append(now_ms - msg.publish_timestamp())
+    
+    def _subscription_type(self, topic: str) -> str:
+        return self.subscription_types.get(topic, self.subscription_type)
+    
+    def _route(self, topic: str, event_type: Optional[str]) -> Optional[callable]:
+        routes = self._routes[topic]
+        return routes.get(event_type) or routes.get(None)
+    
+    def _skip(self, topic: str, msg: pulsar.Message) -> bool:
+        """Whether no handler takes the event type of a message, going by its property"""
+        event_type = msg.properties().get("event_type")
+        return event_type is not None and self._route(topic, event_type) is None
+    
+    @staticmethod
+    def _batch_receive(consumer: pulsar.Consumer) -> List[pulsar.Message]:
+        msgs = consumer.batch_receive()
+        
+        # The batch timed out without any message
+        if not msgs:
+            raise pulsar.Timeout("Pulsar error: TimeOut")
         
-        # Start a background task to consume messages
-        import asyncio
-        asyncio.create_task(self._consume(consumer, handler))
+        return msgs
     
-    async def _consume(self, consumer: pulsar.Consumer, handler: callable) -> None:
+    async def _subscribe(self, topic: str, **options: Any) -> List[Tuple[str, pulsar.Consumer]]:
+        """Subscribe to a topic, and to its retry topic when retrying"""
+        options = dict(
+            options,
+            receiver_queue_size=self.receiver_queue_size,
+            # Partitions share the prefetched messages instead of each taking as many
+            max_total_receiver_queue_size_across_partitions=self.receiver_queue_size,
+        )
+        topics = [(topic, dict(options, consumer_type=SUBSCRIPTION_TYPES[self._subscription_type(topic)]))]
+        
+        if self.retries_enabled:
+            # Delayed delivery only works on Shared subscriptions
+            topics.append((
+                retry_topic(topic, self.subscription_name),
+                dict(options, consumer_type=pulsar.ConsumerType.Shared),
+            ))
+        
+        subscriptions = []
+        for subscribed_topic, subscribe_options in topics:
+            # Create consumer for the topic without blocking the event loop,
+            # retrying until the broker can be reached
+            consumer = await connect_with_backoff(
+                functools.partial(
+                    self.client.subscribe,
+                    topic=f"persistent://public/default/{subscribed_topic}",
+                    subscription_name=self.subscription_name,
+                    **subscribe_options,
+                ),
+                f"consumer for topic {subscribed_topic}",
+                self.reconnect_initial_delay_seconds,
+                self.reconnect_max_delay_seconds,
+            )
+            
+            # Store consumer
+            self.consumers[subscribed_topic] = consumer
+            subscriptions.append((subscribed_topic, consumer))
+        
+        return subscriptions
+    
+    def _start(self, topic: str, receive: Callable[[], Any], dispatch: Callable[..., Awaitable[None]]) -> None:
+        """Receive on a dedicated thread and handle what arrives on the loop"""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        thread = threading.Thread(
+            target=self._receive,
+            args=(receive, queue, loop),
+            name=f"pulsar-receive-{topic}",
+            daemon=True,
+        )
+        thread.start()
+        
+        self._threads.append(thread)
+        self._queues.append(queue)
+        self._dispatchers.append(asyncio.create_task(dispatch(queue)))
+        
+        self.logger.info(f"Subscribed to topic {topic}")
+    
+    def _receive(self, receive: Callable[[], Any], queue: asyncio.Queue, loop: asyncio.AbstractEventLoop) -> None:
+        """Receive messages until closed, waiting while the queue is full"""
+        while not self._stopping.is_set():
+            try:
+                msg = receive()
+            except pulsar.Timeout:
+                continue
+            except Exception as e:
+                if self._stopping.is_set():
+                    break
+                
+                self.logger.error(f"Error receiving message: {str(e)}")
+                self._stopping.wait(self.receive_timeout_millis / 1000)
+                continue
+            
+            handed_off = asyncio.run_coroutine_threadsafe(queue.put(msg), loop)
+            
+            while not self._stopping.is_set():
+                try:
+                    handed_off.result(timeout=self.receive_timeout_millis / 1000)
+                    break
+                except concurrent.futures.TimeoutError:
+                    continue
+            else:
+                # Unacknowledged messages are redelivered after a restart
+                handed_off.cancel()
+    
+    async def _dispatch(self, consumer: pulsar.Consumer, topic: str, queue: asyncio.Queue) -> None:
+        """Hand every received message to the handler shard of its order, in the lane of its priority"""
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        
         while True:
+            msg = await queue.get()
+            self._count_received([msg])
+            
+            if self._skip(topic, msg):
+                consumer.acknowledge(msg)
+                self.skipped += 1
+                continue
+            
+            await self._wait_for_pool()
+            await in_flight.acquire()
+            
             try:
-                # Receive message
-                msg = consumer.receive()
+                # Decode the event
+                event = decode_message(self.codec, msg)
+            except EventCodecError as e:
+                self.failed += 1
+                self.logger.error(f"Error decoding message: {str(e)}")
                 
-                # Parse message content
-                content = json.loads(msg.value().decode("utf-8"))
+                # Retrying does not make a message decodable
+                await self._settle_failed(consumer, topic, msg, str(e), retry=False)
+                in_flight.release()
+                continue
+            
+            # Messages published without the property are routed once decoded
+            handler = self._route(topic, event.event_type)
+            
+            if handler is None:
+                consumer.acknowledge(msg)
+                self.skipped += 1
+                in_flight.release()
+                continue
+            
+            # Events published without a key are ordered by their order ID
+            key = msg.partition_key() or getattr(event, "order_id", None)
+            
+            lane = self._lane(msg)
+            
+            await self._handlers.submit(
+                key,
+                functools.partial(self._handle, consumer, topic, lane, handler, msg, event, in_flight),
+                lane,
+            )
+    
+    async def _handle(
+        self,
+        consumer: pulsar.Consumer,
+        topic: str,
+        lane: str,
+        handler: callable,
+        msg: pulsar.Message,
+        event: Event,
+        in_flight: asyncio.Semaphore,
+    ) -> None:
+        try:
+            # Handle message
+            await handler(event)
+            
+            # Acknowledge message
+            consumer.acknowledge(msg)
+            self.handled += 1
+        except Exception as e:
+            self.failed += 1
+            self.logger.error(f"Error processing message: {str(e)}")
+            await self._settle_failed(consumer, topic, msg, str(e))
+        finally:
+            self._record_latency(lane, [msg])
+            in_flight.release()
+    
+    async def _settle_failed(
+        self,
+        consumer: pulsar.Consumer,
+        topic: str,
+        msg: pulsar.Message,
+        error: str,
+        retry: bool = True,
+    ) -> None:
+        if await self._forward_failed(topic, msg, error, retry):
+            consumer.acknowledge(msg)
+        else:
+            # Negative acknowledge message to reprocess it
+            consumer.negative_acknowledge(msg)
+    
+    async def _forward_failed(self, topic: str, msg: pulsar.Message, error: str, retry: bool = True) -> bool:
+        """Send a failed message to the retry or dead-letter topic of its subscription.
+        
+        Returns whether it was sent, and so can be acknowledged.
+        """
+        if not self.retries_enabled:
+            return False
+        
+        properties = dict(msg.properties())
+        attempt = int(properties.get("attempt", "1"))
+        properties.update({"original_topic": topic, "error": error[:1000]})
+        
+        try:
+            if retry and attempt < self.max_attempts:
+                delay = self.retry_delays_seconds[min(attempt, len(self.retry_delays_seconds)) - 1]
+                properties["attempt"] = str(attempt + 1)
                 
-                # Handle message
-                await handler(content)
+                await self.retry_publisher.forward(
+                    retry_topic(topic, self.subscription_name),
+                    msg.value(),
+                    properties,
+                    msg.partition_key() or None,
+                    delay,
+                )
+                self.retried += 1
+            else:
+                properties["attempt"] = str(attempt)
                 
-                # Acknowledge message
-                consumer.acknowledge(msg)
-            except Exception as e:
+                await self.retry_publisher.forward(
+                    dead_letter_topic(topic, self.subscription_name),
+                    msg.value(),
+                    properties,
+                    msg.partition_key() or None,
+                )
+                self.dead_lettered += 1
+                self.logger.error(f"Dead-lettered message from topic {topic} after {attempt} attempts: {error}")
+            
+            return True
+        except Exception as e:
+            self.logger.error(f"Error forwarding failed message from topic {topic}: {str(e)}")
+            return False
+    
+    async def _dispatch_batch(
+        self,
+        consumer: pulsar.Consumer,
+        topic: str,
+        queue: asyncio.Queue,
+        cumulative: bool,
+    ) -> None:
+        """Hand every received batch to the handler shards of its orders, in the lanes of their priority"""
+        loop = asyncio.get_running_loop()
+        
+        # IDs of the negatively acknowledged messages of each partition not redelivered yet
+        nacked: Dict[str, Set[str]] = {}
+        
+        while True:
+            msgs = await queue.get()
+            self._count_received(msgs)
+            
+            for msg in msgs:
+                nacked.get(msg.topic_name(), set()).discard(str(msg.message_id()))
+            
+            await self._wait_for_pool()
+            
+            # Split the batch by handler and shard, keeping the order of each order
+            parts: Dict[Tuple[callable, int], List[Tuple[Optional[str], pulsar.Message, Event]]] = {}
+            skipped = []
+            failures = []
+            
+            for msg in msgs:
+                if self._skip(topic, msg):
+                    skipped.append(msg)
+                    continue
+                
+                try:
+                    # Decode the event
+                    event = decode_message(self.codec, msg)
+                except EventCodecError as e:
+                    self.failed += 1
+                    self.logger.error(f"Error decoding message: {str(e)}")
+                    failures.append((msg, str(e), False))
+                    continue
+                
+                # Messages published without the property are routed once decoded
+                handler = self._route(topic, event.event_type)
+                
+                if handler is None:
+                    skipped.append(msg)
+                    continue
+                
+                # Events published without a key are ordered by their order ID
+                key = msg.partition_key() or getattr(event, "order_id", None)
+                parts.setdefault((handler, self._handlers.shard(key)), []).append((key, msg, event))
+            
+            self.skipped += len(skipped)
+            
+            results = []
+            for (handler, _), part in parts.items():
+                result = loop.create_future()
+                results.append((part, result))
+                
+                # The part jumps the queue along with its high priority messages
+                lane = "high" if any(self._lane(msg) == "high" for _, msg, _ in part) else "normal"
+                
+                await self._handlers.submit(
+                    part[0][0],
+                    functools.partial(self._handle_batch, lane, handler, part, result),
+                    lane,
+                )
+            
+            # Skipped messages are acknowledged with the handled ones
+            handled = skipped
+            for part, result in results:
+                errors = await result
+                
+                for _, msg, _ in part:
+                    if id(msg) in errors:
+                        failures.append((msg, errors[id(msg)], True))
+                    else:
+                        handled.append(msg)
+            
+            # Failed messages sent for a retry count as settled
+            failed = []
+            for msg, error, retry in failures:
+                (handled if await self._forward_failed(topic, msg, error, retry) else failed).append(msg)
+            
+            self._acknowledge_batch(consumer, msgs, handled, failed, cumulative, nacked)
+    
+    async def _handle_batch(
+        self,
+        lane: str,
+        handler: callable,
+        part: List[Tuple[Optional[str], pulsar.Message, Event]],
+        result: asyncio.Future,
+    ) -> None:
+        """Handle a part of a batch, resolving result to the errors of its failed messages by their id.
+        
+        When the part fails as a whole its messages are handled again one at
+        a time, so only the ones that fail by themselves are retried, instead
+        of every message that shared a shard with them.
+        """
+        errors: Dict[int, str] = {}
+        
+        try:
+            # Handle messages
+            await handler([event for _, _, event in part])
+            self.handled += len(part)
+        except Exception as e:
+            if len(part) == 1:
+                self.failed += 1
                 self.logger.error(f"Error processing message: {str(e)}")
-                # Negative acknowledge message to reprocess it
-                consumer.negative_acknowledge(msg)
+                errors[id(part[0][1])] = str(e)
+            else:
+                self.logger.warning(f"Error processing {len(part)} messages, handling them one at a time: {str(e)}")
+                
+                for _, msg, event in part:
+                    try:
+                        await handler([event])
+                        self.handled += 1
+                    except Exception as e:
+                        self.failed += 1
+                        self.logger.error(f"Error processing message: {str(e)}")
+                        errors[id(msg)] = str(e)
+        finally:
+            self._record_latency(lane, [msg for _, msg, _ in part])
+        
+        result.set_result(errors)
+    
+    async def _wait_for_pool(self) -> None:
+        """Hold off taking messages while the database pool is saturated"""
+        if self.pool_wait is None or self.pool_wait() <= self.pause_pool_wait_seconds:
+            return
+        
+        self.pauses += 1
+        self._paused += 1
+        self.logger.warning(f"Pausing consumer, database connections take {self.pool_wait() * 1000:.0f} ms")
+        
+        try:
+            # Resume once the wait is well under the threshold again
+            while self.pool_wait() > self.pause_pool_wait_seconds / 2:
+                await asyncio.sleep(self.pause_check_interval_seconds)
+        finally:
+            self._paused -= 1
+        
+        self.logger.info("Resuming consumer")
+    
+    def _acknowledge_batch(
+        self,
+        consumer: pulsar.Consumer,
+        msgs: List[pulsar.Message],
+        handled: List[pulsar.Message],
+        failed: List[pulsar.Message],
+        cumulative: bool,
+        nacked: Dict[str, Set[str]],
+    ) -> None:
+        """Acknowledge a handled batch, with one cumulative ack per topic partition if possible.
+        
+        A cumulative ack would also acknowledge the messages of its partition
+        negatively acknowledged before, so partitions with failed messages,
+        in this batch or in earlier ones not redelivered yet, are
+        acknowledged one message at a time.
+        """
+        if cumulative:
+            for msg in failed:
+                nacked.setdefault(msg.topic_name(), set()).add(str(msg.message_id()))
+            
+            # Acknowledge up to the last message received from each partition without pending failures
+            last_msgs = {msg.topic_name(): msg for msg in msgs if not nacked.get(msg.topic_name())}
+            
+            for msg in last_msgs.values():
+                consumer.acknowledge_cumulative(msg)
+            
+            handled = [msg for msg in handled if msg.topic_name() not in last_msgs]
+        
+        # Acknowledge the handled messages and redeliver the failed ones
+        for msg in handled:
+            consumer.acknowledge(msg)
+        
+        for msg in failed:
+            consumer.negative_acknowledge(msg)
+    
+    def stats(self) -> Dict[str, Any]:
+        handlers = self._handlers.stats()
+        
+        return {
+            "received": self.received,
+            "handled": self.handled,
+            "failed": self.failed,
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered,
+            "skipped": self.skipped,
+            "paused": self._paused,
+            "pauses": self.pauses,
+            "in_flight": handlers["busy"],
+            "queued": sum(queue.qsize() for queue in self._queues) + handlers["queued"],
+            "partitions": dict(self.partitions),
+            "lanes": {
+                lane: {
+                    "handled": self._lane_handled[lane],
+                    "queued": handlers["queued_by_lane"][lane],
+                    **self._percentiles(self._latencies[lane]),
+                }
+                for lane in self._handlers.lanes
+            },
+        }
+    
+    @staticmethod
+    def _percentiles(latencies: Collection[float]) -> Dict[str, Optional[float]]:
+        ordered = sorted(latencies)
+        
+        return {
+            f"p{percentile}_ms": ordered[min(len(ordered) - 1, len(ordered) * percentile // 100)] if ordered else None
+            for percentile in (50, 95, 99)
+        }
     
     async def close(self) -> None:
+        # Stop receiving and dispatching, then let running handlers finish
+        self._stopping.set()
+        
+        for dispatcher in self._dispatchers:
+            dispatcher.cancel()
+        
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        await self._handlers.close()
+        
+        for thread in self._threads:
+            await asyncio.get_running_loop().run_in_executor(None, thread.join)
+        
         for topic, consumer in self.consumers.items():
             consumer.close()
         
-        self.client.close()
\ No newline at end of file
+        self.client.close()
+
+
+class PulsarDeadLetterQueue(DeadLetterQueue):
+    """Dead-letter topics of a subscription, read through an admin subscription.
+    
+    peek receives messages and asks for their redelivery, so they stay
+    queued; replay sends them back to their original topic, with a fresh
+    attempt count, and acknowledges them. The admin subscription starts at
+    the earliest message, and subscribe creates it up front so dead letters
+    are kept from the start.
+    """
+    
+    def __init__(
+        self,
+        client: pulsar.Client,
+        subscription_name: str,
+        publisher: PulsarMessagePublisher,
+        codec: Optional[EventCodec] = None,
+        receive_timeout_millis: int = 500,
+    ):
+        self.client = client
+        self.subscription_name = subscription_name
+        self.publisher = publisher
+        self.codec = codec or EventCodec()
+        self.receive_timeout_millis = receive_timeout_millis
+        self.topics: List[str] = []
+        self.consumers = {}
+        self.logger = logging.getLogger(__name__)
+        self._lock = asyncio.Lock()
+    
+    async def subscribe(self, topics: List[str]) -> None:
+        """Create the admin subscriptions of the dead-letter topics of the topics"""
+        self.topics = list(topics)
+        
+        for topic in self.topics:
+            await self._consumer(topic, max_attempts=None)
+    
+    async def peek(self, topic: str, limit: int = 20) -> List[Dict[str, Any]]:
+        async with self._lock:
+            consumer = await self._consumer(topic)
+            loop = asyncio.get_running_loop()
+            
+            msgs = await loop.run_in_executor(None, self._receive, consumer, limit)
+            
+            # Leave the messages in the queue
+            await loop.run_in_executor(None, consumer.redeliver_unacknowledged_messages)
+            
+            return [self._describe(topic, msg) for msg in msgs]
+    
+    async def replay(self, topic: str, limit: int = 100) -> int:
+        async with self._lock:
+            consumer = await self._consumer(topic)
+            
+            msgs = await asyncio.get_running_loop().run_in_executor(None, self._receive, consumer, limit)
+            
+            replayed = 0
+            for msg in msgs:
+                properties = dict(msg.properties())
+                original_topic = properties.pop("original_topic", topic)
+                properties.pop("attempt", None)
+                properties.pop("error", None)
+                
+                try:
+                    await self.publisher.forward(original_topic, msg.value(), properties, msg.partition_key() or None)
+                    consumer.acknowledge(msg)
+                    replayed += 1
+                except Exception as e:
+                    self.logger.error(f"Error replaying dead-lettered message to topic {original_topic}: {str(e)}")
+                    consumer.negative_acknowledge(msg)
+            
+            self.logger.info(f"Replayed {replayed} dead-lettered messages of topic {topic}")
+            
+            return replayed
+    
+    async def close(self) -> None:
+        for consumer in self.consumers.values():
+            consumer.close()
+        
+        self.consumers = {}
+    
+    async def _consumer(self, topic: str, max_attempts: Optional[int] = 1) -> pulsar.Consumer:
+        if topic not in self.topics:
+            raise ValueError(f"No dead-letter queue for topic {topic}")
+        
+        consumer = self.consumers.get(topic)
+        if consumer:
+            return consumer
+        
+        consumer = await connect_with_backoff(
+            functools.partial(
+                self.client.subscribe,
+                topic=f"persistent://public/default/{dead_letter_topic(topic, self.subscription_name)}",
+                subscription_name=f"{self.subscription_name}-admin",
+                consumer_type=pulsar.ConsumerType.Shared,
+                initial_position=pulsar.InitialPosition.Earliest,
+                receiver_queue_size=100,
+            ),
+            f"dead-letter consumer for topic {topic}",
+            max_attempts=max_attempts,
+        )
+        
+        self.consumers[topic] = consumer
+        
+        return consumer
+    
+    def _receive(self, consumer: pulsar.Consumer, limit: int) -> List[pulsar.Message]:
+        msgs = []
+        
+        while len(msgs) < limit:
+            try:
+                msgs.append(consumer.receive(timeout_millis=self.receive_timeout_millis))
+            except pulsar.Timeout:
+                break
+        
+        return msgs
+    
+    def _describe(self, topic: str, msg: pulsar.Message) -> Dict[str, Any]:
+        properties = msg.properties()
+        
+        try:
+            event = decode_message(self.codec, msg).to_dict()
+        except EventCodecError:
+            event = None
+        
+        return {
+            "message_id": str(msg.message_id()),
+            "topic": properties.get("original_topic", topic),
+            "key": msg.partition_key() or None,
+            "event_type": properties.get("event_type"),
+            "attempts": int(properties.get("attempt", "1")),
+            "error": properties.get("error"),
+            "published_at": msg.publish_timestamp(),
+            "event": event,
+        }
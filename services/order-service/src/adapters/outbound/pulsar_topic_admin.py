@@ -0,0 +1,70 @@
+# services/order-service/src/adapters/outbound/pulsar_topic_admin.py
+import json
+import logging
+import urllib.error
+import urllib.request
+from typing import Optional
+
+
+class PulsarTopicAdmin:
+    """Partitioned topics through the Pulsar admin REST API.
+    
+    Calls block on HTTP, so they are meant to run off the event loop.
+    """
+    
+    def __init__(self, admin_url: str, namespace: str = "public/default", timeout_seconds: float = 10.0):
+        self.admin_url = admin_url.rstrip("/")
+        self.namespace = namespace
+        self.timeout_seconds = timeout_seconds
+        self.logger = logging.getLogger(__name__)
+    
+    def partitions(self, topic: str) -> int:
+        """Partitions of a topic, 0 when it is not partitioned or does not exist"""
+        return json.loads(self._request("GET", topic))["partitions"]
+    
+    def ensure_partitions(self, topic: str, partitions: int) -> int:
+        """Create a topic with the partitions, or add the missing ones.
+        
+        Partitions cannot be removed, and a topic that already exists
+        without partitions cannot be partitioned, so those are left as they
+        are. Returns the partitions the topic ends up with.
+        """
+        current = self.partitions(topic)
+        
+        if current == partitions:
+            return current
+        
+        if current == 0:
+            try:
+                self._request("PUT", topic, partitions)
+            except urllib.error.HTTPError as e:
+                if e.code != 409:
+                    raise
+                
+                self.logger.error(
+                    f"Topic {topic} already exists without partitions, it has to be recreated "
+                    f"to get {partitions}"
+                )
+                return 0
+            
+            self.logger.info(f"Created topic {topic} with {partitions} partitions")
+            return partitions
+        
+        if current < partitions:
+            self._request("POST", topic, partitions)
+            self.logger.info(f"Raised the partitions of topic {topic} from {current} to {partitions}")
+            return partitions
+        
+        self.logger.warning(f"Topic {topic} has {current} partitions, more than the {partitions} configured")
+        return current
+    
+    def _request(self, method: str, topic: str, partitions: Optional[int] = None) -> bytes:
+        request = urllib.request.Request(
+            f"{self.admin_url}/admin/v2/persistent/{self.namespace}/{topic}/partitions",
+            data=json.dumps(partitions).encode() if partitions is not None else None,
+            headers={"Content-Type": "application/json"},
+            method=method,
+        )
+        
+        with urllib.request.urlopen(request, timeout=self.timeout_seconds) as response:
+            return response.read()
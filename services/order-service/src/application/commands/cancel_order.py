@@ -1,11 +1,15 @@
 # services/order-service/src/application/commands/cancel_order.py
+from contextlib import nullcontext
 from dataclasses import dataclass
-from typing import Dict, Any, Optional
+from typing import AsyncContextManager, Dict, Any, Optional
 
 from domain.models import OrderStatus
 from domain.events import OrderCancelled
 from application.ports.repositories import OrderRepository
 from application.ports.message_bus import MessagePublisher, SagaLog
+from application.ports.cache import OrderCache
+from application.ports.read_model import OrderReadModel
+from application.ports.unit_of_work import UnitOfWork
 
 
 @dataclass
@@ -20,50 +24,70 @@ class CancelOrderHandler:
         order_repository: OrderRepository,
         message_publisher: MessagePublisher,
         saga_log: SagaLog,
+        order_cache: Optional[OrderCache] = None,
+        read_model: Optional[OrderReadModel] = None,
+        unit_of_work: Optional[UnitOfWork] = None,
     ):
         self.order_repository = order_repository
         self.message_publisher = message_publisher
         self.saga_log = saga_log
+        self.order_cache = order_cache
+        self.read_model = read_model
+        self.unit_of_work = unit_of_work
     
     async def handle(self, command: CancelOrderCommand) -> Dict[str, Any]:
-        # Retrieve the order
-        order = await self.order_repository.get_by_id(command.order_id)
+        async with self._transaction():
+            # Retrieve the order
+            order = await self.order_repository.get_by_id(command.order_id)
+            
+            if not order:
+                raise ValueError(f"Order with ID {command.order_id} not found")
+            
+            # Check if the order can be cancelled
+            try:
+                order.cancel()
+            except ValueError as e:
+                return {
+                    "success": False,
+                    "message": str(e),
+                }
+            
+            # Create an order cancelled event
+            order_cancelled_event = OrderCancelled(
+                order_id=order.id,
+                reason=command.reason,
+                saga_id=order.saga_id,
+            )
+            
+            # Update the order in the repository
+            await self.order_repository.update(order)
+            
+            # Project the order to the read model
+            if self.read_model:
+                await self.read_model.project(order)
+            
+            # Log the event in the saga (if saga exists)
+            if order.saga_id:
+                await self.saga_log.log_event(order.saga_id, order_cancelled_event)
+                await self.saga_log.end_saga(order.saga_id, False)
+            
+            # Publish the event
+            await self.message_publisher.publish_with_key(
+                event=order_cancelled_event,
+                topic="orders",
+                key=order.id,
+            )
         
-        if not order:
-            raise ValueError(f"Order with ID {command.order_id} not found")
-        
-        # Check if the order can be cancelled
-        try:
-            order.cancel()
-        except ValueError as e:
-            return {
-                "success": False,
-                "message": str(e),
-            }
-        
-        # Update the order in the repository
-        await self.order_repository.update(order)
-        
-        # Create an order cancelled event
-        order_cancelled_event = OrderCancelled(
-            order_id=order.id,
-            reason=command.reason,
-            saga_id=order.saga_id,
-        )
-        
-        # Publish the event
-        await self.message_publisher.publish(
-            event=order_cancelled_event,
-            topic="orders",
-        )
-        
-        # Log the event in the saga (if saga exists)
-        if order.saga_id:
-            await self.saga_log.log_event(order.saga_id, order_cancelled_event)
-            await self.saga_log.end_saga(order.saga_id, False)
+        # Drop the cached view of the order once the cancellation is committed
+        if self.order_cache:
+            await self.order_cache.invalidate(order.id)
         
         return {
             "success": True,
             "order_id": order.id,
             "status": order.status.name,
-        }
\ No newline at end of file
+        }
+    
+    def _transaction(self) -> AsyncContextManager[Any]:
+        """Open a transaction of the unit of work, if there is one"""
+        return self.unit_of_work.transaction() if self.unit_of_work else nullcontext()
@@ -1,11 +1,15 @@
 import uuid
+from contextlib import nullcontext
 from dataclasses import dataclass
-from typing import List, Dict, Any
+from typing import AsyncContextManager, List, Dict, Any, Optional, Tuple
 
 from domain.models import Order, OrderItem, OrderStatus
 from domain.events import OrderCreated, PaymentRequested
 from application.ports.repositories import OrderRepository
 from application.ports.message_bus import MessagePublisher, SagaLog
+from application.ports.cache import OrderCache
+from application.ports.read_model import OrderReadModel
+from application.ports.unit_of_work import UnitOfWork
 
 
 @dataclass
@@ -27,12 +31,153 @@ class CreateOrderHandler:
         order_repository: OrderRepository,
         message_publisher: MessagePublisher,
         saga_log: SagaLog,
+        order_cache: Optional[OrderCache] = None,
+        read_model: Optional[OrderReadModel] = None,
+        unit_of_work: Optional[UnitOfWork] = None,
     ):
         self.order_repository = order_repository
         self.message_publisher = message_publisher
         self.saga_log = saga_log
+        self.order_cache = order_cache
+        self.read_model = read_model
+        self.unit_of_work = unit_of_work
     
     async def handle(self, command: CreateOrderCommand) -> Dict[str, Any]:
+        # Create a new order with the provided data
+        order = self._build_order(command)
+        saga_id = order.saga_id
+        
+        # Create the order created and payment requested events
+        order_created_event, payment_requested_event = self._build_events(order)
+        
+        # The order is only visible once its saga has started, so it is
+        # written directly waiting for payment
+        order.update_status(OrderStatus.PENDING_PAYMENT)
+        
+        # Write the order, its saga and its projection in one transaction
+        async with self._transaction():
+            # Save the order to the repository
+            await self.order_repository.save(order)
+            
+            # Start a new saga and log its events
+            await self.saga_log.start_saga(saga_id, order.id)
+            await self.saga_log.log_event(saga_id, order_created_event)
+            await self.saga_log.log_event(saga_id, payment_requested_event)
+            
+            # Project the order to the read model
+            if self.read_model:
+                await self.read_model.project(order)
+            
+            # Publish both events as one batch, committed with the order
+            # when the publisher writes to the outbox, and keyed by the
+            # order so consumers handle its events in order
+            await self.message_publisher.publish_many_with_keys([
+                (order_created_event, "orders", order.id),
+                (payment_requested_event, "payments", order.id),
+            ])
+        
+        # Drop any view of the order read while it was being created
+        if self.order_cache:
+            await self.order_cache.invalidate(order.id)
+        
+        return {
+            "order_id": order.id,
+            "saga_id": saga_id,
+            "status": order.status.name,
+        }
+    
+    async def handle_many(self, commands: List[CreateOrderCommand]) -> List[Dict[str, Any]]:
+        """Create several orders with one write per table and one publish batch.
+        
+        Returns one result per command, in the same order, telling whether
+        that order was created. The valid orders are written in one
+        transaction of the unit of work, so a failed write reports all of
+        them as failed and leaves none of them behind. Without a unit of
+        work some of the writes could outlive the failure, so it is required.
+        """
+        if self.unit_of_work is None:
+            raise ValueError("Creating orders in a batch needs a unit of work")
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(commands)
+        orders: List[Order] = []
+        positions: List[int] = []
+        
+        # Build every valid order, reporting the invalid ones
+        for position, command in enumerate(commands):
+            try:
+                order = self._build_order(command)
+            except ValueError as e:
+                results[position] = {
+                    "success": False,
+                    "error": str(e),
+                }
+                continue
+            
+            # Batched orders are written once, already waiting for payment
+            order.update_status(OrderStatus.PENDING_PAYMENT)
+            orders.append(order)
+            positions.append(position)
+        
+        if orders:
+            events = [self._build_events(order) for order in orders]
+            
+            try:
+                async with self.unit_of_work.transaction():
+                    # Save the orders and start their sagas
+                    await self.order_repository.save_many(orders)
+                    await self.saga_log.start_sagas([(order.saga_id, order.id) for order in orders])
+                    
+                    # Log the events in the sagas
+                    await self.saga_log.log_events(
+                        [
+                            (order.saga_id, event)
+                            for order, order_events in zip(orders, events)
+                            for event in order_events
+                        ]
+                    )
+                    
+                    # Project the orders to the read model
+                    if self.read_model:
+                        await self.read_model.project_many(orders)
+                    
+                    # Publish every order created and payment requested event together
+                    await self.message_publisher.publish_many_with_keys(
+                        [
+                            (order_created_event, "orders", order.id)
+                            for order, (order_created_event, _) in zip(orders, events)
+                        ]
+                        + [
+                            (payment_requested_event, "payments", order.id)
+                            for order, (_, payment_requested_event) in zip(orders, events)
+                        ]
+                    )
+            except Exception as e:
+                for position in positions:
+                    results[position] = {
+                        "success": False,
+                        "error": str(e),
+                    }
+                return results
+            
+            if self.order_cache:
+                for order in orders:
+                    await self.order_cache.invalidate(order.id)
+            
+            for position, order in zip(positions, orders):
+                results[position] = {
+                    "success": True,
+                    "order_id": order.id,
+                    "saga_id": order.saga_id,
+                    "status": order.status.name,
+                }
+        
+        return results
+    
+    def _transaction(self) -> AsyncContextManager[Any]:
+        """Open a transaction of the unit of work, if there is one"""
+        return self.unit_of_work.transaction() if self.unit_of_work else nullcontext()
+    
+    def _build_order(self, command: CreateOrderCommand) -> Order:
         # Create a new order with the provided data
         order = Order(
             customer_id=command.customer_id,
@@ -48,16 +193,11 @@ class CreateOrderHandler:
             )
         
         # Generate a SAGA ID for order orchestration
-        saga_id = str(uuid.uuid4())
-        order.saga_id = saga_id
-        
-        # Save the order to the repository
-        await self.order_repository.save(order)
+        order.saga_id = str(uuid.uuid4())
         
-        # Start a new saga
-        await self.saga_log.start_saga(saga_id, order.id)
-        
-        # Create the order created event
+        return order
+    
+    def _build_events(self, order: Order) -> Tuple[OrderCreated, PaymentRequested]:
         order_created_event = OrderCreated(
             order_id=order.id,
             customer_id=order.customer_id,
@@ -69,42 +209,14 @@ class CreateOrderHandler:
                 }
                 for item in order.items
             },
-            saga_id=saga_id,
+            saga_id=order.saga_id,
         )
         
-        # Publish the order created event
-        await self.message_publisher.publish(
-            event=order_created_event,
-            topic="orders",
-        )
-        
-        # Log the event in the saga
-        await self.saga_log.log_event(saga_id, order_created_event)
-        
-        # Create the payment requested event
         payment_requested_event = PaymentRequested(
             order_id=order.id,
             customer_id=order.customer_id,
             amount=order.total_amount,
-            saga_id=saga_id,
+            saga_id=order.saga_id,
         )
         
-        # Update order status
-        order.update_status(OrderStatus.PENDING_PAYMENT)
-        await self.order_repository.update(order)
-        
-        # Publish the payment requested event
-        await self.message_publisher.publish(
-            event=payment_requested_event,
-            topic="payments",
-        )
-        
-        # Log the event in the saga
-        await self.saga_log.log_event(saga_id, payment_requested_event)
-        
-        return {
-            "order_id": order.id,
-            "saga_id": saga_id,
-            "status": order.status.name,
-        }
-
+        return order_created_event, payment_requested_event
@@ -0,0 +1,21 @@
+# services/order-service/src/application/ports/cache.py
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class OrderCache(ABC):
+    """Port for caching order views in front of the read side"""
+    
+    @abstractmethod
+    async def get_or_load(
+        self,
+        order_id: str,
+        loader: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+    ) -> Optional[Dict[str, Any]]:
+        """Get the view of an order, calling the loader on a cache miss"""
+        pass
+    
+    @abstractmethod
+    async def invalidate(self, order_id: str) -> None:
+        """Drop the cached view of an order after it was written"""
+        pass
@@ -1,6 +1,6 @@
 # services/order-service/src/application/ports/message_bus.py
 from abc import ABC, abstractmethod
-from typing import Any, Callable, Dict
+from typing import Any, Awaitable, Callable, Collection, Dict, List, Optional, Tuple
 
 from domain.events import Event
 
@@ -17,22 +17,79 @@ class MessagePublisher(ABC):
     async def publish_with_key(self, event: Event, topic: str, key: str) -> None:
         """Publish an event to a specific topic with a routing key"""
         pass
+    
+    async def publish_many(self, messages: List[Tuple[Event, str]]) -> None:
+        """Publish several (event, topic) pairs as one batch"""
+        for event, topic in messages:
+            await self.publish(event=event, topic=topic)
+    
+    async def publish_many_with_keys(self, messages: List[Tuple[Event, str, Optional[str]]]) -> None:
+        """Publish several (event, topic, key) triples as one batch.
+        
+        Events with the same key are delivered in order; a None key publishes
+        without one.
+        """
+        for event, topic, key in messages:
+            if key is None:
+                await self.publish(event=event, topic=topic)
+            else:
+                await self.publish_with_key(event=event, topic=topic, key=key)
 
 
 class MessageConsumer(ABC):
     """Port for consuming messages/events"""
     
     @abstractmethod
-    async def subscribe(self, topic: str, handler: Callable[[Dict[str, Any]], None]) -> None:
-        """Subscribe to a topic with a handler function"""
+    async def subscribe(
+        self,
+        topic: str,
+        handler: Callable[[Event], Awaitable[None]],
+        event_types: Optional[Collection[str]] = None,
+    ) -> None:
+        """Subscribe to a topic with a handler of the decoded events.
+        
+        With event_types, the handler only gets events of those types, and
+        events of types no handler of the topic takes are acknowledged
+        without being decoded. Subscribing again to the same topic adds a
+        handler for other event types.
+        """
         pass
     
+    async def subscribe_batch(
+        self,
+        topic: str,
+        handler: Callable[[List[Event]], Awaitable[None]],
+        event_types: Optional[Collection[str]] = None,
+    ) -> None:
+        """Subscribe to a topic with a handler of several events at once.
+        
+        Consumers without batch receive hand each event over on its own.
+        """
+        async def handle_one(event: Event) -> None:
+            await handler([event])
+        
+        await self.subscribe(topic, handle_one, event_types)
+    
     @abstractmethod
     async def close(self) -> None:
         """Close the consumer connection"""
         pass
 
 
+class DeadLetterQueue(ABC):
+    """Port for the messages that failed every delivery attempt"""
+    
+    @abstractmethod
+    async def peek(self, topic: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Get up to limit dead-lettered messages of a topic, leaving them queued"""
+        pass
+    
+    @abstractmethod
+    async def replay(self, topic: str, limit: int = 100) -> int:
+        """Send up to limit dead-lettered messages back to their topic, returning how many"""
+        pass
+
+
 class SagaLog(ABC):
     """Port for saga transaction logging"""
     
@@ -46,11 +103,26 @@ class SagaLog(ABC):
         """Log an event in a saga transaction"""
         pass
     
+    async def start_sagas(self, sagas: List[Tuple[str, str]]) -> None:
+        """Start several (saga_id, order_id) saga transactions at once"""
+        for saga_id, order_id in sagas:
+            await self.start_saga(saga_id, order_id)
+    
+    async def log_events(self, events: List[Tuple[str, Event]]) -> None:
+        """Log several (saga_id, event) pairs at once"""
+        for saga_id, event in events:
+            await self.log_event(saga_id, event)
+    
     @abstractmethod
     async def end_saga(self, saga_id: str, success: bool) -> None:
         """End a saga transaction with success or failure"""
         pass
     
+    async def end_sagas(self, sagas: List[Tuple[str, bool]]) -> None:
+        """End several (saga_id, success) saga transactions at once"""
+        for saga_id, success in sagas:
+            await self.end_saga(saga_id, success)
+    
     @abstractmethod
     async def get_saga_events(self, saga_id: str) -> List[Dict[str, Any]]:
         """Get all events for a specific saga"""
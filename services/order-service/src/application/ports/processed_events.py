@@ -0,0 +1,20 @@
+# services/order-service/src/application/ports/processed_events.py
+from abc import ABC, abstractmethod
+from typing import List, Set
+
+
+class ProcessedEventStore(ABC):
+    """Port for recording which incoming events were already handled"""
+    
+    @abstractmethod
+    async def claim(self, event_ids: List[str]) -> Set[str]:
+        """Record events as processed, returning the IDs not processed before.
+        
+        Claims are written in the caller's transaction, so they are undone
+        with it and a redelivered event is handled again.
+        """
+        pass
+    
+    def mark_committed(self, event_ids: List[str]) -> None:
+        """Remember events whose claims were committed, if the store keeps them in memory"""
+        pass
@@ -0,0 +1,38 @@
+# services/order-service/src/application/ports/read_model.py
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from domain.models import Order
+
+
+class OrderReadModel(ABC):
+    """Port for the denormalized read side of orders"""
+    
+    @abstractmethod
+    async def project(self, order: Order) -> None:
+        """Store the current view of an order after it was written"""
+        pass
+    
+    async def project_many(self, orders: List[Order]) -> None:
+        """Store the current views of several orders"""
+        for order in orders:
+            await self.project(order)
+    
+    @abstractmethod
+    async def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """Get the view of an order by its ID"""
+        pass
+    
+    @abstractmethod
+    async def get_by_customer_id(
+        self,
+        customer_id: str,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Get the views of a customer's orders, newest first.
+        
+        Pages work as in OrderRepository.get_by_customer_id.
+        """
+        pass
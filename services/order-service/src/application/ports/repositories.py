@@ -1,6 +1,7 @@
 # services/order-service/src/application/ports/repositories.py
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Tuple
 
 from domain.models import Order
 
@@ -13,14 +14,37 @@ class OrderRepository(ABC):
         """Save an order to the repository"""
         pass
     
+    async def save_many(self, orders: List[Order]) -> None:
+        """Save several new orders at once"""
+        for order in orders:
+            await self.save(order)
+    
     @abstractmethod
     async def get_by_id(self, order_id: str) -> Optional[Order]:
         """Get an order by its ID"""
         pass
     
+    async def get_by_ids(self, order_ids: List[str]) -> List[Order]:
+        """Get several orders by their IDs, skipping the ones not found"""
+        orders = []
+        for order_id in order_ids:
+            order = await self.get_by_id(order_id)
+            if order:
+                orders.append(order)
+        return orders
+    
     @abstractmethod
-    async def get_by_customer_id(self, customer_id: str) -> List[Order]:
-        """Get all orders for a specific customer"""
+    async def get_by_customer_id(
+        self,
+        customer_id: str,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, str]] = None,
+    ) -> List[Order]:
+        """Get orders for a specific customer, newest first.
+        
+        At most ``limit`` orders are returned (all of them when None), starting
+        after the ``(created_at, id)`` position of the previous page.
+        """
         pass
     
     @abstractmethod
@@ -28,6 +52,11 @@ class OrderRepository(ABC):
         """Update an existing order"""
         pass
     
+    async def update_many(self, orders: List[Order]) -> None:
+        """Update several existing orders at once"""
+        for order in orders:
+            await self.update(order)
+    
     @abstractmethod
     async def delete(self, order_id: str) -> None:
         """Delete an order by its ID"""
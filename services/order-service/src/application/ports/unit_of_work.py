@@ -0,0 +1,16 @@
+# services/order-service/src/application/ports/unit_of_work.py
+from abc import ABC, abstractmethod
+from typing import Any, AsyncContextManager
+
+
+class UnitOfWork(ABC):
+    """Port for running the writes of a command as one atomic unit"""
+    
+    @abstractmethod
+    def transaction(self) -> AsyncContextManager[Any]:
+        """Run the repository calls made inside the block in one transaction.
+        
+        The transaction commits when the block exits cleanly and rolls back
+        when it raises. Blocks nested in an open transaction join it.
+        """
+        pass
@@ -1,9 +1,14 @@
 # services/order-service/src/application/queries/get_order.py
+import base64
+import json
 from dataclasses import dataclass
-from typing import Dict, Any, Optional
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
 
 from application.ports.repositories import OrderRepository
 from application.ports.message_bus import SagaLog
+from application.ports.cache import OrderCache
+from application.ports.read_model import OrderReadModel
 
 
 @dataclass
@@ -17,49 +22,113 @@ class GetOrderHandler:
         self,
         order_repository: OrderRepository,
         saga_log: SagaLog,
+        order_cache: Optional[OrderCache] = None,
+        read_model: Optional[OrderReadModel] = None,
     ):
         self.order_repository = order_repository
         self.saga_log = saga_log
+        self.order_cache = order_cache
+        self.read_model = read_model
     
     async def handle(self, query: GetOrderQuery) -> Optional[Dict[str, Any]]:
-        # Retrieve the order
-        order = await self.order_repository.get_by_id(query.order_id)
+        # Retrieve the order view, from the cache when there is one
+        if self.order_cache:
+            order_view = await self.order_cache.get_or_load(
+                query.order_id,
+                lambda: self._load_order_view(query.order_id),
+            )
+        else:
+            order_view = await self._load_order_view(query.order_id)
         
-        if not order:
+        if not order_view:
             return None
         
-        # Convert order to dictionary
-        result = order.to_dict()
+        # Copy the view so the cached one is never modified
+        result = dict(order_view)
         
         # Include saga history if requested and if saga exists
-        if query.include_saga_history and order.saga_id:
-            saga_events = await self.saga_log.get_saga_events(order.saga_id)
+        if query.include_saga_history and result["saga_id"]:
+            saga_events = await self.saga_log.get_saga_events(result["saga_id"])
             result["saga_history"] = saga_events
         
         return result
+    
+    async def _load_order_view(self, order_id: str) -> Optional[Dict[str, Any]]:
+        # Read the projected view when the read model is available
+        if self.read_model:
+            return await self.read_model.get(order_id)
+        
+        order = await self.order_repository.get_by_id(order_id)
+        
+        # Convert order to dictionary
+        return order.to_dict() if order else None
 
 
 @dataclass
 class GetCustomerOrdersQuery:
     customer_id: str
+    limit: int = 50
+    cursor: Optional[str] = None
+
+
+def encode_cursor(created_at: datetime, order_id: str) -> str:
+    """Encode the position of an order in a customer's history as an opaque cursor"""
+    payload = json.dumps([created_at.isoformat(), order_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        created_at, order_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), order_id
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
 
 
 class GetCustomerOrdersHandler:
     def __init__(
         self,
         order_repository: OrderRepository,
+        read_model: Optional[OrderReadModel] = None,
     ):
         self.order_repository = order_repository
+        self.read_model = read_model
     
     async def handle(self, query: GetCustomerOrdersQuery) -> Dict[str, Any]:
-        # Retrieve all orders for the customer
-        orders = await self.order_repository.get_by_customer_id(query.customer_id)
+        after = decode_cursor(query.cursor) if query.cursor else None
+        
+        # Retrieve one page of orders, plus one to know if another page follows
+        if self.read_model:
+            orders = await self.read_model.get_by_customer_id(
+                query.customer_id,
+                limit=query.limit + 1,
+                after=after,
+            )
+        else:
+            orders = [
+                order.to_dict()
+                for order in await self.order_repository.get_by_customer_id(
+                    query.customer_id,
+                    limit=query.limit + 1,
+                    after=after,
+                )
+            ]
+        
+        has_more = len(orders) > query.limit
+        orders = orders[:query.limit]
+        
+        if has_more:
+            last = orders[-1]
+            next_cursor = encode_cursor(datetime.fromisoformat(last["created_at"]), last["id"])
+        else:
+            next_cursor = None
         
-        # Convert orders to dictionaries
         result = {
             "customer_id": query.customer_id,
-            "orders": [order.to_dict() for order in orders],
+            "orders": orders,
             "total_orders": len(orders),
+            "next_cursor": next_cursor,
         }
         
-        return result
\ No newline at end of file
+        return result
@@ -1,7 +1,7 @@
 # services/order-service/src/config.py
 import os
 from dataclasses import dataclass, field
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 
 @dataclass
@@ -13,6 +13,8 @@ class PostgresConfig:
     database: str
     min_size: int = 5
     max_size: int = 10
+    statement_cache_size: int = 100
+    wait_window_seconds: float = 1.0
     
     @property
     def connection_string(self) -> str:
@@ -24,6 +26,27 @@ class PulsarConfig:
     host: str
     port: int = 6650
     admin_port: int = 8080
+    max_concurrent_handlers: int = 32
+    batching_max_messages: int = 1000
+    batching_max_publish_delay_ms: int = 10
+    batch_receive_max_messages: int = 100
+    batch_receive_timeout_ms: int = 20
+    event_encoding: str = "orjson"
+    producer_topics: List[str] = field(default_factory=lambda: ["orders", "payments", "inventory"])
+    connect_max_attempts: int = 5
+    reconnect_max_delay_seconds: float = 5.0
+    retry_delays_seconds: List[float] = field(default_factory=lambda: [1.0, 10.0, 60.0])
+    max_delivery_attempts: int = 4
+    max_in_flight_per_subscription: int = 64
+    receiver_queue_size: int = 1000
+    pause_pool_wait_ms: float = 50.0
+    subscription_type: str = "Key_Shared"
+    subscription_types: Dict[str, str] = field(default_factory=dict)
+    topic_partitions: Dict[str, int] = field(default_factory=lambda: {"orders": 4, "payments": 4, "inventory": 4})
+    compression: str = "zstd"
+    compression_threshold_bytes: int = 1024
+    priority_lanes: bool = True
+    priority_weight: int = 8
     
     @property
     def service_url(self) -> str:
@@ -34,6 +57,28 @@ class PulsarConfig:
         return f"http://{self.host}:{self.admin_port}"
 
 
+@dataclass
+class CacheConfig:
+    max_size: int = 10000
+    ttl_seconds: float = 2.0
+
+
+@dataclass
+class OutboxConfig:
+    batch_size: int = 100
+    poll_interval_seconds: float = 0.2
+    publish_timeout_seconds: float = 5.0
+    max_backoff_seconds: float = 30.0
+    measure_interval_seconds: float = 1.0
+
+
+@dataclass
+class DedupeConfig:
+    memory_size: int = 100000
+    retention_seconds: float = 86400.0
+    prune_interval_seconds: float = 300.0
+
+
 @dataclass
 class ApiConfig:
     host: str = "0.0.0.0"
@@ -46,7 +91,11 @@ class AppConfig:
     postgresql: PostgresConfig
     pulsar: PulsarConfig
     api: ApiConfig = field(default_factory=lambda: ApiConfig())
+    cache: CacheConfig = field(default_factory=lambda: CacheConfig())
+    outbox: OutboxConfig = field(default_factory=lambda: OutboxConfig())
+    dedupe: DedupeConfig = field(default_factory=lambda: DedupeConfig())
     service_name: str = "order-service"
+    message_bus: str = "pulsar"
 
 
 def load_config() -> AppConfig:
@@ -58,12 +107,66 @@ def load_config() -> AppConfig:
             user=os.getenv("POSTGRES_USER", "postgres"),
             password=os.getenv("POSTGRES_PASSWORD", "postgres"),
             database=os.getenv("POSTGRES_DB", "orders"),
+            statement_cache_size=int(os.getenv("POSTGRES_STATEMENT_CACHE_SIZE", "100")),
+            wait_window_seconds=float(os.getenv("POSTGRES_WAIT_WINDOW_SECONDS", "1.0")),
         ),
         pulsar=PulsarConfig(
             host=os.getenv("PULSAR_HOST", "localhost"),
             port=int(os.getenv("PULSAR_PORT", "6650")),
             admin_port=int(os.getenv("PULSAR_ADMIN_PORT", "8080")),
+            max_concurrent_handlers=int(os.getenv("PULSAR_MAX_CONCURRENT_HANDLERS", "32")),
+            batching_max_messages=int(os.getenv("PULSAR_BATCHING_MAX_MESSAGES", "1000")),
+            batching_max_publish_delay_ms=int(os.getenv("PULSAR_BATCHING_MAX_PUBLISH_DELAY_MS", "10")),
+            batch_receive_max_messages=int(os.getenv("PULSAR_BATCH_RECEIVE_MAX_MESSAGES", "100")),
+            batch_receive_timeout_ms=int(os.getenv("PULSAR_BATCH_RECEIVE_TIMEOUT_MS", "20")),
+            event_encoding=os.getenv("PULSAR_EVENT_ENCODING", "orjson"),
+            producer_topics=os.getenv("PULSAR_PRODUCER_TOPICS", "orders,payments,inventory").split(","),
+            connect_max_attempts=int(os.getenv("PULSAR_CONNECT_MAX_ATTEMPTS", "5")),
+            reconnect_max_delay_seconds=float(os.getenv("PULSAR_RECONNECT_MAX_DELAY_SECONDS", "5.0")),
+            retry_delays_seconds=[
+                float(delay) for delay in os.getenv("PULSAR_RETRY_DELAYS_SECONDS", "1,10,60").split(",")
+            ],
+            max_delivery_attempts=int(os.getenv("PULSAR_MAX_DELIVERY_ATTEMPTS", "4")),
+            max_in_flight_per_subscription=int(os.getenv("PULSAR_MAX_IN_FLIGHT_PER_SUBSCRIPTION", "64")),
+            receiver_queue_size=int(os.getenv("PULSAR_RECEIVER_QUEUE_SIZE", "1000")),
+            pause_pool_wait_ms=float(os.getenv("PULSAR_PAUSE_POOL_WAIT_MS", "50")),
+            subscription_type=os.getenv("PULSAR_SUBSCRIPTION_TYPE", "Key_Shared"),
+            # Per topic, as in "shipping=Shared,payments=Key_Shared"
+            subscription_types=dict(
+                entry.split("=", 1) for entry in os.getenv("PULSAR_SUBSCRIPTION_TYPES", "").split(",") if entry
+            ),
+            # Zero partitions leaves a topic to be created unpartitioned on first use
+            topic_partitions={
+                topic: int(partitions)
+                for topic, partitions in (
+                    entry.split("=", 1)
+                    for entry in os.getenv("PULSAR_TOPIC_PARTITIONS", "orders=4,payments=4,inventory=4").split(",")
+                    if entry
+                )
+                if int(partitions) > 0
+            },
+            # "none" sends every event uncompressed
+            compression=os.getenv("PULSAR_COMPRESSION", "zstd"),
+            compression_threshold_bytes=int(os.getenv("PULSAR_COMPRESSION_THRESHOLD_BYTES", "1024")),
+            priority_lanes=os.getenv("PULSAR_PRIORITY_LANES", "true").lower() == "true",
+            priority_weight=int(os.getenv("PULSAR_PRIORITY_WEIGHT", "8")),
+        ),
+        cache=CacheConfig(
+            max_size=int(os.getenv("ORDER_CACHE_MAX_SIZE", "10000")),
+            ttl_seconds=float(os.getenv("ORDER_CACHE_TTL_SECONDS", "2.0")),
+        ),
+        outbox=OutboxConfig(
+            batch_size=int(os.getenv("OUTBOX_BATCH_SIZE", "100")),
+            poll_interval_seconds=float(os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", "0.2")),
+            publish_timeout_seconds=float(os.getenv("OUTBOX_PUBLISH_TIMEOUT_SECONDS", "5.0")),
+            max_backoff_seconds=float(os.getenv("OUTBOX_MAX_BACKOFF_SECONDS", "30.0")),
+            measure_interval_seconds=float(os.getenv("OUTBOX_MEASURE_INTERVAL_SECONDS", "1.0")),
+        ),
+        dedupe=DedupeConfig(
+            memory_size=int(os.getenv("DEDUPE_MEMORY_SIZE", "100000")),
+            retention_seconds=float(os.getenv("DEDUPE_RETENTION_SECONDS", "86400")),
+            prune_interval_seconds=float(os.getenv("DEDUPE_PRUNE_INTERVAL_SECONDS", "300")),
         ),
         service_name=os.getenv("SERVICE_NAME", "order-service"),
+        message_bus=os.getenv("MESSAGE_BUS", "pulsar"),
     )
-    
\ No newline at end of file
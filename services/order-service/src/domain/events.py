@@ -1,7 +1,7 @@
 # services/order-service/src/domain/events.py
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Type
 import uuid
 
 
@@ -13,6 +13,11 @@ class Event:
     timestamp: datetime = field(default_factory=datetime.now)
     saga_id: Optional[str] = None
     
+    @property
+    def compensates(self) -> bool:
+        """Whether the event starts the compensation of its order"""
+        return False
+    
     def to_dict(self) -> Dict[str, Any]:
         return {
             "event_id": self.event_id,
@@ -51,6 +56,10 @@ class OrderCancelled(Event):
     def __post_init__(self):
         self.event_type = "order_cancelled"
     
+    @property
+    def compensates(self) -> bool:
+        return True
+    
     def to_dict(self) -> Dict[str, Any]:
         event_dict = super().to_dict()
         event_dict.update({
@@ -89,6 +98,11 @@ class PaymentProcessed(Event):
     def __post_init__(self):
         self.event_type = "payment_processed"
     
+    @property
+    def compensates(self) -> bool:
+        # A failed payment fails the order, ending its saga
+        return not self.success
+    
     def to_dict(self) -> Dict[str, Any]:
         event_dict = super().to_dict()
         event_dict.update({
@@ -127,6 +141,11 @@ class InventoryAllocated(Event):
     def __post_init__(self):
         self.event_type = "inventory_allocated"
     
+    @property
+    def compensates(self) -> bool:
+        # A failed allocation fails the order, ending its saga
+        return not self.success
+    
     def to_dict(self) -> Dict[str, Any]:
         event_dict = super().to_dict()
         event_dict.update({
@@ -152,4 +171,29 @@ class OrderShipped(Event):
             "order_id": self.order_id,
             "tracking_number": self.tracking_number,
         })
-        return event_dict
\ No newline at end of file
+        return event_dict
+
+
+EVENT_TYPES: Dict[str, Type[Event]] = {
+    "order_created": OrderCreated,
+    "order_cancelled": OrderCancelled,
+    "payment_requested": PaymentRequested,
+    "payment_processed": PaymentProcessed,
+    "inventory_requested": InventoryRequested,
+    "inventory_allocated": InventoryAllocated,
+    "order_shipped": OrderShipped,
+}
+
+
+def event_from_dict(data: Dict[str, Any]) -> Event:
+    """Rebuild an event from the dictionary made by its to_dict"""
+    event_class = EVENT_TYPES[data["event_type"]]
+    
+    kwargs = {
+        event_field.name: data[event_field.name]
+        for event_field in fields(event_class)
+        if event_field.init and event_field.name in data
+    }
+    kwargs["timestamp"] = datetime.fromisoformat(data["timestamp"])
+    
+    return event_class(**kwargs)
@@ -2,7 +2,8 @@
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum, auto
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set
+import copy
 import uuid
 
 
@@ -39,12 +40,17 @@ class Order:
     modified_at: datetime = field(default_factory=datetime.now)
     saga_id: Optional[str] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
+    _snapshot: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
     
     @property
     def total_amount(self) -> float:
         return sum(item.total_price for item in self.items)
     
     def add_item(self, product_id: str, quantity: int, unit_price: float) -> None:
+        if quantity <= 0:
+            raise ValueError(f"Quantity of product {product_id} must be positive")
+        if unit_price < 0:
+            raise ValueError(f"Unit price of product {product_id} cannot be negative")
         self.items.append(OrderItem(product_id=product_id, quantity=quantity, unit_price=unit_price))
         self.modified_at = datetime.now()
     
@@ -58,6 +64,32 @@ class Order:
         self.status = OrderStatus.CANCELLED
         self.modified_at = datetime.now()
     
+    def mark_clean(self) -> None:
+        """Record the current state as the persisted state of the order"""
+        self._snapshot = self._tracked_state()
+    
+    def changed_fields(self) -> Set[str]:
+        """Names of the fields changed since the last call to mark_clean.
+        
+        An order that was never marked clean reports every tracked field.
+        """
+        state = self._tracked_state()
+        
+        if self._snapshot is None:
+            return set(state)
+        
+        return {name for name, value in state.items() if self._snapshot[name] != value}
+    
+    def _tracked_state(self) -> Dict[str, Any]:
+        # Metadata is mutated in place by its users, so keep a copy of it
+        return {
+            "customer_id": self.customer_id,
+            "items": [(item.product_id, item.quantity, item.unit_price) for item in self.items],
+            "status": self.status,
+            "saga_id": self.saga_id,
+            "metadata": copy.deepcopy(self.metadata),
+        }
+    
     def to_dict(self) -> Dict[str, Any]:
         return {
             "id": self.id,
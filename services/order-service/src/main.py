@@ -32,7 +32,17 @@ from adapters.inbound.fastapi_app import create_app, Handlers
 from adapters.inbound.event_handlers import EventHandlers
 from adapters.outbound.postgres_repository import PostgresOrderRepository
 from adapters.outbound.postgres_saga_log import PostgresSagaLog
-from adapters.outbound.pulsar_event_publisher import PulsarMessagePublisher, PulsarMessageConsumer
+from adapters.outbound.postgres_statements import StatementRegistry
+from adapters.outbound.postgres_read_model import PostgresOrderReadModel
+from adapters.outbound.postgres_unit_of_work import PostgresUnitOfWork
+from adapters.outbound.postgres_outbox import PostgresOutboxPublisher, OutboxRelay
+from adapters.outbound.postgres_processed_events import PostgresProcessedEventStore
+from adapters.outbound.in_memory_order_cache import InMemoryOrderCache
+from adapters.outbound.event_codec import EventCodec
+from adapters.outbound.pulsar_event_publisher import PulsarMessagePublisher, PulsarMessageConsumer, PulsarDeadLetterQueue
+from adapters.outbound.pulsar_topic_admin import PulsarTopicAdmin
+from adapters.outbound.payload_compression import PayloadCompressor
+from adapters.outbound.in_memory_message_bus import InMemoryMessageBus, InMemoryMessagePublisher, InMemoryMessageConsumer
 from application.commands.create_order import CreateOrderHandler
 from application.commands.cancel_order import CancelOrderHandler
 from application.queries.get_order import GetOrderHandler, GetCustomerOrdersHandler
@@ -101,10 +111,48 @@ async def create_tables(pool):
             )
         """)
         
+        # Create order views table (denormalized read model)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS order_views (
+                id TEXT PRIMARY KEY,
+                customer_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_at TIMESTAMP NOT NULL,
+                modified_at TIMESTAMP NOT NULL,
+                saga_id TEXT,
+                metadata JSONB NOT NULL DEFAULT '{}',
+                total_amount FLOAT NOT NULL,
+                items JSONB NOT NULL DEFAULT '[]'
+            )
+        """)
+        
+        # Create outbox table (events waiting to be relayed to Pulsar)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id BIGSERIAL PRIMARY KEY,
+                topic TEXT NOT NULL,
+                partition_key TEXT,
+                event_id TEXT NOT NULL,
+                event_type TEXT NOT NULL,
+                event_data JSONB NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+        
+        # Create processed events table (IDs of the events already handled)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS processed_events (
+                event_id TEXT PRIMARY KEY,
+                processed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+        
         # Create indexes
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_customer_id ON orders(customer_id)")
+        await conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_customer_created ON orders(customer_id, created_at DESC, id DESC)")
         await conn.execute("CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items(order_id)")
         await conn.execute("CREATE INDEX IF NOT EXISTS idx_saga_events_saga_id ON saga_events(saga_id)")
+        await conn.execute("CREATE INDEX IF NOT EXISTS idx_order_views_customer_created ON order_views(customer_id, created_at DESC, id DESC)")
+        await conn.execute("CREATE INDEX IF NOT EXISTS idx_processed_events_processed_at ON processed_events(processed_at)")
 
 
 @asynccontextmanager
@@ -119,40 +167,147 @@ async def lifespan(app: FastAPI):
         dsn=config.postgresql.connection_string,
         min_size=config.postgresql.min_size,
         max_size=config.postgresql.max_size,
+        statement_cache_size=config.postgresql.statement_cache_size,
     )
     
     # Create database tables
     await create_tables(pg_pool)
     
-    # Create Pulsar client
-    pulsar_client = pulsar.Client(config.pulsar.service_url)
-    
     # Create repositories and services
-    order_repository = PostgresOrderRepository(pg_pool)
-    saga_log = PostgresSagaLog(pg_pool)
-    message_publisher = PulsarMessagePublisher(pulsar_client)
-    message_consumer = PulsarMessageConsumer(pulsar_client, config.service_name)
+    statements = StatementRegistry()
+    unit_of_work = PostgresUnitOfWork(pg_pool, wait_window_seconds=config.postgresql.wait_window_seconds)
+    order_repository = PostgresOrderRepository(pg_pool, statements, unit_of_work)
+    saga_log = PostgresSagaLog(pg_pool, statements, unit_of_work)
+    read_model = PostgresOrderReadModel(pg_pool, statements, unit_of_work)
+    processed_events = PostgresProcessedEventStore(
+        pg_pool,
+        statements,
+        unit_of_work,
+        memory_size=config.dedupe.memory_size,
+        retention_seconds=config.dedupe.retention_seconds,
+        prune_interval_seconds=config.dedupe.prune_interval_seconds,
+    )
+    event_codec = EventCodec(config.pulsar.event_encoding)
+    metrics = {}
+    pulsar_client = None
+    dead_letters = None
+    
+    if config.message_bus == "memory":
+        # Deliver the events within this process, without a broker
+        message_bus = InMemoryMessageBus()
+        bus_publisher = InMemoryMessagePublisher(message_bus, codec=event_codec)
+        message_consumer = InMemoryMessageConsumer(
+            message_bus,
+            config.service_name,
+            max_concurrent_handlers=config.pulsar.max_concurrent_handlers,
+            codec=event_codec,
+            # Zero attempts keeps redelivering failed messages
+            max_attempts=config.pulsar.max_delivery_attempts or None,
+        )
+        metrics["message_bus"] = message_bus.stats
+    else:
+        # Create Pulsar client
+        pulsar_client = pulsar.Client(config.pulsar.service_url)
+        
+        # Compress the events of large orders
+        compressor = None
+        if config.pulsar.compression != "none":
+            compressor = PayloadCompressor(config.pulsar.compression, config.pulsar.compression_threshold_bytes)
+            metrics["compression"] = compressor.stats
+        
+        bus_publisher = PulsarMessagePublisher(
+            pulsar_client,
+            batching_max_messages=config.pulsar.batching_max_messages,
+            batching_max_publish_delay_ms=config.pulsar.batching_max_publish_delay_ms,
+            codec=event_codec,
+            connect_max_attempts=config.pulsar.connect_max_attempts,
+            reconnect_max_delay_seconds=config.pulsar.reconnect_max_delay_seconds,
+            # Create the partitioned topics before their producers
+            topic_admin=PulsarTopicAdmin(config.pulsar.admin_url),
+            topic_partitions=config.pulsar.topic_partitions,
+            compressor=compressor,
+            # Mark cancellations and failed replies for the consumers to handle first
+            prioritize_compensations=config.pulsar.priority_lanes,
+        )
+        message_consumer = PulsarMessageConsumer(
+            pulsar_client,
+            config.service_name,
+            max_concurrent_handlers=config.pulsar.max_concurrent_handlers,
+            batch_max_messages=config.pulsar.batch_receive_max_messages,
+            batch_timeout_millis=config.pulsar.batch_receive_timeout_ms,
+            codec=event_codec,
+            reconnect_max_delay_seconds=config.pulsar.reconnect_max_delay_seconds,
+            retry_publisher=bus_publisher,
+            retry_delays_seconds=config.pulsar.retry_delays_seconds,
+            # Zero attempts keeps redelivering failed messages
+            max_attempts=config.pulsar.max_delivery_attempts or None,
+            max_in_flight=config.pulsar.max_in_flight_per_subscription,
+            receiver_queue_size=config.pulsar.receiver_queue_size,
+            # Leave the connections to the API requests when they queue up
+            pool_wait=unit_of_work.acquire_wait_seconds,
+            pause_pool_wait_seconds=config.pulsar.pause_pool_wait_ms / 1000,
+            # Key_Shared lets every replica consume, each order on one of them
+            subscription_type=config.pulsar.subscription_type,
+            subscription_types=config.pulsar.subscription_types,
+            # Failed payments and allocations jump the backlog of their topic
+            priority_lanes=config.pulsar.priority_lanes,
+            priority_weight=config.pulsar.priority_weight,
+        )
+        dead_letters = PulsarDeadLetterQueue(pulsar_client, config.service_name, bus_publisher, codec=event_codec)
+    
+    # Commands write their events to the outbox, and the relay sends them
+    message_publisher = PostgresOutboxPublisher(pg_pool, statements, unit_of_work)
+    outbox_relay = OutboxRelay(
+        pg_pool,
+        bus_publisher,
+        statements,
+        batch_size=config.outbox.batch_size,
+        poll_interval_seconds=config.outbox.poll_interval_seconds,
+        # Let go of the claimed rows while the broker is down, and back off
+        publish_timeout_seconds=config.outbox.publish_timeout_seconds,
+        max_backoff_seconds=config.outbox.max_backoff_seconds,
+        # Each measure of the depth and lag scans the whole outbox
+        measure_interval_seconds=config.outbox.measure_interval_seconds,
+    )
+    order_cache = InMemoryOrderCache(
+        max_size=config.cache.max_size,
+        ttl_seconds=config.cache.ttl_seconds,
+    )
+    
+    # Project the orders written before the read model existed
+    backfilled = await read_model.backfill()
+    if backfilled:
+        logger.info(f"Projected {backfilled} existing orders to the read model")
     
     # Create command and query handlers
     create_order_handler = CreateOrderHandler(
         order_repository=order_repository,
         message_publisher=message_publisher,
         saga_log=saga_log,
+        order_cache=order_cache,
+        read_model=read_model,
+        unit_of_work=unit_of_work,
     )
     
     cancel_order_handler = CancelOrderHandler(
         order_repository=order_repository,
         message_publisher=message_publisher,
         saga_log=saga_log,
+        order_cache=order_cache,
+        read_model=read_model,
+        unit_of_work=unit_of_work,
     )
     
     get_order_handler = GetOrderHandler(
         order_repository=order_repository,
         saga_log=saga_log,
+        order_cache=order_cache,
+        read_model=read_model,
     )
     
     get_customer_orders_handler = GetCustomerOrdersHandler(
         order_repository=order_repository,
+        read_model=read_model,
     )
     
     # Create event handlers
@@ -160,12 +315,48 @@ async def lifespan(app: FastAPI):
         order_repository=order_repository,
         message_publisher=message_publisher,
         saga_log=saga_log,
+        order_cache=order_cache,
+        read_model=read_model,
+        unit_of_work=unit_of_work,
+        processed_events=processed_events,
     )
     
-    # Subscribe to required topics
-    await message_consumer.subscribe("payments", event_handlers.handle_payment_processed)
-    await message_consumer.subscribe("inventory", event_handlers.handle_inventory_allocated)
-    await message_consumer.subscribe("shipping", event_handlers.handle_order_shipped)
+    async def connect_message_bus():
+        # Create the producers of the registered topics before relaying
+        await bus_publisher.warm_up(config.pulsar.producer_topics)
+        
+        # Start relaying the events committed to the outbox
+        outbox_relay.start()
+        
+        # Keep the messages that fail every attempt from the start
+        if dead_letters:
+            await dead_letters.subscribe(["payments", "inventory", "shipping"])
+        
+        # Subscribe to required topics, handling the busy ones in batches. The
+        # requests this service publishes to them are skipped undecoded.
+        await message_consumer.subscribe_batch(
+            "payments",
+            event_handlers.handle_payment_processed_batch,
+            event_types=["payment_processed"],
+        )
+        await message_consumer.subscribe_batch(
+            "inventory",
+            event_handlers.handle_inventory_allocated_batch,
+            event_types=["inventory_allocated"],
+        )
+        await message_consumer.subscribe("shipping", event_handlers.handle_order_shipped, event_types=["order_shipped"])
+        
+        logger.info(f"Connected to the {config.message_bus} message bus")
+    
+    # Connect to the message bus in the background, so health checks are
+    # answered while the service is not ready yet
+    bus_connection = asyncio.create_task(connect_message_bus())
+    
+    # Delete the claims of events processed longer ago than redeliveries come
+    processed_events.start()
+    
+    def bus_connected() -> bool:
+        return bus_connection.done() and not bus_connection.cancelled() and bus_connection.exception() is None
     
     # Store handlers in app state
     app.state.handlers = Handlers(
@@ -173,6 +364,20 @@ async def lifespan(app: FastAPI):
         cancel_order_handler=cancel_order_handler,
         get_order_handler=get_order_handler,
         get_customer_orders_handler=get_customer_orders_handler,
+        metrics={
+            **metrics,
+            "statements": statements.stats,
+            "order_cache": order_cache.stats,
+            "unit_of_work": unit_of_work.stats,
+            "pool": unit_of_work.pool_stats,
+            "outbox": outbox_relay.stats,
+            "consumer": message_consumer.stats,
+            "processed_events": processed_events.stats,
+        },
+        readiness={
+            "message_bus": bus_connected,
+        },
+        dead_letters=dead_letters,
     )
     app.state.pg_pool = pg_pool
     app.state.pulsar_client = pulsar_client
@@ -185,8 +390,17 @@ async def lifespan(app: FastAPI):
     # Cleanup resources
     logger.info(f"Shutting down {config.service_name} service")
     
+    bus_connection.cancel()
+    await asyncio.gather(bus_connection, return_exceptions=True)
+    
+    await outbox_relay.stop()
+    await processed_events.stop()
+    if dead_letters:
+        await dead_letters.close()
+    await bus_publisher.close()
     await message_consumer.close()
-    pulsar_client.close()
+    if pulsar_client:
+        pulsar_client.close()
     await pg_pool.close()
     
     logger.info(f"{config.service_name} service stopped")
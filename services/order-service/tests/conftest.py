@@ -4,11 +4,15 @@ import pytest
 import pytest_asyncio
 from unittest.mock import MagicMock, AsyncMock
 import json
+from contextlib import asynccontextmanager
 from datetime import datetime
 
 from domain.models import Order, OrderItem, OrderStatus
 from application.ports.repositories import OrderRepository
 from application.ports.message_bus import MessagePublisher, SagaLog
+from application.ports.read_model import OrderReadModel
+from application.ports.unit_of_work import UnitOfWork
+from application.ports.processed_events import ProcessedEventStore
 
 
 # Mock classes
@@ -22,8 +26,15 @@ class MockOrderRepository(OrderRepository):
     async def get_by_id(self, order_id: str) -> Order:
         return self.orders.get(order_id)
     
-    async def get_by_customer_id(self, customer_id: str) -> list:
-        return [order for order in self.orders.values() if order.customer_id == customer_id]
+    async def get_by_customer_id(self, customer_id: str, limit=None, after=None) -> list:
+        orders = sorted(
+            (order for order in self.orders.values() if order.customer_id == customer_id),
+            key=lambda order: (order.created_at, order.id),
+            reverse=True,
+        )
+        if after:
+            orders = [order for order in orders if (order.created_at, order.id) < after]
+        return orders[:limit] if limit is not None else orders
     
     async def update(self, order: Order) -> None:
         self.orders[order.id] = order
@@ -80,6 +91,65 @@ class MockSagaLog(SagaLog):
         ]
 
 
+class MockOrderReadModel(OrderReadModel):
+    def __init__(self):
+        self.views = {}
+    
+    async def project(self, order: Order) -> None:
+        self.views[order.id] = order.to_dict()
+    
+    async def get(self, order_id: str) -> dict:
+        return self.views.get(order_id)
+    
+    async def get_by_customer_id(self, customer_id: str, limit=None, after=None) -> list:
+        views = sorted(
+            (view for view in self.views.values() if view["customer_id"] == customer_id),
+            key=lambda view: (view["created_at"], view["id"]),
+            reverse=True,
+        )
+        if after:
+            views = [view for view in views if (datetime.fromisoformat(view["created_at"]), view["id"]) < after]
+        return views[:limit] if limit is not None else views
+
+
+class MockUnitOfWork(UnitOfWork):
+    def __init__(self):
+        self.active = False
+        self.commits = 0
+        self.rollbacks = 0
+    
+    @asynccontextmanager
+    async def transaction(self):
+        if self.active:
+            yield
+            return
+        
+        self.active = True
+        try:
+            yield
+        except BaseException:
+            self.rollbacks += 1
+            raise
+        else:
+            self.commits += 1
+        finally:
+            self.active = False
+
+
+class MockProcessedEventStore(ProcessedEventStore):
+    def __init__(self):
+        self.processed = set()
+        self.committed = []
+    
+    async def claim(self, event_ids: list) -> set:
+        claimed = set(event_ids) - self.processed
+        self.processed.update(claimed)
+        return claimed
+    
+    def mark_committed(self, event_ids: list) -> None:
+        self.committed.extend(event_ids)
+
+
 # Fixtures
 @pytest.fixture
 def order_repository():
@@ -118,3 +188,18 @@ def sample_order():
     )
     
     return order
+
+
+@pytest.fixture
+def read_model():
+    return MockOrderReadModel()
+
+
+@pytest.fixture
+def unit_of_work():
+    return MockUnitOfWork()
+
+
+@pytest.fixture
+def processed_events():
+    return MockProcessedEventStore()
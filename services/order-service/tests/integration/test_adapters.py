@@ -4,13 +4,19 @@ import pytest_asyncio
 import asyncio
 import asyncpg
 import os
+import time
 import json
 from datetime import datetime
 
 from domain.models import Order, OrderStatus
-from domain.events import OrderCreated
+from domain.events import OrderCreated, OrderCancelled
 from adapters.outbound.postgres_repository import PostgresOrderRepository
 from adapters.outbound.postgres_saga_log import PostgresSagaLog
+from adapters.outbound.postgres_statements import StatementRegistry
+from adapters.outbound.postgres_read_model import PostgresOrderReadModel
+from adapters.outbound.postgres_unit_of_work import PostgresUnitOfWork
+from adapters.outbound.postgres_outbox import PostgresOutboxPublisher, OutboxRelay
+from adapters.outbound.postgres_processed_events import PostgresProcessedEventStore
 
 
 # PostgreSQL connection details for tests
@@ -83,6 +89,40 @@ async def pg_pool():
                 timestamp TIMESTAMP NOT NULL
             )
         """)
+        
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS order_views (
+                id TEXT PRIMARY KEY,
+                customer_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_at TIMESTAMP NOT NULL,
+                modified_at TIMESTAMP NOT NULL,
+                saga_id TEXT,
+                metadata JSONB NOT NULL DEFAULT '{}',
+                total_amount FLOAT NOT NULL,
+                items JSONB NOT NULL DEFAULT '[]'
+            )
+        """)
+        
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id BIGSERIAL PRIMARY KEY,
+                topic TEXT NOT NULL,
+                partition_key TEXT,
+                event_id TEXT NOT NULL,
+                event_type TEXT NOT NULL,
+                event_data JSONB NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+        
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS processed_events (
+                event_id TEXT PRIMARY KEY,
+                processed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+        await conn.execute("CREATE INDEX IF NOT EXISTS idx_processed_events_processed_at ON processed_events(processed_at)")
     
     yield pool
     
@@ -196,4 +236,548 @@ async def test_postgres_saga_log(saga_log_repo, sample_order):
     # Check saga status
     saga_updated = await saga_log_repo.get_saga_events(sample_order.saga_id)
     assert saga_updated["status"] == "COMPLETED"
-    assert saga_updated["ended_at"] is not None
\ No newline at end of file
+    assert saga_updated["ended_at"] is not None
+
+@pytest.mark.asyncio
+async def test_postgres_order_repository_bulk_items(order_repo):
+    # Create an order with many items
+    order = Order(
+        id="bulk-order-id",
+        customer_id="test-customer-id",
+        status=OrderStatus.CREATED,
+    )
+    
+    for i in range(200):
+        order.add_item(
+            product_id=f"product-{i}",
+            quantity=i + 1,
+            unit_price=1.5
+        )
+    
+    # Test saving all items at once
+    await order_repo.save(order)
+    
+    retrieved_order = await order_repo.get_by_id(order.id)
+    assert len(retrieved_order.items) == 200
+    assert retrieved_order.total_amount == order.total_amount
+    assert {item.product_id for item in retrieved_order.items} == {item.product_id for item in order.items}
+    
+    # Test replacing the items on update
+    retrieved_order.items = retrieved_order.items[:10]
+    await order_repo.update(retrieved_order)
+    
+    updated_order = await order_repo.get_by_id(order.id)
+    assert len(updated_order.items) == 10
+    
+    # Test updating an order with no items
+    updated_order.items = []
+    await order_repo.update(updated_order)
+    
+    empty_order = await order_repo.get_by_id(order.id)
+    assert len(empty_order.items) == 0
+    assert empty_order.total_amount == 0
+
+
+@pytest.mark.asyncio
+async def test_postgres_order_repository_customer_pages(order_repo, sample_order):
+    # Save five orders for the same customer
+    for i in range(5):
+        order = Order.from_dict(sample_order.to_dict())
+        order.id = f"order-{i}"
+        order.created_at = datetime(2023, 1, 1, 12, i)
+        await order_repo.save(order)
+    
+    # Test retrieving the first page
+    first_page = await order_repo.get_by_customer_id(sample_order.customer_id, limit=2)
+    assert [order.id for order in first_page] == ["order-4", "order-3"]
+    assert all(len(order.items) == 2 for order in first_page)
+    
+    # Test retrieving the next page from the last order of the first one
+    last = first_page[-1]
+    next_page = await order_repo.get_by_customer_id(
+        sample_order.customer_id,
+        limit=10,
+        after=(last.created_at, last.id),
+    )
+    assert [order.id for order in next_page] == ["order-2", "order-1", "order-0"]
+    assert all(order.total_amount == 40.0 for order in next_page)
+    
+    # Test retrieving past the last page
+    empty_page = await order_repo.get_by_customer_id(
+        sample_order.customer_id,
+        after=(next_page[-1].created_at, next_page[-1].id),
+    )
+    assert empty_page == []
+
+
+@pytest.mark.asyncio
+async def test_postgres_order_repository_update_changed_fields(pg_pool, order_repo, sample_order):
+    await order_repo.save(sample_order)
+    
+    async def item_row_ids():
+        async with pg_pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT id FROM order_items WHERE order_id = $1 ORDER BY id",
+                sample_order.id,
+            )
+        return [row["id"] for row in rows]
+    
+    original_item_ids = await item_row_ids()
+    
+    # Test a status and metadata update leaves the items untouched
+    order = await order_repo.get_by_id(sample_order.id)
+    order.update_status(OrderStatus.PAYMENT_CONFIRMED)
+    order.metadata["payment_id"] = "payment-123"
+    await order_repo.update(order)
+    
+    assert order.changed_fields() == set()
+    assert await item_row_ids() == original_item_ids
+    
+    updated_order = await order_repo.get_by_id(sample_order.id)
+    assert updated_order.status == OrderStatus.PAYMENT_CONFIRMED
+    assert updated_order.metadata == {"payment_id": "payment-123"}
+    assert updated_order.total_amount == 40.0
+    
+    # Test an item change rewrites the items and the total
+    updated_order.add_item(
+        product_id="product-3",
+        quantity=1,
+        unit_price=5.0
+    )
+    await order_repo.update(updated_order)
+    
+    assert await item_row_ids() != original_item_ids
+    
+    reloaded_order = await order_repo.get_by_id(sample_order.id)
+    assert len(reloaded_order.items) == 3
+    assert reloaded_order.total_amount == 45.0
+
+
+@pytest.mark.asyncio
+async def test_statement_registry(pg_pool, sample_order):
+    statements = StatementRegistry()
+    order_repo = PostgresOrderRepository(pg_pool, statements)
+    saga_log_repo = PostgresSagaLog(pg_pool, statements)
+    
+    # Both adapters register their statements in the shared registry
+    assert "orders.get_by_id" in statements.statements
+    assert "saga_log.start" in statements.statements
+    
+    await order_repo.save(sample_order)
+    
+    # Test statements are prepared once per connection and reused afterwards
+    async with pg_pool.acquire() as conn:
+        for _ in range(3):
+            order_row = await statements.fetchrow(conn, "orders.get_by_id", sample_order.id)
+            assert order_row["id"] == sample_order.id
+        
+        prepared = await conn.fetchval(
+            "SELECT count(*) FROM pg_prepared_statements WHERE statement = $1",
+            statements.statements["orders.get_by_id"],
+        )
+        assert prepared == 1
+    
+    assert statements.stats()["statements"] == len(statements.statements)
+    
+    # Test registering a different query under an existing name fails
+    with pytest.raises(ValueError):
+        statements.register({"orders.get_by_id": "SELECT 1"})
+
+
+@pytest.mark.asyncio
+async def test_postgres_order_read_model(pg_pool, order_repo, sample_order):
+    read_model = PostgresOrderReadModel(pg_pool)
+    
+    # Test projecting an order
+    await read_model.project(sample_order)
+    
+    order_view = await read_model.get(sample_order.id)
+    assert order_view == sample_order.to_dict()
+    
+    # Test an older projection does not overwrite a newer one
+    newer_order = Order.from_dict(sample_order.to_dict())
+    newer_order.update_status(OrderStatus.PAYMENT_CONFIRMED)
+    await read_model.project(newer_order)
+    await read_model.project(sample_order)
+    
+    order_view = await read_model.get(sample_order.id)
+    assert order_view["status"] == "PAYMENT_CONFIRMED"
+    
+    # Test paging through a customer's orders
+    for i in range(3):
+        order = Order.from_dict(sample_order.to_dict())
+        order.id = f"order-{i}"
+        order.created_at = datetime(2023, 1, 1, 12, i)
+        await read_model.project(order)
+    
+    first_page = await read_model.get_by_customer_id(sample_order.customer_id, limit=2)
+    assert [view["id"] for view in first_page] == [sample_order.id, "order-2"]
+    
+    last = first_page[-1]
+    next_page = await read_model.get_by_customer_id(
+        sample_order.customer_id,
+        limit=2,
+        after=(datetime.fromisoformat(last["created_at"]), last["id"]),
+    )
+    assert [view["id"] for view in next_page] == ["order-1", "order-0"]
+    assert next_page[0]["items"] == sample_order.to_dict()["items"]
+    
+    # Test backfilling orders saved before the read model existed
+    unprojected_order = Order.from_dict(sample_order.to_dict())
+    unprojected_order.id = "unprojected-order"
+    await order_repo.save(unprojected_order)
+    
+    assert await read_model.backfill() == 1
+    assert await read_model.get(unprojected_order.id) == unprojected_order.to_dict()
+    assert await read_model.backfill() == 0
+
+
+@pytest.mark.asyncio
+async def test_postgres_batch_writes(pg_pool, order_repo, saga_log_repo, sample_order):
+    read_model = PostgresOrderReadModel(pg_pool)
+    
+    orders = []
+    for i in range(3):
+        order = Order(
+            id=f"batch-order-{i}",
+            customer_id="batch-customer",
+            saga_id=f"batch-saga-{i}",
+            metadata={"position": i},
+        )
+        for j in range(i + 1):
+            order.add_item(
+                product_id=f"product-{j}",
+                quantity=1,
+                unit_price=10.0
+            )
+        orders.append(order)
+    
+    # Test saving the orders and their items at once
+    await order_repo.save_many(orders)
+    
+    for order in orders:
+        saved_order = await order_repo.get_by_id(order.id)
+        assert saved_order.to_dict() == order.to_dict()
+    
+    # Test starting sagas and logging events at once
+    await saga_log_repo.start_sagas([(order.saga_id, order.id) for order in orders])
+    await saga_log_repo.log_events([
+        (
+            order.saga_id,
+            OrderCreated(
+                order_id=order.id,
+                customer_id=order.customer_id,
+                total_amount=order.total_amount,
+                saga_id=order.saga_id
+            )
+        )
+        for order in orders
+    ])
+    
+    for order in orders:
+        saga_history = await saga_log_repo.get_saga_events(order.saga_id)
+        assert saga_history["order_id"] == order.id
+        assert saga_history["status"] == "STARTED"
+        assert [event["event_type"] for event in saga_history["events"]] == ["order_created"]
+    
+    # Test projecting the orders at once
+    await read_model.project_many(orders)
+    
+    views = await read_model.get_by_customer_id("batch-customer")
+    assert sorted(view["id"] for view in views) == [order.id for order in orders]
+    
+    # Test loading and updating the orders at once
+    loaded_orders = await order_repo.get_by_ids([order.id for order in orders] + ["missing-order"])
+    assert sorted(order.id for order in loaded_orders) == [order.id for order in orders]
+    
+    for order in loaded_orders:
+        order.update_status(OrderStatus.PAYMENT_CONFIRMED)
+    loaded_orders[0].add_item(product_id="product-extra", quantity=1, unit_price=5.0)
+    
+    await order_repo.update_many(loaded_orders)
+    
+    for order in loaded_orders:
+        updated_order = await order_repo.get_by_id(order.id)
+        assert updated_order.to_dict() == order.to_dict()
+        assert not order.changed_fields()
+    
+    # Test ending sagas at once
+    await saga_log_repo.end_sagas([(orders[0].saga_id, True), (orders[1].saga_id, False)])
+    
+    statuses = [(await saga_log_repo.get_saga_events(order.saga_id))["status"] for order in orders]
+    assert statuses == ["COMPLETED", "FAILED", "STARTED"]
+
+
+@pytest.mark.asyncio
+async def test_postgres_unit_of_work(pg_pool, sample_order):
+    unit_of_work = PostgresUnitOfWork(pg_pool)
+    order_repo = PostgresOrderRepository(pg_pool, unit_of_work=unit_of_work)
+    saga_log_repo = PostgresSagaLog(pg_pool, unit_of_work=unit_of_work)
+    
+    # Test the adapters share the connection of the open transaction
+    async with unit_of_work.transaction() as conn:
+        async with unit_of_work.connection() as inner_conn:
+            assert inner_conn is conn
+        
+        # Nested blocks join the open transaction
+        async with unit_of_work.transaction() as nested_conn:
+            assert nested_conn is conn
+        
+        await order_repo.save(sample_order)
+        await saga_log_repo.start_saga(sample_order.saga_id, sample_order.id)
+    
+    assert unit_of_work.stats() == {"commits": 1, "rollbacks": 0}
+    assert await order_repo.get_by_id(sample_order.id) is not None
+    assert (await saga_log_repo.get_saga_events(sample_order.saga_id))["status"] == "STARTED"
+    
+    # Test a failed command rolls back every write made in it
+    sample_order.update_status(OrderStatus.CANCELLED)
+    
+    with pytest.raises(RuntimeError):
+        async with unit_of_work.transaction():
+            await order_repo.update(sample_order)
+            await saga_log_repo.end_saga(sample_order.saga_id, False)
+            raise RuntimeError("command failed")
+    
+    assert unit_of_work.stats() == {"commits": 1, "rollbacks": 1}
+    assert (await order_repo.get_by_id(sample_order.id)).status == OrderStatus.CREATED
+    assert (await saga_log_repo.get_saga_events(sample_order.saga_id))["status"] == "STARTED"
+
+
+@pytest.mark.asyncio
+async def test_postgres_unit_of_work_acquire_wait(pg_pool):
+    unit_of_work = PostgresUnitOfWork(pg_pool, wait_window_seconds=0.2)
+    
+    assert unit_of_work.acquire_wait_seconds() == 0.0
+    
+    # Hold every connection so the next transaction has to wait
+    held = [await pg_pool.acquire() for _ in range(pg_pool.get_max_size())]
+    
+    async def release_later():
+        await asyncio.sleep(0.1)
+        for conn in held:
+            await pg_pool.release(conn)
+    
+    releasing = asyncio.create_task(release_later())
+    
+    async with unit_of_work.transaction() as conn:
+        await conn.execute("SELECT 1")
+    
+    await releasing
+    
+    assert unit_of_work.acquire_wait_seconds() >= 0.05
+    assert unit_of_work.pool_stats()["waiting"] == 0
+    
+    # Waits older than the window are forgotten
+    await asyncio.sleep(0.25)
+    
+    assert unit_of_work.acquire_wait_seconds() == 0.0
+
+
+@pytest.mark.asyncio
+async def test_postgres_outbox(pg_pool, sample_order):
+    unit_of_work = PostgresUnitOfWork(pg_pool)
+    order_repo = PostgresOrderRepository(pg_pool, unit_of_work=unit_of_work)
+    outbox_publisher = PostgresOutboxPublisher(pg_pool, unit_of_work=unit_of_work)
+    
+    class RecordingPublisher:
+        def __init__(self):
+            self.published = []
+        
+        async def publish_many_with_keys(self, messages):
+            self.published.extend(messages)
+    
+    broker = RecordingPublisher()
+    relay = OutboxRelay(pg_pool, broker, batch_size=2)
+    
+    order_created = OrderCreated(
+        order_id=sample_order.id,
+        customer_id=sample_order.customer_id,
+        total_amount=sample_order.total_amount,
+        items={"product-1": {"quantity": 2, "unit_price": 10.0}},
+        saga_id=sample_order.saga_id
+    )
+    order_cancelled = OrderCancelled(
+        order_id=sample_order.id,
+        reason="Customer requested cancellation",
+        saga_id=sample_order.saga_id
+    )
+    
+    # Test events are only stored when the order is committed
+    with pytest.raises(RuntimeError):
+        async with unit_of_work.transaction():
+            await order_repo.save(sample_order)
+            await outbox_publisher.publish(order_created, "orders")
+            raise RuntimeError("command failed")
+    
+    await relay.measure()
+    assert relay.depth == 0
+    
+    async with unit_of_work.transaction():
+        await order_repo.save(sample_order)
+        await outbox_publisher.publish(order_created, "orders")
+        await outbox_publisher.publish_with_key(order_cancelled, "orders", sample_order.id)
+        await outbox_publisher.publish_many([(order_created, "payments")])
+    
+    await relay.measure()
+    assert relay.depth == 3
+    assert relay.lag_seconds >= 0
+    
+    # Test rows claimed by another relay are skipped
+    async with pg_pool.acquire() as conn:
+        async with conn.transaction():
+            await conn.fetch("SELECT id FROM outbox ORDER BY id LIMIT 1 FOR UPDATE")
+            
+            assert await relay.relay_once() == 2
+            assert [(event.event_type, topic, key) for event, topic, key in broker.published] == [
+                ("order_cancelled", "orders", sample_order.id),
+                ("order_created", "payments", None),
+            ]
+    
+    # Test the remaining event is relayed once the lock is released
+    assert await relay.relay_once() == 1
+    assert await relay.relay_once() == 0
+    
+    relayed_event, topic, _ = broker.published[-1]
+    assert topic == "orders"
+    assert relayed_event.to_dict() == order_created.to_dict()
+    
+    await relay.measure()
+    assert relay.stats() == {
+        "depth": 0,
+        "lag_seconds": 0.0,
+        "published": 3,
+        "batches": 2,
+        "failures": 0,
+        "consecutive_failures": 0,
+        "backoff_seconds": 0.0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_postgres_outbox_relay_while_broker_is_down(pg_pool, sample_order):
+    unit_of_work = PostgresUnitOfWork(pg_pool)
+    outbox_publisher = PostgresOutboxPublisher(pg_pool, unit_of_work=unit_of_work)
+    
+    class UnavailablePublisher:
+        """Never acks the first sends, like a broker that is down"""
+        
+        def __init__(self, unavailable_sends):
+            self.unavailable_sends = unavailable_sends
+            self.published = []
+        
+        async def publish_many_with_keys(self, messages):
+            if self.unavailable_sends:
+                self.unavailable_sends -= 1
+                await asyncio.sleep(10)
+            self.published.extend(messages)
+    
+    broker = UnavailablePublisher(unavailable_sends=3)
+    relay = OutboxRelay(
+        pg_pool,
+        broker,
+        poll_interval_seconds=0.01,
+        publish_timeout_seconds=0.05,
+        max_backoff_seconds=0.04,
+        measure_interval_seconds=0.2,
+    )
+    
+    events = [
+        OrderCancelled(order_id=f"order-{i}", reason="Customer requested cancellation")
+        for i in range(3)
+    ]
+    for event in events:
+        async with unit_of_work.transaction():
+            await outbox_publisher.publish_with_key(event, "orders", event.order_id)
+    
+    measures = []
+    measure = relay.measure
+    
+    async def timed_measure():
+        measures.append(time.monotonic())
+        await measure()
+    
+    relay.measure = timed_measure
+    relay.start()
+    
+    # The backlog is measured and the retries back off while sends time out
+    while relay.backoff_seconds < 0.04:
+        await asyncio.sleep(0.01)
+    
+    assert relay.depth == 3
+    assert relay.consecutive_failures >= 2
+    
+    # The backlog drains in order once the broker is back
+    while relay.depth:
+        await asyncio.sleep(0.01)
+    
+    await relay.stop()
+    
+    # Each measure scans the outbox, so they are spaced out however fast it drains
+    assert len(measures) >= 2
+    assert all(later - earlier >= 0.2 for earlier, later in zip(measures, measures[1:]))
+    
+    assert [event.order_id for event, _, _ in broker.published] == ["order-0", "order-1", "order-2"]
+    assert relay.stats()["failures"] == 3
+    assert relay.stats()["consecutive_failures"] == 0
+
+
+@pytest.mark.asyncio
+async def test_postgres_processed_event_store(pg_pool):
+    unit_of_work = PostgresUnitOfWork(pg_pool)
+    store = PostgresProcessedEventStore(pg_pool, unit_of_work=unit_of_work, memory_size=2)
+    
+    # New events are claimed once, also when repeated in one call
+    async with unit_of_work.transaction():
+        assert await store.claim(["event-1", "event-2", "event-1"]) == {"event-1", "event-2"}
+    store.mark_committed(["event-1", "event-2"])
+    
+    # Known events are skipped from memory, without a round trip
+    assert await store.claim(["event-1", "event-2"]) == set()
+    assert store.stats()["memory_duplicates"] == 2
+    
+    # A rolled back claim is undone
+    with pytest.raises(RuntimeError):
+        async with unit_of_work.transaction():
+            assert await store.claim(["event-3"]) == {"event-3"}
+            raise RuntimeError("handler failed")
+    
+    async with unit_of_work.transaction():
+        assert await store.claim(["event-3"]) == {"event-3"}
+    store.mark_committed(["event-3"])
+    
+    # Events evicted from memory are still rejected by the table
+    assert "event-1" not in store.recent
+    assert await store.claim(["event-1", "event-4"]) == {"event-4"}
+    assert store.stats()["database_duplicates"] == 1
+
+
+
+@pytest.mark.asyncio
+async def test_postgres_processed_event_store_prunes_old_claims(pg_pool):
+    store = PostgresProcessedEventStore(
+        pg_pool,
+        retention_seconds=3600,
+        prune_interval_seconds=0.01,
+        prune_batch_size=2,
+    )
+    
+    async with pg_pool.acquire() as conn:
+        await conn.execute(
+            "INSERT INTO processed_events (event_id, processed_at) "
+            "SELECT 'old-' || n, now() - interval '2 hours' FROM generate_series(1, 5) AS n"
+        )
+    assert await store.claim(["recent-1"]) == {"recent-1"}
+    
+    # Old claims are deleted in batches, recent ones are kept
+    store.start()
+    while store.stats()["pruned"] < 5:
+        await asyncio.sleep(0.01)
+    await store.stop()
+    
+    async with pg_pool.acquire() as conn:
+        remaining = await conn.fetch("SELECT event_id FROM processed_events")
+    
+    assert [row["event_id"] for row in remaining] == ["recent-1"]
+    assert store.stats()["pruned"] == 5
+    assert await store.prune() == 0
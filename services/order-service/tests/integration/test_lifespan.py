@@ -0,0 +1,175 @@
+# services/order-service/tests/integration/test_lifespan.py
+import asyncio
+import os
+import queue
+import time
+
+import asyncpg
+import pulsar
+import pytest
+from fastapi import FastAPI
+
+from main import lifespan
+from domain.events import PaymentProcessed
+from application.commands.create_order import CreateOrderCommand, CreateOrderItemDTO
+from application.queries.get_order import GetOrderQuery
+from adapters.outbound.pulsar_event_publisher import PulsarMessagePublisher
+
+
+# PostgreSQL connection details for tests
+PG_HOST = os.getenv("POSTGRES_HOST", "localhost")
+PG_PORT = os.getenv("POSTGRES_PORT", "5432")
+PG_USER = os.getenv("POSTGRES_USER", "postgres")
+PG_PASSWORD = os.getenv("POSTGRES_PASSWORD", "postgres")
+PG_DB = "orders_lifespan_test"
+
+
+class BrokerMessage:
+    def __init__(self, topic, content, properties, partition_key):
+        self.topic = topic
+        self.content = content
+        self.props = dict(properties or {})
+        self.key = partition_key or ""
+        self.published_at = int(time.time() * 1000)
+    
+    def value(self) -> bytes:
+        return self.content
+    
+    def partition_key(self) -> str:
+        return self.key
+    
+    def properties(self):
+        return self.props
+    
+    def message_id(self):
+        return f"{self.topic}:{id(self)}"
+    
+    def publish_timestamp(self):
+        return self.published_at
+    
+    def topic_name(self) -> str:
+        return self.topic
+
+
+class BrokerConsumer:
+    """Blocks in receive like the Pulsar client does"""
+    
+    def __init__(self):
+        self.messages = queue.Queue()
+    
+    def receive(self, timeout_millis=None):
+        try:
+            return self.messages.get(timeout=timeout_millis / 1000)
+        except queue.Empty:
+            raise pulsar.Timeout("Pulsar error: TimeOut")
+    
+    def batch_receive(self):
+        msgs = []
+        try:
+            msgs.append(self.messages.get(timeout=0.02))
+            while True:
+                msgs.append(self.messages.get_nowait())
+        except queue.Empty:
+            return msgs
+    
+    def acknowledge(self, msg):
+        pass
+    
+    def acknowledge_cumulative(self, msg):
+        pass
+    
+    def negative_acknowledge(self, msg):
+        self.messages.put(msg)
+    
+    def redeliver_unacknowledged_messages(self):
+        pass
+    
+    def close(self):
+        pass
+
+
+class BrokerProducer:
+    def __init__(self, broker, topic):
+        self.broker = broker
+        self.topic = topic
+    
+    def send_async(self, content, callback, properties=None, partition_key=None, deliver_after=None):
+        for consumer in self.broker.consumers.get(self.topic, []):
+            consumer.messages.put(BrokerMessage(self.topic, content, properties, partition_key))
+        callback(pulsar.Result.Ok, None)
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        pass
+
+
+class FakeBroker:
+    """Client delivering every sent message to the subscribers of its topic"""
+    
+    def __init__(self):
+        self.consumers = {}
+    
+    def subscribe(self, topic, subscription_name, batch_receive_policy=None, **options):
+        consumer = BrokerConsumer()
+        self.consumers.setdefault(topic, []).append(consumer)
+        return consumer
+    
+    def create_producer(self, topic, **options):
+        return BrokerProducer(self, topic)
+    
+    def close(self):
+        pass
+
+
+async def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_lifespan_handles_failed_replies_in_high_lane(monkeypatch):
+    sys_conn = await asyncpg.connect(f"postgres://{PG_USER}:{PG_PASSWORD}@{PG_HOST}:{PG_PORT}/postgres")
+    try:
+        await sys_conn.execute(f"DROP DATABASE IF EXISTS {PG_DB}")
+        await sys_conn.execute(f"CREATE DATABASE {PG_DB}")
+    finally:
+        await sys_conn.close()
+    
+    monkeypatch.setenv("POSTGRES_DB", PG_DB)
+    monkeypatch.setenv("MESSAGE_BUS", "pulsar")
+    monkeypatch.setenv("PULSAR_TOPIC_PARTITIONS", "")
+    monkeypatch.setenv("PULSAR_COMPRESSION", "none")
+    monkeypatch.setenv("PULSAR_PRIORITY_LANES", "true")
+    broker = FakeBroker()
+    monkeypatch.setattr(pulsar, "Client", lambda service_url: broker)
+    
+    app = FastAPI()
+    
+    async with lifespan(app):
+        handlers = app.state.handlers
+        await wait_for(handlers.readiness["message_bus"])
+        
+        items = [CreateOrderItemDTO(product_id="product-1", quantity=1, unit_price=10.0)]
+        paid = await handlers.create_order_handler.handle(CreateOrderCommand(customer_id="customer-1", items=items))
+        declined = await handlers.create_order_handler.handle(CreateOrderCommand(customer_id="customer-2", items=items))
+        
+        # The replies of the payment service, marked when they are published
+        replies = PulsarMessagePublisher(broker, prioritize_compensations=True)
+        await replies.publish(PaymentProcessed(order_id=paid["order_id"], success=True), "payments")
+        await replies.publish(PaymentProcessed(order_id=declined["order_id"], success=False), "payments")
+        
+        lanes = lambda: handlers.metrics["consumer"]()["lanes"]
+        await wait_for(lambda: lanes()["high"]["handled"] == 1 and lanes()["normal"]["handled"] == 1)
+        
+        # The failed reply went through the subscription of the service to the high lane
+        statuses = {
+            order_id: (await handlers.get_order_handler.handle(GetOrderQuery(order_id=order_id)))["status"]
+            for order_id in (paid["order_id"], declined["order_id"])
+        }
+        assert statuses == {paid["order_id"]: "PENDING_INVENTORY", declined["order_id"]: "FAILED"}
+        
+        await replies.close()
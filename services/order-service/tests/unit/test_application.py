@@ -4,10 +4,13 @@ import pytest_asyncio
 import uuid
 from datetime import datetime
 
-from domain.models import OrderStatus
+from domain.models import Order, OrderStatus
+from domain.events import PaymentProcessed
 from application.commands.create_order import CreateOrderCommand, CreateOrderHandler, CreateOrderItemDTO
 from application.commands.cancel_order import CancelOrderCommand, CancelOrderHandler
 from application.queries.get_order import GetOrderQuery, GetOrderHandler, GetCustomerOrdersQuery, GetCustomerOrdersHandler
+from adapters.inbound.event_handlers import EventHandlers
+from adapters.outbound.in_memory_order_cache import InMemoryOrderCache
 
 
 @pytest_asyncio.fixture
@@ -223,4 +226,448 @@ async def test_get_customer_orders_handler(get_customer_orders_handler, order_re
     assert result is not None
     assert result["customer_id"] == sample_order.customer_id
     assert result["total_orders"] == 2
-    assert len(result["orders"]) == 2
\ No newline at end of file
+    assert len(result["orders"]) == 2
+
+@pytest.mark.asyncio
+async def test_get_customer_orders_pagination(get_customer_orders_handler, order_repository, sample_order):
+    # Save five orders for the same customer
+    order_ids = []
+    for i in range(5):
+        order = sample_order.from_dict(sample_order.to_dict())
+        order.id = f"order-{i}"
+        order.created_at = datetime(2023, 1, 1, 12, i)
+        await order_repository.save(order)
+        order_ids.append(order.id)
+    
+    # Walk the history two orders at a time
+    pages = []
+    cursor = None
+    while True:
+        result = await get_customer_orders_handler.handle(
+            GetCustomerOrdersQuery(
+                customer_id=sample_order.customer_id,
+                limit=2,
+                cursor=cursor
+            )
+        )
+        pages.append([order["id"] for order in result["orders"]])
+        cursor = result["next_cursor"]
+        if cursor is None:
+            break
+    
+    # Check the pages are newest first and cover every order once
+    assert pages == [["order-4", "order-3"], ["order-2", "order-1"], ["order-0"]]
+
+
+@pytest.mark.asyncio
+async def test_get_customer_orders_invalid_cursor(get_customer_orders_handler):
+    query = GetCustomerOrdersQuery(
+        customer_id="test-customer-id",
+        cursor="not-a-cursor"
+    )
+    
+    with pytest.raises(ValueError):
+        await get_customer_orders_handler.handle(query)
+
+
+@pytest.mark.asyncio
+async def test_get_order_handler_with_cache(order_repository, message_publisher, saga_log, sample_order):
+    order_cache = InMemoryOrderCache()
+    get_order_handler = GetOrderHandler(
+        order_repository=order_repository,
+        saga_log=saga_log,
+        order_cache=order_cache
+    )
+    cancel_order_handler = CancelOrderHandler(
+        order_repository=order_repository,
+        message_publisher=message_publisher,
+        saga_log=saga_log,
+        order_cache=order_cache
+    )
+    
+    # Save the order
+    await order_repository.save(sample_order)
+    
+    # Repeated queries are served from the cache
+    query = GetOrderQuery(order_id=sample_order.id)
+    first_result = await get_order_handler.handle(query)
+    second_result = await get_order_handler.handle(query)
+    
+    assert first_result == second_result
+    assert order_cache.stats()["hits"] == 1
+    
+    # Saga history is added to a copy of the cached view
+    await get_order_handler.handle(GetOrderQuery(order_id=sample_order.id, include_saga_history=True))
+    assert "saga_history" not in order_cache.entries[sample_order.id][1]
+    
+    # Cancelling the order invalidates its cached view
+    await cancel_order_handler.handle(
+        CancelOrderCommand(
+            order_id=sample_order.id,
+            reason="Customer requested cancellation"
+        )
+    )
+    
+    result = await get_order_handler.handle(query)
+    assert result["status"] == "CANCELLED"
+
+
+@pytest.mark.asyncio
+async def test_queries_read_from_read_model(order_repository, message_publisher, saga_log, read_model):
+    create_order_handler = CreateOrderHandler(
+        order_repository=order_repository,
+        message_publisher=message_publisher,
+        saga_log=saga_log,
+        read_model=read_model
+    )
+    cancel_order_handler = CancelOrderHandler(
+        order_repository=order_repository,
+        message_publisher=message_publisher,
+        saga_log=saga_log,
+        read_model=read_model
+    )
+    get_order_handler = GetOrderHandler(
+        order_repository=order_repository,
+        saga_log=saga_log,
+        read_model=read_model
+    )
+    get_customer_orders_handler = GetCustomerOrdersHandler(
+        order_repository=order_repository,
+        read_model=read_model
+    )
+    
+    # Creating an order projects it to the read model
+    result = await create_order_handler.handle(
+        CreateOrderCommand(
+            customer_id="customer-123",
+            items=[
+                CreateOrderItemDTO(
+                    product_id="product-1",
+                    quantity=2,
+                    unit_price=10.0
+                )
+            ]
+        )
+    )
+    
+    assert read_model.views[result["order_id"]]["status"] == "PENDING_PAYMENT"
+    
+    # Cancelling the order updates its projection
+    await cancel_order_handler.handle(
+        CancelOrderCommand(
+            order_id=result["order_id"],
+            reason="Customer requested cancellation"
+        )
+    )
+    
+    # Queries are answered from the projection, not the write repository
+    order_repository.orders.clear()
+    
+    order_view = await get_order_handler.handle(GetOrderQuery(order_id=result["order_id"]))
+    assert order_view["status"] == "CANCELLED"
+    assert order_view["total_amount"] == 20.0
+    
+    customer_orders = await get_customer_orders_handler.handle(
+        GetCustomerOrdersQuery(customer_id="customer-123")
+    )
+    assert customer_orders["total_orders"] == 1
+    assert customer_orders["orders"][0]["id"] == result["order_id"]
+
+
+@pytest_asyncio.fixture
+async def batch_create_order_handler(order_repository, message_publisher, saga_log, unit_of_work):
+    return CreateOrderHandler(
+        order_repository=order_repository,
+        message_publisher=message_publisher,
+        saga_log=saga_log,
+        unit_of_work=unit_of_work
+    )
+
+
+@pytest.mark.asyncio
+async def test_create_order_handler_handle_many(batch_create_order_handler, order_repository, message_publisher, saga_log):
+    commands = [
+        CreateOrderCommand(
+            customer_id="customer-1",
+            items=[
+                CreateOrderItemDTO(
+                    product_id="product-1",
+                    quantity=2,
+                    unit_price=10.0
+                )
+            ]
+        ),
+        CreateOrderCommand(
+            customer_id="customer-2",
+            items=[
+                CreateOrderItemDTO(
+                    product_id="product-1",
+                    quantity=0,
+                    unit_price=10.0
+                )
+            ]
+        ),
+        CreateOrderCommand(
+            customer_id="customer-3",
+            items=[
+                CreateOrderItemDTO(
+                    product_id="product-2",
+                    quantity=1,
+                    unit_price=20.0
+                )
+            ]
+        ),
+    ]
+    
+    # Execute the handler
+    results = await batch_create_order_handler.handle_many(commands)
+    
+    # Check there is one result per command, in order
+    assert [result["success"] for result in results] == [True, False, True]
+    assert "must be positive" in results[1]["error"]
+    
+    # Verify the valid orders were saved with their sagas
+    for result in (results[0], results[2]):
+        order = await order_repository.get_by_id(result["order_id"])
+        assert order.status == OrderStatus.PENDING_PAYMENT
+        assert result["status"] == "PENDING_PAYMENT"
+        assert saga_log.sagas[result["saga_id"]]["order_id"] == result["order_id"]
+        assert len(saga_log.events[result["saga_id"]]) == 2
+    
+    assert len(order_repository.orders) == 2
+    
+    # Verify both events of each order were published
+    published = [(event.event_type, topic) for event, topic, _ in message_publisher.published_events]
+    assert published.count(("order_created", "orders")) == 2
+    assert published.count(("payment_requested", "payments")) == 2
+
+
+@pytest.mark.asyncio
+async def test_create_order_handler_handle_many_failure(batch_create_order_handler, saga_log, unit_of_work):
+    async def failing_start_sagas(sagas):
+        raise RuntimeError("database unavailable")
+    
+    saga_log.start_sagas = failing_start_sagas
+    
+    command = CreateOrderCommand(
+        customer_id="customer-1",
+        items=[
+            CreateOrderItemDTO(
+                product_id="product-1",
+                quantity=1,
+                unit_price=10.0
+            )
+        ]
+    )
+    
+    results = await batch_create_order_handler.handle_many([command])
+    
+    # The orders saved before the failure are rolled back with the rest
+    assert results == [{"success": False, "error": "database unavailable"}]
+    assert unit_of_work.rollbacks == 1
+    assert unit_of_work.commits == 0
+
+
+@pytest.mark.asyncio
+async def test_create_order_handler_handle_many_needs_unit_of_work(create_order_handler, order_repository):
+    command = CreateOrderCommand(
+        customer_id="customer-1",
+        items=[
+            CreateOrderItemDTO(
+                product_id="product-1",
+                quantity=1,
+                unit_price=10.0
+            )
+        ]
+    )
+    
+    # Without a transaction a failed batch could be left half written
+    with pytest.raises(ValueError):
+        await create_order_handler.handle_many([command])
+    
+    assert order_repository.orders == {}
+
+
+@pytest.mark.asyncio
+async def test_create_order_handler_unit_of_work(order_repository, message_publisher, saga_log, unit_of_work):
+    handler = CreateOrderHandler(
+        order_repository=order_repository,
+        message_publisher=message_publisher,
+        saga_log=saga_log,
+        unit_of_work=unit_of_work,
+    )
+    
+    # Record whether each event is published inside the transaction
+    published_in_transaction = []
+    publish_with_key = message_publisher.publish_with_key
+    
+    async def recording_publish_with_key(event, topic, key):
+        published_in_transaction.append(unit_of_work.active)
+        await publish_with_key(event, topic, key)
+    
+    message_publisher.publish_with_key = recording_publish_with_key
+    
+    command = CreateOrderCommand(
+        customer_id="customer-123",
+        items=[
+            CreateOrderItemDTO(
+                product_id="product-1",
+                quantity=2,
+                unit_price=10.0
+            )
+        ]
+    )
+    
+    result = await handler.handle(command)
+    
+    # The writes and events of the command are committed once
+    assert unit_of_work.commits == 1
+    assert unit_of_work.rollbacks == 0
+    assert published_in_transaction == [True, True]
+    assert [key for _, _, key in message_publisher.published_events] == [result["order_id"]] * 2
+    assert [event.event_type for event in saga_log.events[result["saga_id"]]] == [
+        "order_created",
+        "payment_requested",
+    ]
+    
+    # A failed write rolls the command back and publishes nothing
+    async def failing_log_event(saga_id, event):
+        raise RuntimeError("database unavailable")
+    
+    saga_log.log_event = failing_log_event
+    
+    with pytest.raises(RuntimeError):
+        await handler.handle(command)
+    
+    assert unit_of_work.commits == 1
+    assert unit_of_work.rollbacks == 1
+    assert len(message_publisher.published_events) == 2
+
+
+@pytest.mark.asyncio
+async def test_cancel_order_handler_unit_of_work(order_repository, message_publisher, saga_log, sample_order, unit_of_work):
+    handler = CancelOrderHandler(
+        order_repository=order_repository,
+        message_publisher=message_publisher,
+        saga_log=saga_log,
+        unit_of_work=unit_of_work,
+    )
+    
+    await order_repository.save(sample_order)
+    
+    result = await handler.handle(
+        CancelOrderCommand(
+            order_id=sample_order.id,
+            reason="Customer requested cancellation"
+        )
+    )
+    
+    assert result["success"] is True
+    assert unit_of_work.commits == 1
+    assert saga_log.sagas == {}
+    assert [event.event_type for event in saga_log.events[sample_order.saga_id]] == ["order_cancelled"]
+    assert len(message_publisher.published_events) == 1
+
+
+@pytest.mark.asyncio
+async def test_event_handlers_payment_processed_batch(order_repository, message_publisher, saga_log, sample_order, unit_of_work):
+    handlers = EventHandlers(
+        order_repository=order_repository,
+        message_publisher=message_publisher,
+        saga_log=saga_log,
+        unit_of_work=unit_of_work,
+    )
+    
+    # Count the loads and writes of the batch
+    calls = []
+    get_by_ids = order_repository.get_by_ids
+    update_many = order_repository.update_many
+    
+    async def recording_get_by_ids(order_ids):
+        calls.append(("get_by_ids", list(order_ids)))
+        return await get_by_ids(order_ids)
+    
+    async def recording_update_many(orders):
+        calls.append(("update_many", [order.id for order in orders]))
+        await update_many(orders)
+    
+    order_repository.get_by_ids = recording_get_by_ids
+    order_repository.update_many = recording_update_many
+    
+    failing_order = Order(id="failing-order-id", customer_id="test-customer-id", saga_id="failing-saga-id")
+    await order_repository.save(sample_order)
+    await order_repository.save(failing_order)
+    await saga_log.start_saga(failing_order.saga_id, failing_order.id)
+    
+    def payment_processed(order_id, saga_id, success):
+        return PaymentProcessed(
+            saga_id=saga_id,
+            order_id=order_id,
+            payment_id="payment-123",
+            success=success,
+            message="ok" if success else "card declined",
+        )
+    
+    await handlers.handle_payment_processed_batch([
+        payment_processed(sample_order.id, sample_order.saga_id, True),
+        payment_processed(failing_order.id, failing_order.saga_id, False),
+        payment_processed("missing-order-id", None, True),
+    ])
+    
+    # Every order is loaded once and written back together in one transaction
+    assert calls == [
+        ("get_by_ids", [sample_order.id, failing_order.id, "missing-order-id"]),
+        ("update_many", [sample_order.id, failing_order.id]),
+    ]
+    assert unit_of_work.commits == 1
+    
+    assert sample_order.status == OrderStatus.PENDING_INVENTORY
+    assert failing_order.status == OrderStatus.FAILED
+    assert failing_order.metadata["payment_failure_reason"] == "card declined"
+    assert saga_log.sagas[failing_order.saga_id]["status"] == "FAILED"
+    
+    assert [(event.event_type, topic, key) for event, topic, key in message_publisher.published_events] == [
+        ("inventory_requested", "inventory", sample_order.id),
+    ]
+    assert [event.event_type for event in saga_log.events[sample_order.saga_id]] == [
+        "payment_processed",
+        "inventory_requested",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_event_handlers_skip_duplicate_events(order_repository, message_publisher, saga_log, sample_order, processed_events):
+    handlers = EventHandlers(
+        order_repository=order_repository,
+        message_publisher=message_publisher,
+        saga_log=saga_log,
+        processed_events=processed_events,
+    )
+    
+    await order_repository.save(sample_order)
+    
+    event = PaymentProcessed(
+        saga_id=sample_order.saga_id,
+        order_id=sample_order.id,
+        payment_id="payment-123",
+        success=True,
+        message="ok",
+    )
+    
+    await handlers.handle_payment_processed(event)
+    
+    assert processed_events.committed == [event.event_id]
+    assert len(message_publisher.published_events) == 1
+    
+    # A redelivery, alone or in a batch, does no domain work
+    sample_order.update_status(OrderStatus.PAYMENT_CONFIRMED)
+    
+    await handlers.handle_payment_processed(event)
+    await handlers.handle_payment_processed_batch([event, event])
+    
+    assert sample_order.status == OrderStatus.PAYMENT_CONFIRMED
+    assert len(message_publisher.published_events) == 1
+    assert [logged.event_type for logged in saga_log.events[sample_order.saga_id]] == [
+        "payment_processed",
+        "inventory_requested",
+    ]
@@ -0,0 +1,106 @@
+# services/order-service/tests/unit/test_cache.py
+import pytest
+
+from adapters.outbound.in_memory_order_cache import InMemoryOrderCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingLoader:
+    def __init__(self, order_view):
+        self.order_view = order_view
+        self.calls = 0
+    
+    async def __call__(self):
+        self.calls += 1
+        return self.order_view
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_and_miss():
+    cache = InMemoryOrderCache()
+    loader = CountingLoader({"id": "order-1"})
+    
+    assert await cache.get_or_load("order-1", loader) == {"id": "order-1"}
+    assert await cache.get_or_load("order-1", loader) == {"id": "order-1"}
+    
+    assert loader.calls == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_does_not_store_missing_orders():
+    cache = InMemoryOrderCache()
+    loader = CountingLoader(None)
+    
+    assert await cache.get_or_load("order-1", loader) is None
+    assert await cache.get_or_load("order-1", loader) is None
+    
+    assert loader.calls == 2
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_entries_expire():
+    clock = FakeClock()
+    cache = InMemoryOrderCache(ttl_seconds=2.0, clock=clock)
+    loader = CountingLoader({"id": "order-1"})
+    
+    await cache.get_or_load("order-1", loader)
+    
+    clock.now = 1.9
+    await cache.get_or_load("order-1", loader)
+    assert loader.calls == 1
+    
+    clock.now = 2.1
+    await cache.get_or_load("order-1", loader)
+    assert loader.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used():
+    cache = InMemoryOrderCache(max_size=2)
+    
+    await cache.get_or_load("order-1", CountingLoader({"id": "order-1"}))
+    await cache.get_or_load("order-2", CountingLoader({"id": "order-2"}))
+    
+    # Use order-1 so order-2 becomes the least recently used entry
+    await cache.get_or_load("order-1", CountingLoader({"id": "order-1"}))
+    await cache.get_or_load("order-3", CountingLoader({"id": "order-3"}))
+    
+    assert list(cache.entries) == ["order-1", "order-3"]
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_invalidate():
+    cache = InMemoryOrderCache()
+    loader = CountingLoader({"id": "order-1"})
+    
+    await cache.get_or_load("order-1", loader)
+    await cache.invalidate("order-1")
+    await cache.get_or_load("order-1", loader)
+    
+    assert loader.calls == 2
+    assert cache.stats()["invalidations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_ignores_view_loaded_before_invalidation():
+    cache = InMemoryOrderCache()
+    
+    # The order is written while its previous view is being loaded
+    async def stale_loader():
+        await cache.invalidate("order-1")
+        return {"id": "order-1", "status": "CREATED"}
+    
+    await cache.get_or_load("order-1", stale_loader)
+    
+    assert "order-1" not in cache.entries
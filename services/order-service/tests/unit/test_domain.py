@@ -2,6 +2,7 @@
 import pytest
 from datetime import datetime
 from domain.models import Order, OrderItem, OrderStatus
+from domain.events import OrderCreated, PaymentProcessed, event_from_dict
 
 
 def test_order_creation():
@@ -151,3 +152,81 @@ def test_from_dict():
     assert len(order.items) == 2
     assert order.total_amount == 40.0
 
+
+
+def test_changed_fields():
+    order = Order(
+        customer_id="customer-123",
+    )
+    
+    # A new order reports every tracked field
+    assert order.changed_fields() == {"customer_id", "items", "status", "saga_id", "metadata"}
+    
+    order.mark_clean()
+    assert order.changed_fields() == set()
+    
+    # Status and in-place metadata changes are tracked
+    order.update_status(OrderStatus.PAYMENT_CONFIRMED)
+    order.metadata["payment_id"] = "payment-123"
+    assert order.changed_fields() == {"status", "metadata"}
+    
+    order.mark_clean()
+    
+    # Item changes are tracked
+    order.add_item(
+        product_id="product-1",
+        quantity=2,
+        unit_price=10.0
+    )
+    assert order.changed_fields() == {"items"}
+    
+    order.mark_clean()
+    order.items[0].quantity = 3
+    assert order.changed_fields() == {"items"}
+
+
+def test_add_item_validation():
+    order = Order(
+        customer_id="customer-123",
+    )
+    
+    with pytest.raises(ValueError):
+        order.add_item(
+            product_id="product-1",
+            quantity=0,
+            unit_price=10.0
+        )
+    
+    with pytest.raises(ValueError):
+        order.add_item(
+            product_id="product-1",
+            quantity=1,
+            unit_price=-1.0
+        )
+    
+    assert len(order.items) == 0
+
+
+def test_event_from_dict():
+    events = [
+        OrderCreated(
+            order_id="order-123",
+            customer_id="customer-123",
+            total_amount=40.0,
+            items={"product-1": {"quantity": 2, "unit_price": 20.0}},
+            saga_id="saga-123"
+        ),
+        PaymentProcessed(
+            order_id="order-123",
+            payment_id="payment-123",
+            success=True,
+            message="Payment processed",
+            saga_id="saga-123"
+        ),
+    ]
+    
+    for event in events:
+        rebuilt_event = event_from_dict(event.to_dict())
+        
+        assert type(rebuilt_event) is type(event)
+        assert rebuilt_event == event
@@ -0,0 +1,124 @@
+# services/order-service/tests/unit/test_event_codec.py
+import json
+
+import pytest
+
+from domain.events import (
+    OrderCreated,
+    OrderCancelled,
+    PaymentRequested,
+    PaymentProcessed,
+    InventoryRequested,
+    InventoryAllocated,
+    OrderShipped,
+)
+from adapters.outbound.event_codec import EventCodec, EventCodecError, EVENT_TAGS, FORMAT_VERSION
+
+
+@pytest.fixture
+def events():
+    return [
+        OrderCreated(
+            order_id="order-123",
+            customer_id="customer-123",
+            total_amount=40.0,
+            items={"product-1": {"quantity": 2, "unit_price": 20.0}},
+            saga_id="saga-123",
+        ),
+        OrderCancelled(order_id="order-123", reason="Customer requested cancellation", saga_id="saga-123"),
+        PaymentRequested(order_id="order-123", customer_id="customer-123", amount=40.0, saga_id="saga-123"),
+        PaymentProcessed(order_id="order-123", payment_id="payment-123", success=True, message="ok"),
+        InventoryRequested(order_id="order-123", items={"product-1": 2}, saga_id="saga-123"),
+        InventoryAllocated(order_id="order-123", success=False, message="out of stock", allocated_items={}),
+        OrderShipped(order_id="order-123", tracking_number="TRACK-123"),
+    ]
+
+
+@pytest.mark.parametrize("encoding", ["orjson", "msgpack", "json"])
+def test_codec_round_trip(events, encoding):
+    if encoding == "msgpack":
+        pytest.importorskip("msgpack")
+    
+    codec = EventCodec(encoding)
+    
+    for event in events:
+        decoded = codec.decode(codec.encode(event))
+        
+        assert type(decoded) is type(event)
+        assert decoded.to_dict() == event.to_dict()
+
+
+def test_codec_header_and_size(events):
+    codec = EventCodec()
+    
+    for event in events:
+        data = codec.encode(event)
+        
+        # Version, encoding and type tag, then the field values
+        assert data[0] == FORMAT_VERSION
+        assert data[1] == 1
+        assert data[2] == EVENT_TAGS[event.event_type]
+        assert len(data) < len(json.dumps(event.to_dict()).encode("utf-8"))
+
+
+def test_codec_reads_json_and_other_encodings(events):
+    codec = EventCodec()
+    
+    # Events published as JSON before the codec, or by services not using it
+    legacy = json.dumps(events[2].to_dict()).encode("utf-8")
+    assert codec.decode(legacy).to_dict() == events[2].to_dict()
+    
+    # A consumer decodes whatever encoding the publisher chose
+    assert codec.decode(EventCodec("json").encode(events[3])).to_dict() == events[3].to_dict()
+
+
+def test_codec_rejects_unknown_messages(events):
+    codec = EventCodec()
+    data = codec.encode(events[0])
+    
+    with pytest.raises(EventCodecError):
+        codec.decode(bytes((FORMAT_VERSION + 1,)) + data[1:])
+    
+    with pytest.raises(EventCodecError):
+        codec.decode(data[:2] + bytes((EVENT_TAGS["payment_refunded"],)) + data[3:])
+    
+    with pytest.raises(EventCodecError):
+        codec.decode(b"not an event")
+    
+    with pytest.raises(ValueError):
+        EventCodec("avro")
+
+
+@pytest.mark.parametrize("encoding", ["orjson", "msgpack"])
+def test_codec_rejects_short_payloads(events, encoding):
+    if encoding == "msgpack":
+        pytest.importorskip("msgpack")
+    
+    codec = EventCodec(encoding)
+    data = codec.encode(events[3])
+    header, values = data[:3], codec_values(data, encoding)
+    
+    # Every field has a default, so a dropped order ID must not decode as ""
+    for malformed in (values[:-1], values + ["extra"], {"order_id": "order-123"}):
+        with pytest.raises(EventCodecError):
+            codec.decode(header + dump_values(malformed, encoding))
+    
+    legacy = events[3].to_dict()
+    del legacy["order_id"]
+    
+    with pytest.raises(EventCodecError):
+        codec.decode(json.dumps(legacy).encode("utf-8"))
+
+
+def codec_values(data, encoding):
+    if encoding == "msgpack":
+        import msgpack
+        return msgpack.unpackb(data[3:], raw=False)
+    return json.loads(data[3:])
+
+
+def dump_values(values, encoding):
+    if encoding == "msgpack":
+        import msgpack
+        return msgpack.packb(values, use_bin_type=True)
+    return json.dumps(values).encode("utf-8")
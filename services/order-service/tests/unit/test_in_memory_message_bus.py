@@ -0,0 +1,245 @@
+# services/order-service/tests/unit/test_in_memory_message_bus.py
+import asyncio
+import time
+
+import pytest
+
+from domain.models import OrderStatus
+from domain.events import PaymentProcessed, InventoryAllocated
+from application.commands.create_order import CreateOrderCommand, CreateOrderHandler, CreateOrderItemDTO
+from adapters.inbound.event_handlers import EventHandlers
+from adapters.outbound.in_memory_message_bus import (
+    InMemoryMessageBus,
+    InMemoryMessagePublisher,
+    InMemoryMessageConsumer,
+)
+
+
+async def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_bus_delivers_to_every_subscription_in_order_per_key():
+    bus = InMemoryMessageBus()
+    publisher = InMemoryMessagePublisher(bus)
+    consumers = [InMemoryMessageConsumer(bus, name, max_concurrent_handlers=4) for name in ("order-service", "audit")]
+    
+    received = {"order-service": [], "audit": []}
+    
+    for consumer in consumers:
+        async def handler(event, name=consumer.subscription_name):
+            # The first event of every order is the slowest
+            await asyncio.sleep(0.02 if event.payment_id == "0" else 0.0)
+            received[name].append((event.order_id, int(event.payment_id)))
+        
+        await consumer.subscribe("payments", handler)
+    
+    for step in range(3):
+        for order_id in ("order-a", "order-b"):
+            await publisher.publish_with_key(
+                PaymentProcessed(order_id=order_id, payment_id=str(step), success=True),
+                "payments",
+                order_id,
+            )
+    
+    await wait_for(lambda: all(len(events) == 6 for events in received.values()))
+    
+    # Each subscription gets every event, each order in order
+    for events in received.values():
+        for order_id in ("order-a", "order-b"):
+            assert [step for event_order_id, step in events if event_order_id == order_id] == [0, 1, 2]
+    
+    stats = bus.stats()
+    assert stats["published"] == 6
+    assert stats["subscriptions"]["payments/audit"]["acknowledged"] == 6
+    assert stats["subscriptions"]["payments/order-service"]["unacknowledged"] == 0
+    
+    for consumer in consumers:
+        await consumer.close()
+
+
+@pytest.mark.asyncio
+async def test_bus_redelivers_failed_messages():
+    bus = InMemoryMessageBus(redelivery_delay_seconds=0.01)
+    publisher = InMemoryMessagePublisher(bus)
+    consumer = InMemoryMessageConsumer(bus, "order-service")
+    
+    attempts = []
+    
+    async def handler(event):
+        attempts.append(event.event_id)
+        
+        if len(attempts) < 3:
+            raise ValueError("Handler failed")
+    
+    await consumer.subscribe("payments", handler)
+    
+    event = PaymentProcessed(order_id="order-1", payment_id="payment-1", success=True)
+    await publisher.publish(event, "payments")
+    
+    await wait_for(lambda: consumer.stats()["handled"] == 1)
+    
+    assert attempts == [event.event_id] * 3
+    assert consumer.stats()["failed"] == 2
+    assert bus.stats()["subscriptions"]["payments/order-service"]["redelivered"] == 2
+    
+    await consumer.close()
+
+
+@pytest.mark.asyncio
+async def test_bus_drops_undecodable_and_exhausted_messages():
+    bus = InMemoryMessageBus(redelivery_delay_seconds=0.01)
+    consumer = InMemoryMessageConsumer(bus, "order-service", max_attempts=3)
+    
+    attempts = []
+    
+    async def handler(event):
+        attempts.append(event.order_id)
+        raise ValueError("Handler failed")
+    
+    await consumer.subscribe("payments", handler)
+    
+    # A corrupt payload is dropped at once instead of looping forever
+    bus.send("payments", b"not an event", properties={"event_type": "payment_processed"})
+    await InMemoryMessagePublisher(bus).publish(PaymentProcessed(order_id="order-1"), "payments")
+    
+    await wait_for(lambda: consumer.stats()["dropped"] == 2)
+    await asyncio.sleep(0.05)
+    
+    # A message failing every attempt is dropped after the last one
+    assert attempts == ["order-1"] * 3
+    assert consumer.stats()["failed"] == 4
+    
+    subscription = bus.stats()["subscriptions"]["payments/order-service"]
+    assert subscription["redelivered"] == 2
+    assert subscription["acknowledged"] == 2
+    assert subscription["unacknowledged"] == 0 and subscription["backlog"] == 0
+    
+    await consumer.close()
+
+
+@pytest.mark.asyncio
+async def test_bus_skips_event_types_without_handler():
+    bus = InMemoryMessageBus()
+    consumer = InMemoryMessageConsumer(bus, "order-service")
+    
+    handled = []
+    
+    async def handler(event):
+        handled.append(event.order_id)
+    
+    await consumer.subscribe("payments", handler, ["payment_processed"])
+    
+    bus.send("payments", b"not an event", properties={"event_type": "payment_requested"})
+    await InMemoryMessagePublisher(bus).publish(PaymentProcessed(order_id="order-1"), "payments")
+    
+    await wait_for(lambda: consumer.stats()["handled"] == 1)
+    
+    assert handled == ["order-1"]
+    assert consumer.stats()["skipped"] == 1
+    assert consumer.stats()["failed"] == 0
+    assert bus.stats()["subscriptions"]["payments/order-service"]["acknowledged"] == 2
+    
+    await consumer.close()
+
+
+class StandInPaymentService:
+    """Pays every payment request"""
+    
+    def __init__(self, bus: InMemoryMessageBus):
+        self.publisher = InMemoryMessagePublisher(bus)
+        self.consumer = InMemoryMessageConsumer(bus, "payment-service")
+    
+    async def start(self) -> None:
+        await self.consumer.subscribe("payments", self.handle, ["payment_requested"])
+    
+    async def handle(self, event) -> None:
+        await self.publisher.publish_with_key(
+            PaymentProcessed(
+                order_id=event.order_id,
+                payment_id=f"payment-{event.order_id}",
+                success=True,
+                saga_id=event.saga_id,
+            ),
+            "payments",
+            event.order_id,
+        )
+
+
+class StandInInventoryService:
+    """Allocates every inventory request"""
+    
+    def __init__(self, bus: InMemoryMessageBus):
+        self.publisher = InMemoryMessagePublisher(bus)
+        self.consumer = InMemoryMessageConsumer(bus, "inventory-service")
+    
+    async def start(self) -> None:
+        await self.consumer.subscribe("inventory", self.handle, ["inventory_requested"])
+    
+    async def handle(self, event) -> None:
+        await self.publisher.publish_with_key(
+            InventoryAllocated(
+                order_id=event.order_id,
+                success=True,
+                allocated_items=event.items,
+                saga_id=event.saga_id,
+            ),
+            "inventory",
+            event.order_id,
+        )
+
+
+@pytest.mark.asyncio
+async def test_bus_runs_saga_in_one_process(order_repository, saga_log, unit_of_work, processed_events):
+    bus = InMemoryMessageBus()
+    publisher = InMemoryMessagePublisher(bus)
+    consumer = InMemoryMessageConsumer(bus, "order-service")
+    
+    event_handlers = EventHandlers(
+        order_repository=order_repository,
+        message_publisher=publisher,
+        saga_log=saga_log,
+        unit_of_work=unit_of_work,
+        processed_events=processed_events,
+    )
+    create_order_handler = CreateOrderHandler(
+        order_repository=order_repository,
+        message_publisher=publisher,
+        saga_log=saga_log,
+        unit_of_work=unit_of_work,
+    )
+    
+    participants = [StandInPaymentService(bus), StandInInventoryService(bus)]
+    for participant in participants:
+        await participant.start()
+    
+    await consumer.subscribe("payments", event_handlers.handle_payment_processed, ["payment_processed"])
+    await consumer.subscribe("inventory", event_handlers.handle_inventory_allocated, ["inventory_allocated"])
+    
+    results = [
+        await create_order_handler.handle(CreateOrderCommand(
+            customer_id=f"customer-{i}",
+            items=[CreateOrderItemDTO(product_id="product-1", quantity=1, unit_price=10.0)],
+        ))
+        for i in range(5)
+    ]
+    
+    # Every saga runs from the order to the inventory allocation
+    def completed():
+        return all(
+            order_repository.orders[result["order_id"]].status == OrderStatus.INVENTORY_CONFIRMED
+            for result in results
+        )
+    
+    await wait_for(completed)
+    
+    assert all(saga_log.sagas[result["saga_id"]]["status"] == "COMPLETED" for result in results)
+    assert consumer.stats()["failed"] == 0
+    
+    for participant in participants:
+        await participant.consumer.close()
+    await consumer.close()
@@ -0,0 +1,812 @@
+# services/order-service/tests/unit/test_message_consumer.py
+import asyncio
+import queue
+import time
+
+import pytest
+import pulsar
+
+from domain.events import OrderCreated, OrderCancelled, PaymentRequested, PaymentProcessed
+from adapters.outbound.event_codec import EventCodec
+from adapters.outbound.pulsar_event_publisher import PulsarMessageConsumer, PulsarMessagePublisher, PulsarDeadLetterQueue
+from adapters.outbound.payload_compression import PayloadCompressor
+
+
+def payment_processed(order_id: str, step: int = 0, fail: bool = False) -> PaymentProcessed:
+    return PaymentProcessed(order_id=order_id, payment_id=str(step), success=not fail)
+
+
+class FakeMessage:
+    def __init__(self, event: PaymentProcessed, partition_key: str = "", data: bytes = None, properties=None):
+        self.event = event
+        self.key = partition_key
+        self.data = data if data is not None else EventCodec().encode(event)
+        self.props = properties or {}
+    
+    def value(self) -> bytes:
+        return self.data
+    
+    def partition_key(self) -> str:
+        return self.key
+    
+    def properties(self):
+        return self.props
+    
+    def message_id(self):
+        return f"message-{self.event.order_id}-{self.event.payment_id}"
+    
+    def publish_timestamp(self):
+        return 1700000000000
+    
+    def topic_name(self) -> str:
+        return "persistent://public/default/payments"
+
+
+class FakeConsumer:
+    """Blocks in receive like the Pulsar client does"""
+    
+    def __init__(self, batch_receive_policy=None, **options):
+        self.messages = queue.Queue()
+        self.batch_receive_policy = batch_receive_policy
+        self.options = options
+        self.acknowledged = []
+        self.cumulative_acknowledged = []
+        self.negative_acknowledged = []
+        self.closed = False
+    
+    def receive(self, timeout_millis=None):
+        try:
+            return self.messages.get(timeout=timeout_millis / 1000)
+        except queue.Empty:
+            raise pulsar.Timeout("Pulsar error: TimeOut")
+    
+    def batch_receive(self):
+        # Fills the batch for a while after the first message, like the client does
+        msgs = []
+        try:
+            msgs.append(self.messages.get(timeout=0.02))
+            time.sleep(0.02)
+            while True:
+                msgs.append(self.messages.get_nowait())
+        except queue.Empty:
+            return msgs
+    
+    def acknowledge(self, msg):
+        self.acknowledged.append(msg.event)
+    
+    def acknowledge_cumulative(self, msg):
+        self.cumulative_acknowledged.append(msg.event)
+    
+    def negative_acknowledge(self, msg):
+        self.negative_acknowledged.append(msg.event)
+    
+    def redeliver_unacknowledged_messages(self):
+        pass
+    
+    def close(self):
+        self.closed = True
+
+
+class FakeProducer:
+    """Delivers the sent messages to the consumer of its topic, like a broker"""
+    
+    def __init__(self, consumer: FakeConsumer):
+        self.consumer = consumer
+    
+    def send_async(self, content, callback, properties=None, partition_key=None):
+        event = EventCodec().decode(content)
+        self.consumer.messages.put(FakeMessage(event, partition_key or "", content, properties))
+        callback(pulsar.Result.Ok, None)
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        pass
+
+
+class FakeClient:
+    def __init__(self):
+        self.consumers = {}
+        self.closed = False
+    
+    def subscribe(self, topic, subscription_name, batch_receive_policy=None, **options):
+        return self.consumers.setdefault(topic, FakeConsumer(batch_receive_policy, **options))
+    
+    def create_producer(self, topic, **options):
+        return FakeProducer(self.consumers.setdefault(topic, FakeConsumer()))
+    
+    def close(self):
+        self.closed = True
+
+
+class FakeKeySharedClient:
+    """Spreads the keys of a topic over the consumers of its subscription"""
+    
+    def __init__(self):
+        self.consumers = {}
+        self.owners = {}
+    
+    def subscribe(self, topic, subscription_name, batch_receive_policy=None, **options):
+        consumer = FakeConsumer(batch_receive_policy, **options)
+        self.consumers.setdefault(topic, []).append(consumer)
+        return consumer
+    
+    def send(self, topic, msg):
+        consumers = self.consumers[f"persistent://public/default/{topic}"]
+        # Each key sticks to one consumer
+        owner = self.owners.setdefault(msg.key, len(self.owners) % len(consumers))
+        consumers[owner].messages.put(msg)
+    
+    def close(self):
+        pass
+
+
+class FakePublisher:
+    def __init__(self):
+        self.forwarded = []
+    
+    async def forward(self, topic, data, properties, key=None, deliver_after_seconds=None):
+        self.forwarded.append((topic, data, properties, key, deliver_after_seconds))
+
+
+async def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_consumer_does_not_block_event_loop():
+    client = FakeClient()
+    message_consumer = PulsarMessageConsumer(client, "order-service", receive_timeout_millis=500)
+    
+    async def handler(event):
+        pass
+    
+    for topic in ("payments", "inventory", "shipping"):
+        await message_consumer.subscribe(topic, handler)
+    
+    # The loop keeps running while every consumer waits for messages
+    longest_gap = 0.0
+    last_tick = time.monotonic()
+    for _ in range(20):
+        await asyncio.sleep(0.01)
+        now = time.monotonic()
+        longest_gap = max(longest_gap, now - last_tick)
+        last_tick = now
+    
+    assert longest_gap < 0.1
+    
+    await message_consumer.close()
+    
+    assert client.closed
+    assert all(consumer.closed for consumer in client.consumers.values())
+
+
+@pytest.mark.asyncio
+async def test_consumer_bounds_concurrent_handlers():
+    client = FakeClient()
+    message_consumer = PulsarMessageConsumer(client, "order-service", max_concurrent_handlers=2)
+    
+    release = asyncio.Event()
+    running = 0
+    most_running = 0
+    
+    async def handler(event):
+        nonlocal running, most_running
+        running += 1
+        most_running = max(most_running, running)
+        await release.wait()
+        running -= 1
+        
+        if not event.success:
+            raise ValueError("Handler failed")
+    
+    await message_consumer.subscribe("payments", handler)
+    
+    consumer = client.consumers["persistent://public/default/payments"]
+    for i in range(6):
+        consumer.messages.put(FakeMessage(payment_processed(f"order-{i}", fail=i == 5), partition_key=f"order-{i}"))
+    
+    await wait_for(lambda: running == 2)
+    await asyncio.sleep(0.05)
+    
+    assert most_running == 2
+    assert message_consumer.stats()["in_flight"] == 2
+    
+    release.set()
+    await wait_for(lambda: message_consumer.stats()["handled"] + message_consumer.stats()["failed"] == 6)
+    
+    # Successful messages are acknowledged and failed ones redelivered
+    assert sorted(event.order_id for event in consumer.acknowledged) == [f"order-{i}" for i in range(5)]
+    assert [event.order_id for event in consumer.negative_acknowledged] == ["order-5"]
+    assert most_running == 2
+    
+    await message_consumer.close()
+
+
+@pytest.mark.asyncio
+async def test_consumer_orders_messages_per_order():
+    client = FakeClient()
+    message_consumer = PulsarMessageConsumer(client, "order-service", max_concurrent_handlers=8)
+    
+    started = []
+    finished = []
+    
+    async def handler(event):
+        started.append((event.order_id, int(event.payment_id)))
+        
+        # The first event of every order is the slowest
+        await asyncio.sleep(0.05 if event.payment_id == "0" else 0.0)
+        finished.append((event.order_id, int(event.payment_id)))
+    
+    await message_consumer.subscribe("payments", handler)
+    
+    # Messages published without a key are ordered by their order ID
+    consumer = client.consumers["persistent://public/default/payments"]
+    for step in range(3):
+        consumer.messages.put(FakeMessage(payment_processed("order-a", step), partition_key="order-a"))
+        consumer.messages.put(FakeMessage(payment_processed("order-b", step)))
+    
+    await wait_for(lambda: len(finished) == 6)
+    
+    # Each order is handled in order, and both orders run side by side
+    for order_id in ("order-a", "order-b"):
+        assert [step for finished_order_id, step in finished if finished_order_id == order_id] == [0, 1, 2]
+    assert started[:2] == [("order-a", 0), ("order-b", 0)]
+    assert sorted(int(event.payment_id) for event in consumer.acknowledged) == [0, 0, 1, 1, 2, 2]
+    
+    await message_consumer.close()
+
+
+async def consume_with_replicas(replicas: int) -> float:
+    """Seconds the replicas of a Key_Shared subscription take to handle a backlog"""
+    client = FakeKeySharedClient()
+    message_consumers = [
+        PulsarMessageConsumer(client, "order-service", max_concurrent_handlers=1) for _ in range(replicas)
+    ]
+    
+    handled = {}
+    
+    async def handler(event):
+        await asyncio.sleep(0.005)
+        handled.setdefault(event.order_id, []).append(int(event.payment_id))
+    
+    for message_consumer in message_consumers:
+        await message_consumer.subscribe("payments", handler)
+    
+    for consumer in client.consumers["persistent://public/default/payments"]:
+        assert consumer.options["consumer_type"] == pulsar.ConsumerType.KeyShared
+    
+    started = time.monotonic()
+    for step in range(10):
+        for order in range(8):
+            client.send("payments", FakeMessage(payment_processed(f"order-{order}", step), partition_key=f"order-{order}"))
+    
+    await wait_for(lambda: sum(len(steps) for steps in handled.values()) == 80, timeout=5.0)
+    elapsed = time.monotonic() - started
+    
+    # Every order is handled in order, whichever replica has it
+    assert all(steps == list(range(10)) for steps in handled.values())
+    
+    for message_consumer in message_consumers:
+        await message_consumer.close()
+    
+    return elapsed
+
+
+@pytest.mark.asyncio
+async def test_consumer_replicas_share_key_shared_subscription():
+    one = await consume_with_replicas(1)
+    four = await consume_with_replicas(4)
+    
+    # Four replicas each handle a quarter of the orders
+    assert four < one / 2
+
+
+@pytest.mark.asyncio
+async def test_consumer_handles_priority_lane_first():
+    client = FakeClient()
+    message_consumer = PulsarMessageConsumer(
+        client,
+        "order-service",
+        max_concurrent_handlers=1,
+        priority_lanes=True,
+        priority_weight=2,
+    )
+    
+    release = asyncio.Event()
+    handled = []
+    
+    async def handler(event):
+        # Hold the only shard until both lanes have queued up
+        if event.order_id == "blocker":
+            await release.wait()
+        handled.append(event.order_id)
+    
+    await message_consumer.subscribe("payments", handler)
+    
+    consumer = client.consumers["persistent://public/default/payments"]
+    
+    consumer.messages.put(FakeMessage(payment_processed("blocker")))
+    for step in range(3):
+        consumer.messages.put(FakeMessage(payment_processed(f"new-{step}", step)))
+    await wait_for(lambda: message_consumer.stats()["lanes"]["normal"]["queued"] == 3)
+    
+    # Failed payments read as high priority before they are decoded
+    for step in range(6):
+        event = payment_processed(f"cancel-{step}", step, fail=True)
+        consumer.messages.put(FakeMessage(event, properties={"event_type": "payment_processed", "priority": "high"}))
+    await wait_for(lambda: message_consumer.stats()["lanes"]["high"]["queued"] == 6)
+    
+    release.set()
+    await wait_for(lambda: len(handled) == 10)
+    
+    # The high lane goes first, giving the normal lane a turn every priority_weight
+    # jobs, the blocker having taken the turn of the first round
+    assert handled == [
+        "blocker",
+        "cancel-0", "cancel-1",
+        "cancel-2", "cancel-3", "new-0",
+        "cancel-4", "cancel-5", "new-1",
+        "new-2",
+    ]
+    
+    lanes = message_consumer.stats()["lanes"]
+    assert lanes["high"]["handled"] == 6
+    assert lanes["normal"]["handled"] == 4
+    assert lanes["high"]["p50_ms"] <= lanes["high"]["p95_ms"] <= lanes["high"]["p99_ms"]
+    
+    await message_consumer.close()
+
+
+@pytest.mark.asyncio
+async def test_consumer_handles_published_cancellation_before_backlog():
+    client = FakeClient()
+    publisher = PulsarMessagePublisher(client, prioritize_compensations=True)
+    message_consumer = PulsarMessageConsumer(client, "order-service", max_concurrent_handlers=1, priority_lanes=True)
+    
+    release = asyncio.Event()
+    handled = []
+    
+    async def handler(event):
+        if event.order_id == "blocker":
+            await release.wait()
+        handled.append((event.event_type, event.order_id))
+    
+    await message_consumer.subscribe("orders", handler)
+    
+    await publisher.publish(OrderCreated(order_id="blocker"), "orders")
+    for step in range(3):
+        await publisher.publish(OrderCreated(order_id=f"order-{step}"), "orders")
+    await wait_for(lambda: message_consumer.stats()["lanes"]["normal"]["queued"] == 3)
+    
+    await publisher.publish(OrderCancelled(order_id="order-9", reason="changed my mind"), "orders")
+    await publisher.publish(OrderCancelled(order_id="order-1", reason="changed my mind"), "orders")
+    await wait_for(lambda: message_consumer.stats()["lanes"]["high"]["queued"] == 1)
+    
+    release.set()
+    await wait_for(lambda: len(handled) == 6)
+    
+    # A cancellation jumps the backlog, but not the earlier events of its own order
+    assert handled == [
+        ("order_created", "blocker"),
+        ("order_cancelled", "order-9"),
+        ("order_created", "order-0"),
+        ("order_created", "order-1"),
+        ("order_created", "order-2"),
+        ("order_cancelled", "order-1"),
+    ]
+    assert message_consumer.stats()["lanes"]["high"]["handled"] == 2
+    
+    await message_consumer.close()
+    await publisher.close()
+
+
+@pytest.mark.asyncio
+async def test_consumer_batches_messages():
+    client = FakeClient()
+    message_consumer = PulsarMessageConsumer(
+        client,
+        "order-service",
+        max_concurrent_handlers=4,
+        batch_max_messages=50,
+        subscription_type="Exclusive",
+    )
+    
+    batches = []
+    
+    async def handler(events):
+        batches.append([(event.order_id, int(event.payment_id)) for event in events])
+        
+        if not all(event.success for event in events):
+            raise ValueError("Handler failed")
+    
+    await message_consumer.subscribe_batch("payments", handler)
+    
+    consumer = client.consumers["persistent://public/default/payments"]
+    assert consumer.batch_receive_policy is not None
+    assert consumer.options["consumer_type"] == pulsar.ConsumerType.Exclusive
+    
+    # A handled batch is acknowledged with one cumulative ack
+    for step in range(3):
+        for order in range(8):
+            consumer.messages.put(FakeMessage(payment_processed(f"order-{order}", step)))
+    
+    await wait_for(lambda: consumer.cumulative_acknowledged)
+    
+    # Each handler call gets the messages of its shard, each order in order
+    assert sum(len(batch) for batch in batches) == 24
+    assert len(batches) <= 4
+    for batch in batches:
+        for order_id in {order_id for order_id, _ in batch}:
+            assert [step for batch_order_id, step in batch if batch_order_id == order_id] == [0, 1, 2]
+    assert [(event.order_id, event.payment_id) for event in consumer.cumulative_acknowledged] == [("order-7", "2")]
+    assert consumer.acknowledged == []
+    
+    # Only the failed message of a batch is redelivered, the ones sharing
+    # its shard are handled again one at a time and acknowledged
+    batches.clear()
+    failing_order = "order-0"
+    for order in range(8):
+        order_id = f"order-{order}"
+        consumer.messages.put(FakeMessage(payment_processed(order_id, 3, fail=order_id == failing_order)))
+    
+    await wait_for(lambda: message_consumer.stats()["handled"] + message_consumer.stats()["failed"] == 32)
+    
+    assert [event.order_id for event in consumer.negative_acknowledged] == [failing_order]
+    assert len(consumer.acknowledged) == 7
+    assert len(consumer.cumulative_acknowledged) == 1
+    
+    # A cumulative ack would take the failed message along before its redelivery
+    for order in range(8):
+        consumer.messages.put(FakeMessage(payment_processed(f"order-{order}", 4)))
+    
+    await wait_for(lambda: message_consumer.stats()["handled"] == 39)
+    
+    assert len(consumer.acknowledged) == 15
+    assert len(consumer.cumulative_acknowledged) == 1
+    
+    # Once redelivered and handled, the partition is acknowledged cumulatively again
+    consumer.messages.put(FakeMessage(payment_processed(failing_order, 3)))
+    
+    await wait_for(lambda: len(consumer.cumulative_acknowledged) == 2)
+    
+    assert consumer.cumulative_acknowledged[-1].order_id == failing_order
+    assert len(consumer.acknowledged) == 15
+    
+    await message_consumer.close()
+
+
+@pytest.mark.asyncio
+async def test_consumer_routes_messages_by_event_type():
+    client = FakeClient()
+    message_consumer = PulsarMessageConsumer(client, "order-service", max_concurrent_handlers=4)
+    
+    processed = []
+    others = []
+    
+    async def handle_processed(event):
+        processed.append(event.order_id)
+    
+    async def handle_others(event):
+        others.append(event.event_type)
+    
+    await message_consumer.subscribe("payments", handle_processed, ["payment_processed"])
+    await message_consumer.subscribe("payments", handle_others)
+    
+    # Both handlers share one subscription
+    assert len(client.consumers) == 1
+    consumer = client.consumers["persistent://public/default/payments"]
+    
+    requested = EventCodec().encode(PaymentRequested(order_id="order-2"))
+    consumer.messages.put(FakeMessage(payment_processed("order-1"), properties={"event_type": "payment_processed"}))
+    consumer.messages.put(FakeMessage(payment_processed("order-2", 1), data=requested, properties={"event_type": "payment_requested"}))
+    # Messages without the property are routed by the decoded event
+    consumer.messages.put(FakeMessage(payment_processed("order-3", 2)))
+    
+    await wait_for(lambda: len(consumer.acknowledged) == 3)
+    
+    assert sorted(processed) == ["order-1", "order-3"]
+    assert others == ["payment_requested"]
+    assert message_consumer.stats()["partitions"] == {"persistent://public/default/payments": 3}
+    
+    with pytest.raises(ValueError):
+        await message_consumer.subscribe_batch("payments", handle_others, ["order_created"])
+    
+    await message_consumer.close()
+
+
+@pytest.mark.asyncio
+async def test_consumer_decompresses_compressed_messages():
+    client = FakeClient()
+    message_consumer = PulsarMessageConsumer(client, "order-service")
+    
+    handled = []
+    
+    async def handler(event):
+        handled.append(event.order_id)
+    
+    await message_consumer.subscribe("payments", handler)
+    consumer = client.consumers["persistent://public/default/payments"]
+    
+    event = payment_processed("order-1")
+    data, properties = PayloadCompressor("zlib", threshold_bytes=0).compress(EventCodec().encode(event))
+    consumer.messages.put(FakeMessage(event, data=data, properties=dict(properties, event_type="payment_processed")))
+    # Payloads compressed with a compression this consumer lacks cannot be decoded
+    consumer.messages.put(FakeMessage(payment_processed("order-2"), properties={"compression": "brotli"}))
+    
+    await wait_for(lambda: message_consumer.stats()["handled"] + message_consumer.stats()["failed"] == 2)
+    
+    assert handled == ["order-1"]
+    assert [event.order_id for event in consumer.negative_acknowledged] == ["order-2"]
+    
+    await message_consumer.close()
+
+
+@pytest.mark.asyncio
+async def test_consumer_skips_unrouted_event_types_without_decoding():
+    client = FakeClient()
+    message_consumer = PulsarMessageConsumer(client, "order-service", batch_max_messages=50)
+    
+    batches = []
+    
+    async def handler(events):
+        batches.append([event.order_id for event in events])
+    
+    await message_consumer.subscribe_batch("payments", handler, ["payment_processed"])
+    consumer = client.consumers["persistent://public/default/payments"]
+    
+    # The requests this service publishes are acknowledged, not decoded
+    for order in range(4):
+        consumer.messages.put(FakeMessage(
+            payment_processed(f"order-{order}"),
+            data=b"not an event" if order % 2 else None,
+            properties={"event_type": "payment_requested" if order % 2 else "payment_processed"},
+        ))
+    
+    await wait_for(lambda: message_consumer.stats()["handled"] + message_consumer.stats()["skipped"] == 4)
+    
+    assert sorted(order_id for batch in batches for order_id in batch) == ["order-0", "order-2"]
+    assert message_consumer.stats()["skipped"] == 2
+    assert message_consumer.stats()["failed"] == 0
+    assert consumer.negative_acknowledged == []
+    
+    await message_consumer.close()
+
+
+@pytest.mark.asyncio
+async def test_consumer_retries_then_dead_letters():
+    client = FakeClient()
+    publisher = FakePublisher()
+    message_consumer = PulsarMessageConsumer(
+        client,
+        "order-service",
+        retry_publisher=publisher,
+        retry_delays_seconds=[1.0, 10.0],
+        max_attempts=4,
+    )
+    
+    async def handler(event):
+        raise KeyError("order_id")
+    
+    await message_consumer.subscribe("payments", handler)
+    
+    consumer = client.consumers["persistent://public/default/payments"]
+    retry_consumer = client.consumers["persistent://public/default/payments-order-service-RETRY"]
+    assert retry_consumer.options["consumer_type"] == pulsar.ConsumerType.Shared
+    
+    # A failed message is acknowledged and retried later, each time after a longer delay
+    event = payment_processed("order-1")
+    consumer.messages.put(FakeMessage(event, partition_key="order-1", properties={"event_type": "payment_processed"}))
+    
+    for attempt in range(2, 5):
+        await wait_for(lambda: len(publisher.forwarded) == attempt - 1)
+        
+        topic, data, properties, key, delay = publisher.forwarded[-1]
+        assert topic == "payments-order-service-RETRY"
+        assert properties["attempt"] == str(attempt)
+        assert properties["original_topic"] == "payments"
+        assert key == "order-1"
+        assert delay == [1.0, 10.0, 10.0][attempt - 2]
+        
+        retry_consumer.messages.put(FakeMessage(event, partition_key=key, data=data, properties=properties))
+    
+    # The last attempt goes to the dead-letter topic
+    await wait_for(lambda: len(publisher.forwarded) == 4)
+    
+    topic, data, properties, key, delay = publisher.forwarded[-1]
+    assert topic == "payments-order-service-DLQ"
+    assert properties["attempt"] == "4"
+    assert properties["event_type"] == "payment_processed"
+    assert "order_id" in properties["error"]
+    assert delay is None
+    
+    # Undecodable messages go there straight away
+    consumer.messages.put(FakeMessage(payment_processed("order-2"), data=b"not an event"))
+    await wait_for(lambda: len(publisher.forwarded) == 5)
+    
+    assert publisher.forwarded[-1][0] == "payments-order-service-DLQ"
+    assert publisher.forwarded[-1][2]["attempt"] == "1"
+    
+    stats = message_consumer.stats()
+    assert stats["retried"] == 3
+    assert stats["dead_lettered"] == 2
+    assert consumer.negative_acknowledged == [] and retry_consumer.negative_acknowledged == []
+    assert len(consumer.acknowledged) == 2 and len(retry_consumer.acknowledged) == 3
+    
+    await message_consumer.close()
+
+
+@pytest.mark.asyncio
+async def test_consumer_batch_retries_only_failed_messages():
+    client = FakeClient()
+    publisher = FakePublisher()
+    message_consumer = PulsarMessageConsumer(
+        client,
+        "order-service",
+        max_concurrent_handlers=1,
+        batch_max_messages=50,
+        retry_publisher=publisher,
+        retry_delays_seconds=[1.0],
+        max_attempts=2,
+    )
+    
+    handled = []
+    
+    async def handler(events):
+        if any(event.order_id == "order-poison" for event in events):
+            raise ValueError("Handler failed")
+        handled.extend(event.order_id for event in events)
+    
+    await message_consumer.subscribe_batch("payments", handler)
+    
+    consumer = client.consumers["persistent://public/default/payments"]
+    retry_consumer = client.consumers["persistent://public/default/payments-order-service-RETRY"]
+    
+    # A single shard puts the poison message in one part with the healthy ones
+    for order_id in ("order-1", "order-poison", "order-2", "order-3"):
+        consumer.messages.put(FakeMessage(
+            payment_processed(order_id),
+            partition_key=order_id,
+            properties={"event_type": "payment_processed"},
+        ))
+    
+    await wait_for(lambda: len(consumer.acknowledged) == 4)
+    
+    # Only the poison message goes to the retry topic
+    assert sorted(handled) == ["order-1", "order-2", "order-3"]
+    assert [(topic, key, properties["attempt"]) for topic, _, properties, key, _ in publisher.forwarded] == [
+        ("payments-order-service-RETRY", "order-poison", "2"),
+    ]
+    
+    # Its last attempt, again next to a healthy message, goes to the dead-letter topic alone
+    _, data, properties, key, _ = publisher.forwarded[0]
+    retry_consumer.messages.put(FakeMessage(
+        payment_processed("order-poison"),
+        partition_key=key,
+        data=data,
+        properties=properties,
+    ))
+    retry_consumer.messages.put(FakeMessage(
+        payment_processed("order-4"),
+        partition_key="order-4",
+        properties={"event_type": "payment_processed", "attempt": "2"},
+    ))
+    
+    await wait_for(lambda: len(retry_consumer.acknowledged) == 2)
+    
+    assert sorted(handled) == ["order-1", "order-2", "order-3", "order-4"]
+    assert [(topic, key) for topic, _, _, key, _ in publisher.forwarded[1:]] == [
+        ("payments-order-service-DLQ", "order-poison"),
+    ]
+    assert message_consumer.stats()["dead_lettered"] == 1
+    assert consumer.negative_acknowledged == [] and retry_consumer.negative_acknowledged == []
+    
+    await message_consumer.close()
+
+
+@pytest.mark.asyncio
+async def test_dead_letter_queue_peeks_and_replays():
+    client = FakeClient()
+    publisher = FakePublisher()
+    dead_letters = PulsarDeadLetterQueue(client, "order-service", publisher, receive_timeout_millis=20)
+    
+    await dead_letters.subscribe(["payments"])
+    
+    consumer = client.consumers["persistent://public/default/payments-order-service-DLQ"]
+    assert consumer.options["initial_position"] == pulsar.InitialPosition.Earliest
+    
+    properties = {"event_type": "payment_processed", "original_topic": "payments", "attempt": "4", "error": "boom"}
+    consumer.messages.put(FakeMessage(payment_processed("order-1"), partition_key="order-1", properties=properties))
+    
+    messages = await dead_letters.peek("payments")
+    
+    assert len(messages) == 1
+    assert messages[0]["event"]["order_id"] == "order-1"
+    assert messages[0]["attempts"] == 4
+    assert messages[0]["error"] == "boom"
+    assert consumer.acknowledged == []
+    
+    # Replaying sends the message back to its topic as a first attempt
+    consumer.messages.put(FakeMessage(payment_processed("order-1"), partition_key="order-1", properties=properties))
+    
+    assert await dead_letters.replay("payments") == 1
+    assert publisher.forwarded[0][0] == "payments"
+    assert publisher.forwarded[0][2] == {"event_type": "payment_processed"}
+    assert publisher.forwarded[0][3] == "order-1"
+    assert len(consumer.acknowledged) == 1
+    
+    with pytest.raises(ValueError):
+        await dead_letters.peek("orders")
+    
+    await dead_letters.close()
+
+
+@pytest.mark.asyncio
+async def test_consumer_limits_in_flight_and_pauses_on_pool_wait():
+    client = FakeClient()
+    pool_wait = 0.0
+    message_consumer = PulsarMessageConsumer(
+        client,
+        "order-service",
+        max_concurrent_handlers=8,
+        max_in_flight=2,
+        receiver_queue_size=10,
+        pool_wait=lambda: pool_wait,
+        pause_pool_wait_seconds=0.05,
+        pause_check_interval_seconds=0.01,
+    )
+    
+    release = asyncio.Event()
+    running = 0
+    most_running = 0
+    
+    async def handler(event):
+        nonlocal running, most_running
+        running += 1
+        most_running = max(most_running, running)
+        await release.wait()
+        running -= 1
+    
+    await message_consumer.subscribe("payments", handler)
+    
+    consumer = client.consumers["persistent://public/default/payments"]
+    assert consumer.options["receiver_queue_size"] == 10
+    
+    # Messages of different orders still wait for the in-flight limit
+    for i in range(4):
+        consumer.messages.put(FakeMessage(payment_processed(f"order-{i}"), partition_key=f"order-{i}"))
+    
+    await wait_for(lambda: running == 2)
+    await asyncio.sleep(0.05)
+    
+    assert most_running == 2
+    
+    release.set()
+    await wait_for(lambda: message_consumer.stats()["handled"] == 4)
+    
+    # No message is taken while connections are slow to get
+    pool_wait = 0.1
+    consumer.messages.put(FakeMessage(payment_processed("order-5"), partition_key="order-5"))
+    
+    await wait_for(lambda: message_consumer.stats()["paused"] == 1)
+    await asyncio.sleep(0.05)
+    
+    assert message_consumer.stats()["handled"] == 4
+    
+    # Still above half the threshold
+    pool_wait = 0.03
+    await asyncio.sleep(0.05)
+    
+    assert message_consumer.stats()["handled"] == 4
+    
+    pool_wait = 0.0
+    await wait_for(lambda: message_consumer.stats()["handled"] == 5)
+    
+    assert message_consumer.stats()["paused"] == 0
+    assert message_consumer.stats()["pauses"] == 1
+    
+    await message_consumer.close()
@@ -0,0 +1,291 @@
+# services/order-service/tests/unit/test_message_publisher.py
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import pulsar
+
+from domain.events import OrderCreated, OrderCancelled, PaymentRequested, PaymentProcessed
+from adapters.outbound.event_codec import EventCodec
+from adapters.outbound.pulsar_event_publisher import PulsarMessagePublisher
+from adapters.outbound.pulsar_topic_admin import PulsarTopicAdmin
+from adapters.outbound.payload_compression import PayloadCompressor, decompress
+
+
+class FakeProducer:
+    """Acks from another thread, like the Pulsar client does"""
+    
+    def __init__(self, result=pulsar.Result.Ok):
+        self.result = result
+        self.sent = []
+        self.sizes = []
+        self.flushed = False
+        self.closed = False
+    
+    def send_async(self, content, callback, properties=None, partition_key=None):
+        self.sizes.append(len(content))
+        content = decompress(content, (properties or {}).get("compression"))
+        self.sent.append((EventCodec().decode(content).to_dict(), properties, partition_key))
+        threading.Timer(0.01, callback, args=(self.result, len(self.sent))).start()
+    
+    def flush(self):
+        self.flushed = True
+    
+    def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    """Creates producers slowly, after failing the first few times"""
+    
+    def __init__(self, result=pulsar.Result.Ok, failures=0, delay=0.0):
+        self.result = result
+        self.failures = failures
+        self.delay = delay
+        self.created = 0
+        self.producers = {}
+        self.producer_options = {}
+    
+    def create_producer(self, topic, **options):
+        time.sleep(self.delay)
+        
+        if self.failures:
+            self.failures -= 1
+            raise pulsar.ConnectError("Pulsar error: ConnectError")
+        
+        self.created += 1
+        self.producer_options[topic] = options
+        return self.producers.setdefault(topic, FakeProducer(self.result))
+
+
+class FakeAdmin(BaseHTTPRequestHandler):
+    """Partitioned topic metadata of the Pulsar admin API"""
+    
+    # Topic name to partitions, 0 for topics without partitions
+    topics = {}
+    
+    def do_GET(self):
+        self._reply(200, json.dumps({"partitions": self.topics.get(self._topic(), 0)}).encode())
+    
+    def do_PUT(self):
+        if self._topic() in self.topics:
+            self._reply(409)
+        else:
+            self.topics[self._topic()] = self._partitions()
+            self._reply(204)
+    
+    def do_POST(self):
+        self.topics[self._topic()] = self._partitions()
+        self._reply(204)
+    
+    def _topic(self):
+        # /admin/v2/persistent/public/default/{topic}/partitions
+        return self.path.split("/")[-2]
+    
+    def _partitions(self):
+        return json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+    
+    def _reply(self, status, body=b""):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def admin_url():
+    FakeAdmin.topics = {"payments": 2, "inventory": 0}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeAdmin)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    yield f"http://127.0.0.1:{server.server_port}"
+    
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def events():
+    return [
+        OrderCreated(order_id="order-123", customer_id="customer-123", total_amount=40.0, saga_id="saga-123"),
+        PaymentRequested(order_id="order-123", customer_id="customer-123", amount=40.0, saga_id="saga-123"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_publisher_awaits_broker_ack(events):
+    client = FakeClient()
+    publisher = PulsarMessagePublisher(client, batching_max_messages=50, batching_max_publish_delay_ms=5)
+    
+    await publisher.publish(events[0], "orders")
+    await publisher.publish_with_key(events[1], "payments", "order-123")
+    
+    orders = client.producers["persistent://public/default/orders"]
+    payments = client.producers["persistent://public/default/payments"]
+    
+    # Events published without a key are keyed by their order ID
+    assert orders.sent == [(events[0].to_dict(), {"event_type": "order_created"}, "order-123")]
+    assert payments.sent == [(events[1].to_dict(), {"event_type": "payment_requested"}, "order-123")]
+    assert client.producer_options["persistent://public/default/orders"] == {
+        "batching_enabled": True,
+        "batching_max_messages": 50,
+        "batching_max_publish_delay_ms": 5,
+        "batching_type": pulsar.BatchingType.KeyBased,
+        "message_routing_mode": pulsar.PartitionsRoutingMode.RoundRobinDistribution,
+    }
+    
+    await publisher.close()
+    
+    assert orders.flushed and orders.closed
+
+
+@pytest.mark.asyncio
+async def test_publisher_publish_many(events):
+    client = FakeClient()
+    publisher = PulsarMessagePublisher(client)
+    
+    await publisher.publish_many([(event, "orders") for event in events * 3])
+    
+    orders = client.producers["persistent://public/default/orders"]
+    assert [content["event_type"] for content, _, _ in orders.sent] == ["order_created", "payment_requested"] * 3
+
+
+@pytest.mark.asyncio
+async def test_publisher_raises_failed_sends(events):
+    publisher = PulsarMessagePublisher(FakeClient(pulsar.Result.Timeout))
+    
+    with pytest.raises(pulsar.PulsarException):
+        await publisher.publish(events[0], "orders")
+    
+    with pytest.raises(pulsar.PulsarException):
+        await publisher.publish_many([(event, "orders") for event in events])
+
+
+@pytest.mark.asyncio
+async def test_publisher_creates_each_producer_once(events):
+    client = FakeClient(delay=0.05)
+    publisher = PulsarMessagePublisher(client)
+    
+    # Concurrent first publishes share one producer creation
+    await asyncio.gather(*(publisher.publish_with_key(events[0], "orders", f"order-{i}") for i in range(10)))
+    
+    assert client.created == 1
+    assert len(client.producers["persistent://public/default/orders"].sent) == 10
+
+
+@pytest.mark.asyncio
+async def test_publisher_warm_up_retries_with_backoff(events):
+    client = FakeClient(failures=3)
+    publisher = PulsarMessagePublisher(
+        client,
+        connect_max_attempts=2,
+        reconnect_initial_delay_seconds=0.01,
+        reconnect_max_delay_seconds=0.02,
+    )
+    
+    assert publisher.ready
+    
+    # Warming up keeps retrying past connect_max_attempts until connected
+    warm_up = asyncio.create_task(publisher.warm_up(["orders", "payments"]))
+    
+    await asyncio.sleep(0)
+    assert not publisher.ready
+    
+    await warm_up
+    
+    assert publisher.ready
+    assert client.created == 2
+    
+    # Publishing does not create producers again
+    await publisher.publish(events[0], "orders")
+    assert client.created == 2
+    
+    # A publish gives up after connect_max_attempts
+    client.failures = 2
+    
+    with pytest.raises(pulsar.ConnectError):
+        await publisher.publish(events[0], "shipping")
+
+
+@pytest.mark.asyncio
+async def test_publisher_warm_up_creates_partitioned_topics(admin_url):
+    client = FakeClient()
+    publisher = PulsarMessagePublisher(
+        client,
+        topic_admin=PulsarTopicAdmin(admin_url),
+        topic_partitions={"orders": 4, "payments": 4, "inventory": 4, "shipping": 1},
+    )
+    
+    await publisher.warm_up(["orders", "payments", "inventory"])
+    
+    # New topics are created and partitions added, but an existing topic
+    # without partitions is left as it is
+    assert publisher.partitions == {"orders": 4, "payments": 4, "inventory": 0, "shipping": 1}
+    assert FakeAdmin.topics == {"orders": 4, "payments": 4, "inventory": 0, "shipping": 1}
+    assert publisher.ready
+    
+    # Partitions are never removed
+    assert PulsarTopicAdmin(admin_url).ensure_partitions("payments", 2) == 4
+    
+    await publisher.close()
+
+
+@pytest.mark.asyncio
+async def test_publisher_compresses_large_events(events):
+    client = FakeClient()
+    publisher = PulsarMessagePublisher(client, compressor=PayloadCompressor("zlib", threshold_bytes=1024))
+    
+    large_order = OrderCreated(
+        order_id="order-456",
+        items={f"product-{i}": {"quantity": 1, "unit_price": 10.0} for i in range(200)},
+    )
+    
+    await publisher.publish(events[0], "orders")
+    await publisher.publish(large_order, "orders")
+    
+    # Only the event over the threshold is compressed, and flagged as such
+    orders = client.producers["persistent://public/default/orders"]
+    assert [properties for _, properties, _ in orders.sent] == [
+        {"event_type": "order_created"},
+        {"event_type": "order_created", "compression": "zlib"},
+    ]
+    assert orders.sent[1][0] == large_order.to_dict()
+    assert orders.sizes[1] < len(EventCodec().encode(large_order)) / 2
+    assert publisher.compressor.stats()["compressed"] == 1
+    
+    await publisher.close()
+
+
+@pytest.mark.asyncio
+async def test_publisher_marks_compensations_high_priority(events):
+    client = FakeClient()
+    publisher = PulsarMessagePublisher(client, prioritize_compensations=True)
+    
+    await publisher.publish(events[0], "orders")
+    await publisher.publish(OrderCancelled(order_id="order-123", reason="changed my mind"), "orders")
+    await publisher.publish(PaymentProcessed(order_id="order-456", success=True), "payments")
+    # A failed payment starts the compensation of its order
+    await publisher.publish(PaymentProcessed(order_id="order-789", success=False), "payments")
+    
+    def sent(topic):
+        producer = client.producers[f"persistent://public/default/{topic}"]
+        return [(content["event_type"], content["order_id"], properties) for content, properties, _ in producer.sent]
+    
+    # They stay on their topic, behind the earlier events of their order
+    assert sent("orders") == [
+        ("order_created", "order-123", {"event_type": "order_created"}),
+        ("order_cancelled", "order-123", {"event_type": "order_cancelled", "priority": "high"}),
+    ]
+    assert sent("payments") == [
+        ("payment_processed", "order-456", {"event_type": "payment_processed"}),
+        ("payment_processed", "order-789", {"event_type": "payment_processed", "priority": "high"}),
+    ]
+    assert set(client.producers) == {"persistent://public/default/orders", "persistent://public/default/payments"}
+    
+    await publisher.close()